@@ -0,0 +1,224 @@
+"""
+batch_pipeline.py — Pipelined bulk scoring for /analyze/batch
+Resumes flow through three overlapping stages connected by bounded queues:
+
+    read ──► parse (PARSE_WORKERS) ──► embed (SCORE_WORKERS) ──► score ──► events
+
+Each stage runs on its execution.py pool (parsing on the parse worker
+processes), so while one resume is being parsed others are being embedded —
+concurrent embeds coalesce in the embedding micro-batcher — and scored. The
+bounded queues give backpressure: a slow stage (or a slow client reading the
+stream) pauses the stages upstream instead of buffering every PDF in memory.
+
+The JD is embedded and its keywords extracted once (scorer.prepare_job).
+run_batch yields one event per resume as it finishes (completion order),
+then a summary with every result in input order plus a best-first ranking.
+"""
+import asyncio
+import os
+import time
+from typing import AsyncIterator, Awaitable, Callable, NamedTuple, Optional
+
+from execution import STAGE_WORKERS, StageTimeout, run_stage
+from parse_pool import parse_runner
+from parser import parse_pdf
+from embeddings import chunk_and_embed
+from scorer import JobTarget, score_against_job
+
+# Items allowed to wait between two stages (per queue)
+QUEUE_SIZE = int(os.getenv("BATCH_QUEUE_SIZE", "16"))
+
+
+class BatchSource(NamedTuple):
+    """One input file; `read` loads its bytes (lazily, when the pipeline gets to it)."""
+    filename: str
+    read: Callable[[], Awaitable[bytes]]
+
+
+class _Failed(Exception):
+    def __init__(self, status: int, detail: str):
+        super().__init__(detail)
+        self.status = status
+        self.detail = detail
+
+
+_DONE = object()
+
+
+async def _guard(stage: str, coro: Awaitable):
+    """Map stage failures to the status codes /analyze would return."""
+    try:
+        return await coro
+    except _Failed:
+        raise
+    except StageTimeout as e:
+        raise _Failed(504, f"{stage} error: {e}")
+    except ValueError as e:
+        raise _Failed(422, str(e))
+    except Exception as e:
+        raise _Failed(500, f"{stage} error: {e}")
+
+
+async def run_batch(
+    sources: list[BatchSource],
+    job: JobTarget,
+    validate: Callable[[bytes], Optional[tuple[int, str]]],
+) -> AsyncIterator[dict]:
+    """
+    Drive every source through parse → embed → score and yield events:
+        {"type": "result", "index", "filename", "overall_score", ...}
+        {"type": "error", "index", "filename", "status", "detail"}
+        {"type": "summary", ...}  (last)
+    `validate(pdf_bytes)` returns (status, detail) to reject a file before parsing.
+    """
+    started = time.perf_counter()
+    parse_q: asyncio.Queue = asyncio.Queue(QUEUE_SIZE)
+    embed_q: asyncio.Queue = asyncio.Queue(QUEUE_SIZE)
+    score_q: asyncio.Queue = asyncio.Queue(QUEUE_SIZE)
+    out_q: asyncio.Queue = asyncio.Queue(QUEUE_SIZE)
+
+    async def fail(index: int, t0: float, error: _Failed) -> None:
+        await out_q.put({
+            "type": "error",
+            "index": index,
+            "filename": sources[index].filename,
+            "status": error.status,
+            "detail": error.detail,
+            "elapsed_ms": round((time.perf_counter() - t0) * 1000, 1),
+        })
+
+    async def read_stage() -> None:
+        for index, source in enumerate(sources):
+            t0 = time.perf_counter()
+            try:
+                pdf_bytes = await _guard("read", source.read())
+                rejected = validate(pdf_bytes)
+                if rejected:
+                    raise _Failed(*rejected)
+            except _Failed as e:
+                await fail(index, t0, e)
+                continue
+            await parse_q.put((index, t0, pdf_bytes))
+
+    async def parse_stage() -> None:
+        runner = parse_runner()
+        while (item := await parse_q.get()) is not _DONE:
+            index, t0, pdf_bytes = item
+            try:
+                parsed = await _guard("parse", run_stage("parse", parse_pdf, pdf_bytes, runner))
+                if len(parsed["text"].strip()) < 50:
+                    raise _Failed(422, "Could not extract readable text from PDF.")
+            except _Failed as e:
+                await fail(index, t0, e)
+                continue
+            await embed_q.put((index, t0, parsed))
+
+    async def embed_stage() -> None:
+        while (item := await embed_q.get()) is not _DONE:
+            index, t0, parsed = item
+            try:
+                emb = await _guard("embedding", run_stage("score", chunk_and_embed, parsed["text"]))
+            except _Failed as e:
+                await fail(index, t0, e)
+                continue
+            await score_q.put((index, t0, parsed, emb))
+
+    async def score_stage() -> None:
+        while (item := await score_q.get()) is not _DONE:
+            index, t0, parsed, emb = item
+            try:
+                result = await _guard(
+                    "scoring",
+                    run_stage("score", score_against_job, parsed["text"], emb, job, parsed["profile"]),
+                )
+            except _Failed as e:
+                await fail(index, t0, e)
+                continue
+            await out_q.put({
+                "type": "result",
+                "index": index,
+                "filename": sources[index].filename,
+                **result,
+                "parse_tier": parsed["tier"],
+                "parse_cached": parsed["cached"],
+                "elapsed_ms": round((time.perf_counter() - t0) * 1000, 1),
+            })
+
+    # Each stage sends one _DONE per downstream consumer once all its workers finish
+    n_parse = STAGE_WORKERS["parse"]
+    n_embed = STAGE_WORKERS["score"]
+    n_score = max(1, STAGE_WORKERS["score"] // 2)
+
+    async def close(queue: asyncio.Queue, consumers: int) -> None:
+        for _ in range(consumers):
+            await queue.put(_DONE)
+
+    async def pipeline() -> None:
+        async def reader():
+            await read_stage()
+            await close(parse_q, n_parse)
+
+        async def parsers():
+            await asyncio.gather(*(parse_stage() for _ in range(n_parse)))
+            await close(embed_q, n_embed)
+
+        async def embedders():
+            await asyncio.gather(*(embed_stage() for _ in range(n_embed)))
+            await close(score_q, n_score)
+
+        async def scorers():
+            await asyncio.gather(*(score_stage() for _ in range(n_score)))
+            await out_q.put(_DONE)
+
+        tasks = [asyncio.create_task(c) for c in (reader(), parsers(), embedders(), scorers())]
+        try:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+        finally:
+            # Also reached when run_batch cancels us (client disconnected)
+            for t in tasks:
+                t.cancel()
+        errors = [t.exception() for t in done if t.exception()]
+        if errors:
+            # Unexpected bug in a stage: end the stream instead of hanging the client
+            print(f"[batch] Pipeline failed: {errors[0]!r}")
+            await out_q.put(_DONE)
+
+    task = asyncio.create_task(pipeline())
+    results: list[Optional[dict]] = [None] * len(sources)
+    try:
+        while (event := await out_q.get()) is not _DONE:
+            results[event["index"]] = event
+            yield event
+        await task
+    finally:
+        # Client went away (or the generator was closed early): stop every stage
+        if not task.done():
+            task.cancel()
+
+    elapsed = time.perf_counter() - started
+    ranking = sorted(
+        (r for r in results if r and r["type"] == "result"),
+        key=lambda r: (-r["overall_score"], r["index"]),
+    )
+    rank_of = {r["index"]: rank for rank, r in enumerate(ranking, start=1)}
+    summary = []
+    for i, r in enumerate(results):
+        entry = {"index": i, "filename": sources[i].filename}
+        if r is None:
+            entry.update(status=500, error="not processed")
+        elif r["type"] == "error":
+            entry.update(status=r["status"], error=r["detail"])
+        else:
+            entry.update(overall_score=r["overall_score"], rank=rank_of[i])
+        summary.append(entry)
+
+    yield {
+        "type": "summary",
+        "total": len(sources),
+        "succeeded": len(ranking),
+        "failed": len(sources) - len(ranking),
+        "elapsed_s": round(elapsed, 2),
+        "resumes_per_s": round(len(ranking) / elapsed, 2) if elapsed > 0 else 0.0,
+        "results": summary,
+        "ranking": [r["index"] for r in ranking],
+    }
@@ -0,0 +1,71 @@
+"""
+body_limit.py — Reject oversized request bodies before they are buffered
+Starlette receives and spools the whole multipart body before an endpoint
+runs, so a size check inside the endpoint comes too late. This ASGI
+middleware caps the body per path:
+    - a Content-Length above the cap gets 413 without reading the body
+    - a chunked body is counted as it streams and cut off at the cap
+"""
+import json
+from typing import Callable
+
+
+class BodyTooLarge(Exception):
+    pass
+
+
+class BodyLimitMiddleware:
+    def __init__(self, app: Callable, limits: dict[str, int]):
+        self.app = app
+        self.limits = limits
+
+    async def _reject(self, send: Callable, limit: int) -> None:
+        body = json.dumps(
+            {"detail": f"Request body is too large; the limit is {limit // (1024 * 1024)} MB."}
+        ).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    async def __call__(self, scope: dict, receive: Callable, send: Callable) -> None:
+        limit = self.limits.get(scope.get("path", "")) if scope["type"] == "http" else None
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        length = dict(scope["headers"]).get(b"content-length")
+        if length is not None and length.isdigit() and int(length) > limit:
+            await self._reject(send, limit)
+            return
+
+        received = 0
+        started = rejected = False
+
+        async def limited_receive() -> dict:
+            nonlocal received, rejected
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit and not rejected:
+                    rejected = True
+                    if not started:
+                        await self._reject(send, limit)
+                    # The form parser turns this into its own error response,
+                    # which tracked_send drops
+                    raise BodyTooLarge()
+            return message
+
+        async def tracked_send(message: dict) -> None:
+            nonlocal started
+            if rejected and not started:
+                return
+            started = started or message["type"] == "http.response.start"
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracked_send)
+        except BodyTooLarge:
+            pass
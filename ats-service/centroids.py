@@ -0,0 +1,82 @@
+"""
+centroids.py — Per-role / per-seniority reference centroids for no-JD scoring
+The artifact is produced offline by scripts/build_centroids.py from the
+rag-service benchmark resumes and consists of two files:
+    <prefix>.npy   — float32 matrix, one L2-normalized centroid per row
+    <prefix>.json  — {"model": ..., "dim": ..., "entries": [{role, seniority, count, row}]}
+The matrix is memory-mapped, so loading is instant and costs no heap.
+Rows exist for every (role, seniority), every (role, "*") and the global ("*", "*").
+"""
+import difflib
+import json
+import os
+import re
+from typing import Optional
+
+import numpy as np
+
+ANY = "*"
+
+
+def normalize_role(role: Optional[str]) -> str:
+    return " ".join(re.sub(r"[^a-z0-9+#/. ]", " ", (role or "").lower()).split())
+
+
+def normalize_seniority(seniority: Optional[str]) -> str:
+    """'mid-level (3-6 yr)' -> 'mid-level', 'Senior' -> 'senior'."""
+    text = (seniority or "").lower().split("(")[0].strip()
+    return text.split()[0] if text else ""
+
+
+class CentroidStore:
+    def __init__(self, matrix: np.ndarray, entries: list[dict], model: str):
+        self.matrix = matrix
+        self.model = model
+        self._rows: dict[tuple[str, str], dict] = {
+            (e["role"], e["seniority"]): e for e in entries
+        }
+        self._roles = sorted({e["role"] for e in entries if e["role"] != ANY})
+        self._seniorities = sorted({e["seniority"] for e in entries if e["seniority"] != ANY})
+
+    @classmethod
+    def load(cls, prefix: str, model: str) -> Optional["CentroidStore"]:
+        """Memory-map the artifact; returns None if missing or built for another model."""
+        npy_path, meta_path = f"{prefix}.npy", f"{prefix}.json"
+        if not (os.path.exists(npy_path) and os.path.exists(meta_path)):
+            return None
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("model") != model:
+            print(f"[centroids] Artifact built for {meta.get('model')!r}, expected {model!r}; ignoring it.")
+            return None
+        matrix = np.load(npy_path, mmap_mode="r")
+        print(f"[centroids] Loaded {len(meta['entries'])} centroids from {npy_path}")
+        return cls(matrix, meta["entries"], model)
+
+    @property
+    def roles(self) -> list[str]:
+        return self._roles
+
+    def _match(self, value: str, known: list[str]) -> Optional[str]:
+        if not value:
+            return None
+        if value in known:
+            return value
+        prefixed = [k for k in known if k.startswith(value) or value.startswith(k)]
+        if len(prefixed) == 1:
+            return prefixed[0]
+        close = difflib.get_close_matches(value, known, n=1, cutoff=0.75)
+        return close[0] if close else None
+
+    def lookup(self, role: Optional[str] = None, seniority: Optional[str] = None) -> tuple[np.ndarray, dict]:
+        """
+        Most specific centroid for the hints: (role, seniority) → (role, *) → (*, *).
+        Returns (vector, entry) where entry has role / seniority / count.
+        """
+        r = self._match(normalize_role(role), self._roles) or ANY
+        s = self._match(normalize_seniority(seniority), self._seniorities) or ANY
+        for key in ((r, s), (r, ANY), (ANY, ANY)):
+            entry = self._rows.get(key)
+            if entry is not None:
+                return self.matrix[entry["row"]], entry
+        raise KeyError("centroid artifact has no global (*, *) row")
@@ -0,0 +1,159 @@
+"""
+chroma_writer.py — Write-behind buffer for ChromaDB inserts
+score_resume used to do one synchronous collection.add (an HNSW insert plus a
+SQLite commit) per request. Instead, records are queued here and a background
+thread writes them in batches — every `batch_size` records or every
+`flush_interval_s` seconds, whichever comes first.
+
+Memory is bounded by `max_queue`. When the queue is full the policy decides:
+    drop   — reject the new record immediately (never slows a request)
+    block  — wait up to `block_timeout_s` for space, then drop (backpressure)
+"""
+import threading
+import time
+import uuid
+from queue import Empty, Full, Queue
+from typing import Any, Callable, NamedTuple, Optional
+
+
+class _Record(NamedTuple):
+    id: str
+    embedding: list[float]
+    document: str
+    metadata: dict
+
+
+class WriteBehindWriter:
+    def __init__(
+        self,
+        collection_fn: Callable[[], Any],
+        max_queue: int = 10_000,
+        batch_size: int = 64,
+        flush_interval_s: float = 2.0,
+        policy: str = "drop",
+        block_timeout_s: float = 0.05,
+    ):
+        if policy not in ("drop", "block"):
+            raise ValueError(f"policy must be 'drop' or 'block', got {policy!r}")
+        self._collection_fn = collection_fn
+        self.batch_size = batch_size
+        self.flush_interval_s = flush_interval_s
+        self.policy = policy
+        self.block_timeout_s = block_timeout_s
+        self._queue: "Queue[_Record]" = Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._flush_requested = threading.Event()
+        self._stopping = threading.Event()
+
+        self.queued = 0
+        self.flushed = 0
+        self.dropped = 0
+        self.failed = 0
+        self.batches = 0
+        self.last_error: Optional[str] = None
+
+        self._thread = threading.Thread(target=self._run, name="chroma-writer", daemon=True)
+        self._thread.start()
+
+    # ------------------------------------------------------------------
+    # Producer side (request path)
+    # ------------------------------------------------------------------
+
+    def submit(self, embedding: list[float], document: str, metadata: dict) -> bool:
+        """Queue one record. Returns False if it was dropped (queue full or writer closed)."""
+        if self._stopping.is_set():
+            with self._lock:
+                self.dropped += 1
+            return False
+        record = _Record(str(uuid.uuid4()), embedding, document, metadata)
+        try:
+            if self.policy == "block":
+                self._queue.put(record, timeout=self.block_timeout_s)
+            else:
+                self._queue.put_nowait(record)
+        except Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+        with self._lock:
+            self.queued += 1
+        if self._queue.qsize() >= self.batch_size:
+            self._flush_requested.set()
+        return True
+
+    def flush(self) -> None:
+        """Ask the worker to write whatever is queued now."""
+        self._flush_requested.set()
+
+    def close(self, timeout: float = 10.0) -> None:
+        """
+        Flush everything still queued, then stop the worker (app shutdown).
+        Later submits are refused and counted as dropped.
+        """
+        self._stopping.set()
+        self._flush_requested.set()
+        self._thread.join(timeout)
+        if not self._thread.is_alive():
+            # A submit that passed the closed check just before close() may
+            # have landed after the worker's last drain
+            while self._write_batch():
+                pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "policy": self.policy,
+                "pending": self._queue.qsize(),
+                "max_queue": self._queue.maxsize,
+                "queued": self.queued,
+                "flushed": self.flushed,
+                "dropped": self.dropped,
+                "failed": self.failed,
+                "batches": self.batches,
+                "last_error": self.last_error,
+            }
+
+    # ------------------------------------------------------------------
+    # Worker
+    # ------------------------------------------------------------------
+
+    def _run(self) -> None:
+        while True:
+            self._flush_requested.wait(self.flush_interval_s)
+            self._flush_requested.clear()
+            stopping = self._stopping.is_set()
+            # On shutdown, keep writing until the queue is empty
+            while self._write_batch() and (stopping or self._queue.qsize() >= self.batch_size):
+                pass
+            if stopping:
+                return
+
+    def _write_batch(self) -> bool:
+        """Write up to batch_size records. Returns False when nothing was queued."""
+        batch: list[_Record] = []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except Empty:
+                break
+        if not batch:
+            return False
+
+        try:
+            self._collection_fn().add(
+                ids=[r.id for r in batch],
+                embeddings=[r.embedding for r in batch],
+                documents=[r.document for r in batch],
+                metadatas=[r.metadata for r in batch],
+            )
+        except Exception as e:
+            with self._lock:
+                self.failed += len(batch)
+                self.last_error = f"{time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())} {e}"
+            print(f"[chroma_writer] Batch of {len(batch)} failed: {e}")
+            return True
+
+        with self._lock:
+            self.flushed += len(batch)
+            self.batches += 1
+        return True
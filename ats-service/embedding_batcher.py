@@ -0,0 +1,181 @@
+"""
+embedding_batcher.py — Request-coalescing micro-batcher for the embedding model
+Concurrent callers submit texts; a single background thread gathers everything
+that arrives within a short window (or until the batch is full) and runs ONE
+padded model.encode call, then hands each caller its own slice via a Future.
+"""
+import threading
+import time
+from concurrent.futures import Future
+from queue import Empty, Queue
+from typing import Callable, NamedTuple, Optional
+
+import numpy as np
+
+# Histogram bucket upper bounds (inclusive); the last bucket is "+Inf"
+_BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+_WAIT_MS_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250)
+
+
+class _Pending(NamedTuple):
+    texts: list[str]
+    future: Future
+    enqueued_at: float
+
+
+def _bucket_index(bounds: tuple, value: float) -> int:
+    for i, bound in enumerate(bounds):
+        if value <= bound:
+            return i
+    return len(bounds)
+
+
+def _histogram(bounds: tuple, counts: list[int]) -> dict[str, int]:
+    labels = [str(b) for b in bounds] + ["+Inf"]
+    return dict(zip(labels, counts))
+
+
+class EmbeddingBatcher:
+    """
+    encode_fn receives a flat list of texts and must return an (n, d) array.
+    A batch is dispatched when it holds max_batch texts or window_ms has
+    passed since its first request arrived, whichever comes first.
+    """
+
+    def __init__(
+        self,
+        encode_fn: Callable[[list[str]], np.ndarray],
+        max_batch: int = 32,
+        window_ms: float = 5.0,
+    ):
+        self._encode_fn = encode_fn
+        self.max_batch = max_batch
+        self.window_s = window_ms / 1000.0
+        self._queue: "Queue[Optional[_Pending]]" = Queue()
+        self._lock = threading.Lock()
+        self._queued_texts = 0
+
+        self.batches = 0
+        self.texts = 0
+        self.errors = 0
+        self._batch_sizes = [0] * (len(_BATCH_SIZE_BUCKETS) + 1)
+        self._waits = [0] * (len(_WAIT_MS_BUCKETS) + 1)
+        self._wait_ms_total = 0.0
+        self._wait_ms_max = 0.0
+        self._requests = 0
+
+        self._thread = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+        self._thread.start()
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def submit(self, texts: list[str]) -> Future:
+        """Queue texts for the next batch; the Future resolves to an (n, d) array."""
+        future: Future = Future()
+        if not texts:
+            future.set_result(np.empty((0, 0), dtype=np.float32))
+            return future
+        with self._lock:
+            self._queued_texts += len(texts)
+        self._queue.put(_Pending(list(texts), future, time.monotonic()))
+        return future
+
+    def encode(self, texts: list[str]) -> np.ndarray:
+        """Blocking convenience wrapper around submit()."""
+        return self.submit(texts).result()
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Drain outstanding requests and stop the worker thread."""
+        self._queue.put(None)
+        self._thread.join(timeout)
+        # Anything submitted after the sentinel will never be picked up
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except Empty:
+                break
+            if item is not None:
+                item.future.set_exception(RuntimeError("embedding batcher is closed"))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "queue_depth": self._queued_texts,
+                "max_batch": self.max_batch,
+                "window_ms": self.window_s * 1000.0,
+                "batches": self.batches,
+                "texts": self.texts,
+                "errors": self.errors,
+                "avg_batch_size": round(self.texts / self.batches, 2) if self.batches else 0.0,
+                "batch_size_histogram": _histogram(_BATCH_SIZE_BUCKETS, self._batch_sizes),
+                "wait_ms_histogram": _histogram(_WAIT_MS_BUCKETS, self._waits),
+                "wait_ms_avg": round(self._wait_ms_total / self._requests, 3) if self._requests else 0.0,
+                "wait_ms_max": round(self._wait_ms_max, 3),
+            }
+
+    # ------------------------------------------------------------------
+    # Worker
+    # ------------------------------------------------------------------
+
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+
+            batch = [first]
+            size = len(first.texts)
+            deadline = first.enqueued_at + self.window_s
+            stopping = False
+            while size < self.max_batch:
+                remaining = deadline - time.monotonic()
+                try:
+                    # Past the window, still sweep up anything that queued
+                    # while the previous batch was encoding
+                    if remaining <= 0:
+                        item = self._queue.get_nowait()
+                    else:
+                        item = self._queue.get(timeout=remaining)
+                except Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+                size += len(item.texts)
+
+            self._execute(batch)
+            if stopping:
+                return
+
+    def _execute(self, batch: list[_Pending]) -> None:
+        texts = [t for p in batch for t in p.texts]
+        started = time.monotonic()
+
+        with self._lock:
+            self._queued_texts -= len(texts)
+            self.batches += 1
+            self.texts += len(texts)
+            self._batch_sizes[_bucket_index(_BATCH_SIZE_BUCKETS, len(texts))] += 1
+            for p in batch:
+                wait_ms = (started - p.enqueued_at) * 1000.0
+                self._requests += 1
+                self._wait_ms_total += wait_ms
+                self._wait_ms_max = max(self._wait_ms_max, wait_ms)
+                self._waits[_bucket_index(_WAIT_MS_BUCKETS, wait_ms)] += 1
+
+        try:
+            vectors = np.asarray(self._encode_fn(texts))
+        except Exception as e:
+            with self._lock:
+                self.errors += 1
+            for p in batch:
+                p.future.set_exception(e)
+            return
+
+        offset = 0
+        for p in batch:
+            p.future.set_result(vectors[offset : offset + len(p.texts)])
+            offset += len(p.texts)
@@ -0,0 +1,136 @@
+"""
+embedding_cache.py — Content-addressed cache for embedding vectors
+Two levels:
+    1. In-process LRU bounded by total vector bytes (always on)
+    2. Optional SQLite store on disk that survives restarts (EMBED_CACHE_PATH)
+Keys are SHA-256 hashes of model name + prefix + text, so identical inputs
+(popular JDs, the no-JD reference string) are only ever encoded once.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+
+_DEFAULT_MAX_BYTES = 64 * 1024 * 1024  # ~43k bge-small vectors
+
+
+def make_key(model_name: str, prefix: str, text: str) -> str:
+    """Content hash of everything that determines the embedding output."""
+    h = hashlib.sha256()
+    for part in (model_name, prefix, text):
+        data = part.encode("utf-8")
+        # Length-prefix each part so ("ab", "c") and ("a", "bc") never collide
+        h.update(len(data).to_bytes(8, "little"))
+        h.update(data)
+    return h.hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Thread-safe two-level embedding cache.
+    Vectors are stored as float32; the memory tier evicts least-recently-used
+    entries once the summed vector size exceeds max_bytes.
+    """
+
+    def __init__(self, max_bytes: int = _DEFAULT_MAX_BYTES, disk_path: Optional[str] = None):
+        self.max_bytes = max_bytes
+        self.disk_path = disk_path or None
+        self._lru: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if self.disk_path:
+            os.makedirs(os.path.dirname(os.path.abspath(self.disk_path)), exist_ok=True)
+            self._db = sqlite3.connect(self.disk_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vec BLOB NOT NULL)"
+            )
+            self._db.commit()
+
+    # ------------------------------------------------------------------
+    # Lookup / insert
+    # ------------------------------------------------------------------
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        with self._lock:
+            vec = self._lru.get(key)
+            if vec is not None:
+                self._lru.move_to_end(key)
+                self.hits += 1
+                return vec
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT vec FROM embeddings WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    vec = np.frombuffer(row[0], dtype=np.float32)
+                    self._put_memory(key, vec)
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return vec
+
+            self.misses += 1
+            return None
+
+    def put(self, key: str, vec: np.ndarray) -> np.ndarray:
+        vec = np.asarray(vec, dtype=np.float32)
+        # Cached arrays are shared between callers — make them read-only
+        vec.setflags(write=False)
+        with self._lock:
+            self._put_memory(key, vec)
+            if self._db is not None:
+                try:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO embeddings (key, vec) VALUES (?, ?)",
+                        (key, vec.tobytes()),
+                    )
+                    self._db.commit()
+                except sqlite3.Error as e:
+                    print(f"[embedding_cache] Disk write failed ({e}); keeping memory tier only.")
+        return vec
+
+    def _put_memory(self, key: str, vec: np.ndarray) -> None:
+        old = self._lru.pop(key, None)
+        if old is not None:
+            self._bytes -= old.nbytes
+        self._lru[key] = vec
+        self._bytes += vec.nbytes
+        while self._bytes > self.max_bytes and self._lru:
+            _, evicted = self._lru.popitem(last=False)
+            self._bytes -= evicted.nbytes
+            self.evictions += 1
+
+    # ------------------------------------------------------------------
+    # Introspection
+    # ------------------------------------------------------------------
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._lru),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "disk_path": self.disk_path,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._lru.clear()
+            self._bytes = 0
@@ -1,38 +1,192 @@
 """
 embeddings.py — Local sentence-transformers embeddings using BAAI/bge-small-en-v1.5
 Runs entirely on CPU. Model is auto-downloaded (~130MB) on first run and cached.
+Encoded vectors are memoised in a content-addressed cache (see embedding_cache.py).
 """
+import copy
+import os
+import threading
+
 import numpy as np
 from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity as sk_cosine_similarity
+
+from embedding_batcher import EmbeddingBatcher
+from embedding_cache import EmbeddingCache, make_key
 
 # ---------------------------------------------------------------------------
 # Singleton model loader — loaded once at module import, reused across requests
+#
+# EMBED_BACKEND selects the inference runtime:
+#   torch      — PyTorch (default)
+#   onnx       — exported ONNX graph on onnxruntime
+#   onnx-int8  — ONNX graph with dynamic int8 quantization (exported once into
+#                EMBED_ONNX_DIR on first use, then loaded from there)
 # ---------------------------------------------------------------------------
 from typing import Optional
 _MODEL_NAME = "BAAI/bge-small-en-v1.5"
+BACKENDS = ("torch", "onnx", "onnx-int8")
+_BACKEND = os.getenv("EMBED_BACKEND", "torch").strip().lower()
+_ONNX_DIR = os.getenv("EMBED_ONNX_DIR", "./onnx_models/bge-small-en-v1.5")
+_ONNX_QUANT_CONFIG = os.getenv("EMBED_ONNX_QUANT", "avx2")  # arm64 | avx2 | avx512 | avx512_vnni
 _model: Optional[SentenceTransformer] = None
+_model_lock = threading.Lock()
+
+if _BACKEND not in BACKENDS:
+    raise ValueError(f"EMBED_BACKEND must be one of {BACKENDS}, got {_BACKEND!r}")
+
+# Vectors from different runtimes are close but not bit-identical, so the
+# cache namespace carries the backend (torch keeps the bare model name).
+MODEL_ID = _MODEL_NAME if _BACKEND == "torch" else f"{_MODEL_NAME}#{_BACKEND}"
+
+
+def _int8_file_name() -> str:
+    return f"onnx/model_qint8_{_ONNX_QUANT_CONFIG}.onnx"
+
+
+def export_onnx_int8(output_dir: str = _ONNX_DIR) -> str:
+    """
+    Export the ONNX graph and a dynamically int8-quantized copy into output_dir.
+    Returns the path of the quantized file.
+    """
+    from sentence_transformers import export_dynamic_quantized_onnx_model
+
+    print(f"[embeddings] Exporting int8 ONNX model ({_ONNX_QUANT_CONFIG}) to {output_dir}...")
+    onnx_model = SentenceTransformer(_MODEL_NAME, backend="onnx")
+    onnx_model.save(output_dir)
+    export_dynamic_quantized_onnx_model(
+        onnx_model, quantization_config=_ONNX_QUANT_CONFIG, model_name_or_path=output_dir
+    )
+    return os.path.join(output_dir, _int8_file_name())
+
+
+def _load_model() -> SentenceTransformer:
+    if _BACKEND == "onnx":
+        return SentenceTransformer(_MODEL_NAME, backend="onnx")
+    if _BACKEND == "onnx-int8":
+        if not os.path.exists(os.path.join(_ONNX_DIR, _int8_file_name())):
+            export_onnx_int8(_ONNX_DIR)
+        return SentenceTransformer(
+            _ONNX_DIR, backend="onnx", model_kwargs={"file_name": _int8_file_name()}
+        )
+    return SentenceTransformer(_MODEL_NAME)
 
 
 def get_model() -> SentenceTransformer:
     global _model
     if _model is None:
-        print(f"[embeddings] Loading {_MODEL_NAME} (first-time download ~130MB)...")
-        _model = SentenceTransformer(_MODEL_NAME)
-        print(f"[embeddings] Model ready.")
+        with _model_lock:
+            if _model is None:
+                print(f"[embeddings] Loading {_MODEL_NAME} [{_BACKEND}] (first-time download ~130MB)...")
+                _model = _load_model()
+                print(f"[embeddings] Model ready.")
     return _model
 
 
+def backend_name() -> str:
+    return _BACKEND
+
+
+def model_name() -> str:
+    return _MODEL_NAME
+
+
+# ---------------------------------------------------------------------------
+# Embedding cache — memory LRU (+ optional SQLite file via EMBED_CACHE_PATH)
+# ---------------------------------------------------------------------------
+_QUERY_PREFIX = "Represent this sentence: "
+_cache = EmbeddingCache(
+    max_bytes=int(os.getenv("EMBED_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+    disk_path=os.getenv("EMBED_CACHE_PATH", ""),
+)
+
+
+def cache_stats() -> dict:
+    return _cache.stats()
+
+
+# ---------------------------------------------------------------------------
+# Micro-batcher — coalesces concurrent encode calls into one padded batch.
+# EMBED_BATCH_WINDOW_MS=0 disables it (each caller encodes directly).
+# ---------------------------------------------------------------------------
+_BATCH_WINDOW_MS = float(os.getenv("EMBED_BATCH_WINDOW_MS", "5"))
+_BATCH_MAX_ITEMS = int(os.getenv("EMBED_BATCH_MAX_ITEMS", "32"))
+_batcher: Optional[EmbeddingBatcher] = None
+_batcher_lock = threading.Lock()
+
+
+def _model_encode(texts: list[str]) -> np.ndarray:
+    return get_model().encode(
+        texts, normalize_embeddings=True, batch_size=max(_BATCH_MAX_ITEMS, 32)
+    )
+
+
+def get_batcher() -> Optional[EmbeddingBatcher]:
+    global _batcher
+    if _BATCH_WINDOW_MS <= 0:
+        return None
+    with _batcher_lock:
+        if _batcher is None:
+            _batcher = EmbeddingBatcher(
+                _model_encode, max_batch=_BATCH_MAX_ITEMS, window_ms=_BATCH_WINDOW_MS
+            )
+    return _batcher
+
+
+def batcher_stats() -> Optional[dict]:
+    return _batcher.stats() if _batcher is not None else None
+
+
+def shutdown_batcher() -> None:
+    global _batcher
+    with _batcher_lock:
+        if _batcher is not None:
+            _batcher.close()
+            _batcher = None
+
+
+def _encode(texts: list[str]) -> np.ndarray:
+    batcher = get_batcher()
+    if batcher is not None:
+        return batcher.encode(texts)
+    return _model_encode(texts)
+
+
+def _encode_cached(items: list[tuple[str, str]]) -> np.ndarray:
+    """
+    Encode (prefix, text) pairs through the cache.
+    Only cache misses reach the model, and they go in a single encode call.
+    """
+    keys = [make_key(MODEL_ID, prefix, text) for prefix, text in items]
+    vectors: list[Optional[np.ndarray]] = [_cache.get(k) for k in keys]
+
+    missing = [i for i, v in enumerate(vectors) if v is None]
+    if missing:
+        encoded = _encode([items[i][0] + items[i][1] for i in missing])
+        for i, vec in zip(missing, encoded):
+            vectors[i] = _cache.put(keys[i], vec)
+
+    return np.vstack(vectors)
+
+
+def _query_prefix(text: str) -> str:
+    # BGE recommendation: prefix with "Represent this sentence:"
+    return _QUERY_PREFIX if len(text) < 512 else ""
+
+
 def get_embedding(text: str) -> np.ndarray:
     """
     Returns a normalized L2 embedding vector for the given text.
     BGE models work best with a query prefix for asymmetric retrieval.
     """
-    model = get_model()
-    # BGE recommendation: prefix with "Represent this sentence:"
-    prefixed = f"Represent this sentence: {text}" if len(text) < 512 else text
-    embedding = model.encode(prefixed, normalize_embeddings=True)
-    return embedding
+    return embed_batch([text])[0]
+
+
+def embed_batch(texts: list[str]) -> np.ndarray:
+    """
+    Embed many texts (e.g. a list of JDs) in one batched encode call.
+    Returns an (n, d) matrix; row i matches get_embedding(texts[i]).
+    """
+    return _encode_cached([(_query_prefix(t), t) for t in texts])
 
 
 def cosine_sim(vec_a: np.ndarray, vec_b: np.ndarray) -> float:
@@ -41,34 +195,100 @@ def cosine_sim(vec_a: np.ndarray, vec_b: np.ndarray) -> float:
     Formula: score = (A · B) / (||A|| * ||B||)
     Since BGE embeddings are L2-normalized, this is just the dot product.
     """
-    a = vec_a.reshape(1, -1)
-    b = vec_b.reshape(1, -1)
-    score = float(sk_cosine_similarity(a, b)[0][0])
+    score = float(np.dot(vec_a, vec_b))
     # Clamp to [0, 1] — negative similarity is treated as 0 match
     return max(0.0, min(1.0, score))
 
 
-def chunk_and_embed(text: str, chunk_size: int = 512) -> np.ndarray:
+def cosine_sims(matrix: np.ndarray, vec: np.ndarray) -> np.ndarray:
     """
-    For long documents: split into overlapping chunks, embed each,
-    then return the mean-pooled embedding.
+    Vectorized cosine_sim: similarity of every row of `matrix` to `vec`
+    as a single matrix-vector product, clamped to [0, 1].
     """
-    words = text.split()
-    if len(words) <= chunk_size:
-        return get_embedding(text)
+    return np.clip(matrix @ vec, 0.0, 1.0)
+
+
+# ---------------------------------------------------------------------------
+# Token-aware chunking — windows are cut on the model's own tokenizer so no
+# chunk exceeds what the encoder actually reads (bge-small: 512 tokens)
+# ---------------------------------------------------------------------------
+_CHUNK_OVERLAP_TOKENS = int(os.getenv("EMBED_CHUNK_OVERLAP_TOKENS", "32"))
+# HF fast tokenizers are not re-entrant ("Already borrowed"): the batcher
+# thread encodes with model.tokenizer, so each chunking thread gets its own copy
+_chunk_tokenizers = threading.local()
+
+
+def _chunk_tokenizer():
+    tokenizer = getattr(_chunk_tokenizers, "tokenizer", None)
+    if tokenizer is None:
+        tokenizer = _chunk_tokenizers.tokenizer = copy.deepcopy(get_model().tokenizer)
+    return tokenizer
 
-    chunks = []
-    step = chunk_size // 2  # 50% overlap
-    for i in range(0, len(words), step):
-        chunk = " ".join(words[i : i + chunk_size])
-        chunks.append(chunk)
 
+def chunk_text(text: str, max_tokens: Optional[int] = None) -> tuple[list[str], list[int]]:
+    """
+    Split text into windows of at most max_tokens model tokens (default: the
+    model's sequence length minus [CLS]/[SEP]) with a small overlap.
+    Returns (chunks, token_count_per_chunk).
+    """
     model = get_model()
-    embeddings = model.encode(chunks, normalize_embeddings=True)
-    # Mean pool
-    mean_emb = np.mean(embeddings, axis=0)
-    # Re-normalize
+    budget = max_tokens or (model.max_seq_length - 2)
+    offsets = _chunk_tokenizer()(
+        text, add_special_tokens=False, return_offsets_mapping=True, verbose=False
+    )["offset_mapping"]
+    if len(offsets) <= budget:
+        return [text], [len(offsets)]
+
+    # Overlap never exceeds a quarter of the window, so long texts aren't re-encoded
+    step = budget - min(_CHUNK_OVERLAP_TOKENS, budget // 4)
+    chunks, counts = [], []
+    for start in range(0, len(offsets), step):
+        window = offsets[start : start + budget]
+        # Slice the original text by character offsets to keep its spacing/casing
+        chunks.append(text[window[0][0] : window[-1][1]])
+        counts.append(len(window))
+        if start + budget >= len(offsets):
+            break
+    return chunks, counts
+
+
+def _document_items(text: str, max_tokens: Optional[int] = None) -> tuple[list[tuple[str, str]], list[int]]:
+    chunks, counts = chunk_text(text, max_tokens)
+    if len(chunks) == 1:
+        # Short document: embed exactly like get_embedding (query prefix rule applies)
+        return [(_query_prefix(text), text)], counts
+    return [("", c) for c in chunks], counts
+
+
+def _pool(vectors: np.ndarray, weights: list[int]) -> np.ndarray:
+    """Token-weighted mean of chunk embeddings, re-normalized."""
+    if len(vectors) == 1:
+        return vectors[0]
+    mean_emb = np.average(vectors, axis=0, weights=np.maximum(weights, 1))
     norm = np.linalg.norm(mean_emb)
     if norm > 0:
         mean_emb = mean_emb / norm
     return mean_emb
+
+
+def embed_document_with_queries(
+    text: str, queries: list[str], max_tokens: Optional[int] = None
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Embed a long document (resume) and any number of short texts (JDs,
+    reference text) in ONE batched encode call.
+    Returns (document_embedding, query_matrix); query rows match get_embedding.
+    """
+    doc_items, weights = _document_items(text, max_tokens)
+    query_items = [(_query_prefix(q), q) for q in queries]
+    vectors = _encode_cached(doc_items + query_items)
+    return _pool(vectors[: len(doc_items)], weights), vectors[len(doc_items) :]
+
+
+def chunk_and_embed(text: str, chunk_size: Optional[int] = None) -> np.ndarray:
+    """
+    For long documents: split into token-budget chunks, embed each,
+    then return the token-weighted mean-pooled embedding.
+    chunk_size overrides the per-chunk token budget.
+    """
+    return embed_document_with_queries(text, [], max_tokens=chunk_size)[0]
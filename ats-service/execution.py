@@ -0,0 +1,101 @@
+"""
+execution.py — Bounded worker pools for the blocking stages of /analyze
+CPU-heavy work (Docling parsing, embedding + scoring) runs on dedicated,
+fixed-size thread pools so the event loop stays free for other requests and
+/health. Every stage has its own wall-clock timeout.
+
+Settings (env):
+    PARSE_WORKERS / PARSE_TIMEOUT_S       — PDF extraction (threads that drive
+                                            the parse_pool worker processes)
+    SCORE_WORKERS / SCORE_TIMEOUT_S       — embedding + scoring
+    FEEDBACK_TIMEOUT_S                    — async LLM feedback call
+"""
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+STAGE_WORKERS = {
+    "parse": int(os.getenv("PARSE_WORKERS", "2")),
+    "score": int(os.getenv("SCORE_WORKERS", "4")),
+}
+
+STAGE_TIMEOUTS = {
+    "parse": float(os.getenv("PARSE_TIMEOUT_S", "60")),
+    "score": float(os.getenv("SCORE_TIMEOUT_S", "30")),
+    "feedback": float(os.getenv("FEEDBACK_TIMEOUT_S", "20")),
+}
+
+
+class StageTimeout(Exception):
+    """A pipeline stage did not finish within its configured timeout."""
+
+    def __init__(self, stage: str, timeout: float):
+        super().__init__(f"{stage} stage timed out after {timeout:g}s")
+        self.stage = stage
+        self.timeout = timeout
+
+
+_pools: dict[str, ThreadPoolExecutor] = {}
+_in_flight: dict[str, int] = {stage: 0 for stage in STAGE_WORKERS}
+_lock = threading.Lock()
+
+
+def _get_pool(stage: str) -> ThreadPoolExecutor:
+    with _lock:
+        pool = _pools.get(stage)
+        if pool is None:
+            pool = ThreadPoolExecutor(
+                max_workers=STAGE_WORKERS[stage], thread_name_prefix=f"ats-{stage}"
+            )
+            _pools[stage] = pool
+        return pool
+
+
+def start_pools() -> None:
+    """Create all stage pools up front (called from the app lifespan)."""
+    for stage in STAGE_WORKERS:
+        _get_pool(stage)
+
+
+def shutdown_pools() -> None:
+    with _lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        # Abandon queued work; a stuck Docling call must not block shutdown
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+async def run_stage(stage: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Run a blocking callable on the stage's pool and await it with the stage timeout.
+    On timeout the caller gets StageTimeout; the worker thread finishes in the
+    background but the pool size still caps how many such calls can pile up.
+    """
+    loop = asyncio.get_running_loop()
+    timeout = STAGE_TIMEOUTS[stage]
+    with _lock:
+        _in_flight[stage] += 1
+    try:
+        future = loop.run_in_executor(_get_pool(stage), functools.partial(fn, *args, **kwargs))
+        return await asyncio.wait_for(future, timeout=timeout)
+    except asyncio.TimeoutError:
+        raise StageTimeout(stage, timeout)
+    finally:
+        with _lock:
+            _in_flight[stage] -= 1
+
+
+def pool_stats() -> dict:
+    with _lock:
+        return {
+            stage: {
+                "workers": STAGE_WORKERS[stage],
+                "in_flight": _in_flight[stage],
+                "timeout_s": STAGE_TIMEOUTS[stage],
+            }
+            for stage in STAGE_WORKERS
+        }
@@ -0,0 +1,161 @@
+"""
+fast_pdf.py — Lightweight text-layer extraction with PyMuPDF
+Reads the PDF's embedded text layer block by block (no layout models, no OCR)
+and runs a cheap quality check on the result. parser.py uses it as the first
+tier and escalates to Docling whenever the check fails.
+
+Quality / layout checks (any failure → escalate):
+    chars_per_page  — too little text per page → scanned or image-only PDF
+    garbage_ratio   — share of replacement / private-use / control characters
+    avg_word_len    — very long "words" mean the text layer lost its spaces
+    columns         — more than MAX_COLUMNS text columns on a page (tables,
+                      sidebars within sidebars) needs Docling's layout model
+
+Single- and two-column pages are handled here: blocks spanning the page width
+(name, headings) split the page into bands, columns are detected per band,
+and within a two-column band the left column is read before the right one.
+"""
+import os
+import unicodedata
+from typing import NamedTuple, Optional
+
+import fitz  # PyMuPDF
+
+MIN_CHARS_PER_PAGE = int(os.getenv("FAST_PARSE_MIN_CHARS_PER_PAGE", "200"))
+MAX_GARBAGE_RATIO = float(os.getenv("FAST_PARSE_MAX_GARBAGE_RATIO", "0.02"))
+MAX_AVG_WORD_LEN = float(os.getenv("FAST_PARSE_MAX_AVG_WORD_LEN", "12"))
+MAX_COLUMNS = int(os.getenv("FAST_PARSE_MAX_COLUMNS", "2"))
+
+# A block wider than this fraction of the page is treated as full-width
+_FULL_WIDTH = 0.6
+# Horizontal gaps narrower than this fraction of the page are not gutters
+_MIN_GUTTER = 0.03
+# A band of text needs this share of the page's narrow-block text to be a column
+_MIN_COLUMN_SHARE = 0.15
+# Bullet glyphs normalized to the "- " Docling emits in markdown
+_BULLETS = "•◦▪▫●○■□➢➤►▸‣⁃∙·"
+
+
+class FastResult(NamedTuple):
+    text: str
+    pages: int
+    quality: dict
+    reason: Optional[str]  # None when the text passed every check
+
+
+def settings() -> dict:
+    """Thresholds in effect (part of the parse-cache fingerprint)."""
+    return {
+        "min_chars_per_page": MIN_CHARS_PER_PAGE,
+        "max_garbage_ratio": MAX_GARBAGE_RATIO,
+        "max_avg_word_len": MAX_AVG_WORD_LEN,
+        "max_columns": MAX_COLUMNS,
+    }
+
+
+def _is_garbage(ch: str) -> bool:
+    if ch == "�":
+        return True
+    cat = unicodedata.category(ch)
+    # Co = private use (unmapped glyphs), Cc/Cs = control / surrogates
+    return cat in ("Co", "Cs") or (cat == "Cc" and ch not in "\n\t")
+
+
+def _columns(blocks: list[tuple], page_width: float) -> list[tuple[float, float]]:
+    """
+    x-ranges of the text columns on a page. Narrow blocks are grouped into
+    bands separated by empty gutters; bands holding less than _MIN_COLUMN_SHARE
+    of the text (right-aligned dates, page numbers) don't count as columns.
+    """
+    narrow = sorted(
+        (b for b in blocks if (b[2] - b[0]) < _FULL_WIDTH * page_width), key=lambda b: b[0]
+    )
+    if not narrow:
+        return [(0.0, page_width)]
+    bands = [[narrow[0][0], narrow[0][2], len(narrow[0][4])]]
+    for b in narrow[1:]:
+        if b[0] - bands[-1][1] > _MIN_GUTTER * page_width:
+            bands.append([b[0], b[2], len(b[4])])
+        else:
+            bands[-1][1] = max(bands[-1][1], b[2])
+            bands[-1][2] += len(b[4])
+    total = sum(band[2] for band in bands) or 1
+    columns = [(x0, x1) for x0, x1, chars in bands if chars / total >= _MIN_COLUMN_SHARE]
+    return columns or [(0.0, page_width)]
+
+
+def _bands(blocks: list[tuple], page_width: float) -> list[list[tuple]]:
+    """Split the page top-to-bottom at full-width blocks; each one is its own band."""
+    bands, band = [], []
+    for b in sorted(blocks, key=lambda b: (b[1], b[0])):
+        if b[2] - b[0] >= _FULL_WIDTH * page_width:
+            if band:
+                bands.append(band)
+            bands.append([b])
+            band = []
+        else:
+            band.append(b)
+    if band:
+        bands.append(band)
+    return bands
+
+
+def _reading_order(band: list[tuple], columns: list[tuple[float, float]]) -> list[tuple]:
+    """Left column top-to-bottom, then the right one; plain top-to-bottom otherwise."""
+    if len(columns) < 2:
+        return band
+    split = (columns[0][1] + columns[1][0]) / 2
+    return sorted(band, key=lambda b: (b[0] >= split, b[1], b[0]))
+
+
+def _normalize_block(text: str) -> str:
+    lines = []
+    for line in text.splitlines():
+        stripped = line.strip()
+        if stripped and stripped[0] in _BULLETS:
+            stripped = "- " + stripped[1:].lstrip()
+        lines.append(stripped)
+    return "\n".join(lines)
+
+
+def page_info(pdf_bytes: bytes) -> tuple[int, bool]:
+    """(page_count, needs_password) without touching any page content."""
+    with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+        return doc.page_count, bool(doc.needs_pass)
+
+
+def extract(pdf_bytes: bytes) -> FastResult:
+    """Extract the text layer and grade it. Never raises on poor quality — check `reason`."""
+    with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+        parts, max_columns = [], 1
+        for page in doc:
+            width = page.rect.width or 1.0
+            # (x0, y0, x1, y1, text, block_no, block_type); type 1 = image
+            blocks = [b for b in page.get_text("blocks", sort=False) if b[6] == 0 and b[4].strip()]
+            for band in _bands(blocks, width):
+                columns = _columns(band, width)
+                max_columns = max(max_columns, len(columns))
+                parts.extend(_normalize_block(b[4]) for b in _reading_order(band, columns))
+        pages = doc.page_count
+
+    text = "\n\n".join(parts)
+    chars = sum(1 for ch in text if not ch.isspace())
+    words = text.split()
+    quality = {
+        "chars_per_page": round(chars / max(pages, 1), 1),
+        "garbage_ratio": round(sum(1 for ch in text if _is_garbage(ch)) / max(chars, 1), 4),
+        "avg_word_len": round(chars / max(len(words), 1), 2),
+        "columns": max_columns,
+    }
+
+    if quality["chars_per_page"] < MIN_CHARS_PER_PAGE:
+        reason = "low_text_density"
+    elif quality["garbage_ratio"] > MAX_GARBAGE_RATIO:
+        reason = "garbage_text"
+    elif quality["avg_word_len"] > MAX_AVG_WORD_LEN:
+        reason = "missing_spaces"
+    elif quality["columns"] > MAX_COLUMNS:
+        reason = "complex_layout"
+    else:
+        reason = None
+    return FastResult(text, pages, quality, reason)
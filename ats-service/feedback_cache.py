@@ -0,0 +1,35 @@
+"""
+feedback_cache.py — Cache of LLM feedback keyed by the exact prompt inputs
+Feedback is generated at a low temperature from a fixed template, so the same
+prompt gives equivalent output. Key = SHA-256 of the model, the prompt-template
+version and the rendered messages — i.e. the truncated resume excerpt, JD
+excerpt, keyword lists and structure block the model actually sees. A model
+change or a PROMPT_VERSION bump invalidates old entries automatically.
+
+Storage is parse_cache.ParseCache (memory LRU front + size/TTL-bounded SQLite)
+in its own "feedback" table. Only AI-generated feedback is stored; rule-based
+fallbacks are cheap and must not mask a later successful LLM call.
+"""
+import hashlib
+import json
+from typing import Optional
+
+from parse_cache import ParseCache
+
+
+def make_feedback_key(model: str, prompt_version: int, messages: list[dict]) -> str:
+    h = hashlib.sha256()
+    h.update(f"{model}\0{prompt_version}\0".encode("utf-8"))
+    h.update(json.dumps(messages, ensure_ascii=False, sort_keys=True).encode("utf-8"))
+    return h.hexdigest()
+
+
+class FeedbackCache(ParseCache):
+    def __init__(
+        self,
+        disk_path: Optional[str] = None,
+        max_bytes: int = 32 * 1024 * 1024,
+        ttl_s: float = 7 * 24 * 3600,
+        memory_items: int = 256,
+    ):
+        super().__init__(disk_path, max_bytes, ttl_s, memory_items, table="feedback")
@@ -0,0 +1,101 @@
+"""
+keyword_matcher.py — Single-pass skill/keyword matcher
+Compiles a whole taxonomy (label → aliases) into ONE regex whose alternation
+is laid out as a character trie, so matching cost depends on the text length,
+not on how many skills the taxonomy contains.
+Every hit carries its character offsets and the normalized label.
+"""
+import json
+import re
+import unicodedata
+from typing import Iterable, NamedTuple, Optional
+
+
+class KeywordHit(NamedTuple):
+    label: str
+    start: int
+    end: int
+
+
+def _fold(text: str) -> str:
+    """
+    Lookup key for a matched span. re.IGNORECASE and str.lower() disagree on
+    some characters ("İ".lower() is "i" + a combining dot), so casefold and
+    drop combining marks before comparing.
+    """
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return " ".join("".join(ch for ch in decomposed if not unicodedata.combining(ch)).split())
+
+
+def _trie_pattern(node: dict) -> str:
+    """Render a character trie as a regex; longer alternatives are tried first."""
+    branches = []
+    for ch in sorted(k for k in node if k):
+        atom = r"\s+" if ch == " " else re.escape(ch)
+        branches.append(atom + _trie_pattern(node[ch]))
+    if not branches:
+        return ""
+    body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+    # "" marks the end of an alias; the rest of the subtree is optional
+    return f"(?:{body})?" if "" in node else body
+
+
+class KeywordMatcher:
+    """
+    Built once from a taxonomy mapping a normalized label to its surface forms.
+    Matching is case-insensitive and requires a non-word character (or the
+    text edge) on both sides of a hit, so "go" never fires inside "google".
+    """
+
+    def __init__(self, taxonomy: dict[str, Iterable[str]]):
+        self._alias_to_label: dict[str, str] = {}
+        for label, aliases in taxonomy.items():
+            for alias in [label, *aliases]:
+                alias = " ".join(alias.lower().split())
+                if alias:
+                    self._alias_to_label.setdefault(alias, label)
+        self._folded_to_label: dict[str, str] = {}
+        for alias, label in self._alias_to_label.items():
+            self._folded_to_label.setdefault(_fold(alias), label)
+
+        trie: dict = {}
+        for alias in self._alias_to_label:
+            node = trie
+            for ch in alias:
+                node = node.setdefault(ch, {})
+            node[""] = {}
+
+        self._pattern = re.compile(
+            r"(?<!\w)(" + _trie_pattern(trie) + r")(?!\w)", re.IGNORECASE
+        ) if trie else None
+
+    @classmethod
+    def from_file(cls, path: str, base: Optional[dict[str, Iterable[str]]] = None) -> "KeywordMatcher":
+        """
+        Load an extended taxonomy from JSON: {"label": ["alias", ...], ...}.
+        Entries are merged on top of `base` when given.
+        """
+        with open(path, encoding="utf-8") as f:
+            extra = json.load(f)
+        taxonomy = {k: list(v) for k, v in (base or {}).items()}
+        for label, aliases in extra.items():
+            taxonomy.setdefault(label.lower(), []).extend(aliases)
+        return cls(taxonomy)
+
+    def __len__(self) -> int:
+        return len(self._alias_to_label)
+
+    def find_all(self, text: str) -> list[KeywordHit]:
+        """Every non-overlapping hit in one left-to-right pass (longest alias wins)."""
+        if self._pattern is None or not text:
+            return []
+        hits = []
+        for m in self._pattern.finditer(text):
+            label = self._folded_to_label.get(_fold(m.group(1)))
+            if label is not None:
+                hits.append(KeywordHit(label, m.start(1), m.end(1)))
+        return hits
+
+    def labels(self, text: str) -> set[str]:
+        """Distinct normalized labels present in the text."""
+        return {hit.label for hit in self.find_all(text)}
@@ -1,22 +1,46 @@
 """
-llm_feedback.py — Groq SDK integration for LLM-powered ATS feedback
+llm_feedback.py — Groq integration for LLM-powered ATS feedback (via llm_gateway)
 Uses Llama-3-8B-8192 with Pydantic for rigid JSON parsing.
 Implements the 3-Tier "Antigravity Logic":
 1. Skill Gap Analysis
 2. "Impact" Auditor (Quantification)
 3. Semantic Keyword Injector
+
+AI feedback is cached by the exact prompt inputs (feedback_cache.py); cached
+results carry "cached": True. The API path can cap its wait with a latency
+budget: past it, rule-based feedback is returned and the LLM call completes in
+the background (see generate_feedback_async / feedback_status).
 """
+import asyncio
 import json
 import os
-from typing import Any, List
+import time
+from collections import OrderedDict
+from typing import Any, List, Optional
 
 from dotenv import load_dotenv
 from pydantic import BaseModel
 
 load_dotenv()
 
-GROQ_API_KEY = os.getenv("GROQ_API_KEY", "")
+import llm_gateway
+from feedback_cache import FeedbackCache, make_feedback_key
+from resume_profile import ResumeProfile
+
 GROQ_MODEL = "llama3-8b-8192"
+# Bump whenever the prompt template or _parse_feedback output changes
+PROMPT_VERSION = 1
+
+_feedback_cache = FeedbackCache(
+    disk_path=os.getenv("FEEDBACK_CACHE_PATH", "./feedback_cache.sqlite3"),
+    max_bytes=int(os.getenv("FEEDBACK_CACHE_MAX_MB", "32")) * 1024 * 1024,
+    ttl_s=float(os.getenv("FEEDBACK_CACHE_TTL_DAYS", "7")) * 24 * 3600,
+    memory_items=int(os.getenv("FEEDBACK_CACHE_MEMORY_ITEMS", "256")),
+)
+
+
+def feedback_cache_stats() -> dict:
+    return _feedback_cache.stats()
 
 # ---------------------------------------------------------------------------
 # Pydantic Schemas for Structured JSON Output
@@ -36,59 +60,118 @@ class ATSFeedback(BaseModel):
 # Fallback Feedback
 # ---------------------------------------------------------------------------
 
-def _rule_based_feedback(scoring_data: dict, resume_text: str) -> dict[str, Any]:
+def _rule_based_feedback(
+    scoring_data: dict, resume_text: str, profile: Optional[ResumeProfile] = None
+) -> dict[str, Any]:
     """Fallback if Groq fails or no key is set."""
     missing = scoring_data.get("missing_keywords", [])
     
     missing_skills = []
     if missing:
         missing_skills = missing[:3]
-        
+
+    # Quote one of the candidate's own bullets that has no numbers, if there is one
+    weak_bullets = profile.bullet_texts(resume_text, quantified=False) if profile else []
+    if weak_bullets:
+        original = weak_bullets[0].lstrip("-*•◦▪●■➢➤►▸‣⁃∙ ")
+        suggested = f"{original.rstrip('.')}, [add the measurable result: %, $, time saved or users impacted]."
+    else:
+        original = "Managed a team of developers"
+        suggested = "Managed a team of 8 developers, increasing sprint velocity by 25% and reducing bugs by 15%."
+
     return {
         "top_improvement": "Quantify your achievements: Add measurable metrics (e.g., %, $, #) to your experience bullets to pass the 'Impact Auditor' check.",
         "missing_critical_skills": missing_skills,
         "bullet_point_rewrite": {
-            "original": "Managed a team of developers",
-            "suggested": "Managed a team of 8 developers, increasing sprint velocity by 25% and reducing bugs by 15%."
+            "original": original,
+            "suggested": suggested,
         },
         "formatting_tip": "Ensure your contact info is easy to find and you have a solid 3-4 line professional summary at the very top.",
         "star_analysis": f"Rule-based Assessment: Resume scored {scoring_data['overall_score']}/100.",
         "ai_powered": False,
-        "model": "rule-based"
+        "model": "rule-based",
+        "cached": False,
     }
 
 # ---------------------------------------------------------------------------
 # Groq-powered 3-Tier Feedback
 # ---------------------------------------------------------------------------
 
-def _groq_feedback(scoring_data: dict, resume_text: str, job_description: str) -> dict[str, Any]:
-    try:
-        from groq import Groq
-        client = Groq(api_key=GROQ_API_KEY)
-
-        resume_excerpt = resume_text[:2500]
-        jd_excerpt = job_description[:1500] if job_description else "Not provided (Use general tech engineering standards)"
-        missing_kw = ", ".join(scoring_data.get("missing_keywords", [])[:10]) or "None"
-        matched_kw = ", ".join(scoring_data.get("matched_keywords", [])[:10]) or "None"
-
-        system_prompt = (
-            "You are an Elite Technical Recruiter and Career Coach. "
-            "Your feedback must be highly specific, professional, and directly reference "
-            "the provided resume text and job description.\n\n"
-            "You must respond ONLY with a strict JSON object that perfectly matches exactly "
-            "this structure, with no extra text:\n"
-            "{\n"
-            '  "top_improvement": "Your most critical customized advice for their skill gap.",\n'
-            '  "missing_critical_skills": ["skill1", "skill2"],\n'
-            '  "bullet_point_rewrite": {\n'
-            '    "original": "Direct quote of a weak bullet from their resume lacking metrics",\n'
-            '    "suggested": "The improved bullet incorporating STAR method metrics"\n'
-            "  },\n"
-            '  "formatting_tip": "A specific formatting or structural tip"\n'
-            "}"
-        )
-
-        user_prompt = f"""Perform the Three-Tier Analysis:
+# Sections shown to the LLM first when the resume has to be trimmed
+_EXCERPT_ORDER = ("summary", "experience", "projects", "skills", "achievements", "certifications", "education")
+_EXCERPT_CHARS = 2500
+
+
+def _resume_excerpt(resume_text: str, profile: Optional[ResumeProfile]) -> str:
+    """Most relevant sections within the excerpt budget, instead of just the first 2500 chars."""
+    if profile is None or len(resume_text) <= _EXCERPT_CHARS:
+        return resume_text[:_EXCERPT_CHARS]
+    spans = sorted(
+        (s for s in profile.sections if s.name in _EXCERPT_ORDER),
+        key=lambda s: _EXCERPT_ORDER.index(s.name),
+    )
+    if not spans:
+        return resume_text[:_EXCERPT_CHARS]
+    parts, used = [], 0
+    for span in spans:
+        chunk = resume_text[span.start:span.end].strip()[: _EXCERPT_CHARS - used]
+        if chunk:
+            parts.append(chunk)
+            used += len(chunk)
+        if used >= _EXCERPT_CHARS:
+            break
+    return "\n\n".join(parts)
+
+
+def _structure_context(resume_text: str, profile: Optional[ResumeProfile]) -> str:
+    if profile is None:
+        return ""
+    present = [name for name, found in profile.sections_detected.items() if found]
+    missing = [name for name, found in profile.sections_detected.items() if not found]
+    contact = [name for name, value in profile.contact.items() if value]
+    weak = profile.bullet_texts(resume_text, quantified=False)[:6]
+    lines = [
+        f"Sections Present: {', '.join(present) or 'None'}",
+        f"Sections Missing: {', '.join(missing) or 'None'}",
+        f"Bullets: {len(profile.bullets)} ({sum(b.quantified for b in profile.bullets)} with numbers), "
+        f"Quantified Achievements: {len(profile.quantified)}, Words: {profile.word_count}",
+        f"Contact Fields Found: {', '.join(contact) or 'None'}",
+    ]
+    if weak:
+        lines.append("Bullets Without Metrics (quote one for the Impact Auditor):")
+        lines.extend(f"  {b}" for b in weak)
+    return "\n".join(lines)
+
+
+def _build_messages(
+    scoring_data: dict,
+    resume_text: str,
+    job_description: str,
+    profile: Optional[ResumeProfile] = None,
+) -> list[dict]:
+    resume_excerpt = _resume_excerpt(resume_text, profile)
+    jd_excerpt = job_description[:1500] if job_description else "Not provided (Use general tech engineering standards)"
+    missing_kw = ", ".join(scoring_data.get("missing_keywords", [])[:10]) or "None"
+    matched_kw = ", ".join(scoring_data.get("matched_keywords", [])[:10]) or "None"
+
+    system_prompt = (
+        "You are an Elite Technical Recruiter and Career Coach. "
+        "Your feedback must be highly specific, professional, and directly reference "
+        "the provided resume text and job description.\n\n"
+        "You must respond ONLY with a strict JSON object that perfectly matches exactly "
+        "this structure, with no extra text:\n"
+        "{\n"
+        '  "top_improvement": "Your most critical customized advice for their skill gap.",\n'
+        '  "missing_critical_skills": ["skill1", "skill2"],\n'
+        '  "bullet_point_rewrite": {\n'
+        '    "original": "Direct quote of a weak bullet from their resume lacking metrics",\n'
+        '    "suggested": "The improved bullet incorporating STAR method metrics"\n'
+        "  },\n"
+        '  "formatting_tip": "A specific formatting or structural tip"\n'
+        "}"
+    )
+
+    user_prompt = f"""Perform the Three-Tier Analysis:
 1. Skill Gap Analysis: Explain WHY missing skills matter based on the JD.
 2. Impact Auditor: Find a real bullet point in the resume lacking digits (%, $) and rewrite it with placeholder metrics.
 3. Semantic Keyword Injector: Suggest aligning their terminology with the JD's phrasing.
@@ -102,38 +185,134 @@ JOB DESCRIPTION:
 SCORING CONTEXT:
 Missing Exact Keywords: {missing_kw}
 Matched Exact Keywords: {matched_kw}
+
+RESUME STRUCTURE:
+{_structure_context(resume_text, profile) or "Not analysed"}
 """
 
-        response = client.chat.completions.create(
-            model=GROQ_MODEL,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt},
-            ],
-            temperature=0.2,
-            max_tokens=1024,
-            response_format={"type": "json_object"},
-        )
-
-        raw = response.choices[0].message.content
-        # Enforce Pydantic schema
-        result = ATSFeedback.model_validate_json(raw)
-        
-        return {
-            "top_improvement": result.top_improvement,
-            "missing_critical_skills": result.missing_critical_skills,
-            "bullet_point_rewrite": result.bullet_point_rewrite.model_dump(),
-            "formatting_tip": result.formatting_tip,
-            "star_analysis": "AI Analysis Complete: Reviewed via 3-Tier Antigravity Engine",
-            "ai_powered": True,
-            "model": GROQ_MODEL,
-        }
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_prompt},
+    ]
+
 
+def _parse_feedback(raw: str) -> dict[str, Any]:
+    # Enforce Pydantic schema
+    result = ATSFeedback.model_validate_json(raw)
+
+    return {
+        "top_improvement": result.top_improvement,
+        "missing_critical_skills": result.missing_critical_skills,
+        "bullet_point_rewrite": result.bullet_point_rewrite.model_dump(),
+        "formatting_tip": result.formatting_tip,
+        "star_analysis": "AI Analysis Complete: Reviewed via 3-Tier Antigravity Engine",
+        "ai_powered": True,
+        "model": GROQ_MODEL,
+    }
+
+
+_CALL_OPTIONS = {"max_tokens": 1024, "temperature": 0.2, "response_format": {"type": "json_object"}}
+
+
+# In-flight background LLM calls by cache key (= feedback_id). Identical requests
+# share one call; results land in the feedback cache, where polls pick them up.
+_pending: dict[str, "asyncio.Task"] = {}
+# Recently failed feedback ids, so a poll can tell "failed" from "unknown"
+_failed: "OrderedDict[str, float]" = OrderedDict()
+_FAILED_KEEP = 1024
+
+
+async def _groq_feedback_async(key: str, messages: list[dict], deadline_s: Optional[float]) -> Optional[dict]:
+    """One Groq call; stores the feedback in the cache. None on failure (caller falls back)."""
+    try:
+        response = await llm_gateway.chat("groq", GROQ_MODEL, messages, deadline_s=deadline_s, **_CALL_OPTIONS)
+        feedback = _parse_feedback(response.text)
+
+    except llm_gateway.LLMUnavailable:
+        print("[llm_feedback] Groq circuit breaker is open. Falling back.")
+        feedback = None
+    except llm_gateway.LLMTimeout:
+        print(f"[llm_feedback] Groq call exceeded {deadline_s}s. Falling back.")
+        feedback = None
     except Exception as e:
         print(f"[llm_feedback] Groq call or JSON validation failed ({e}). Falling back.")
-        return _rule_based_feedback(scoring_data, resume_text)
+        feedback = None
+    if feedback is None:
+        _failed[key] = time.time()
+        while len(_failed) > _FAILED_KEEP:
+            _failed.popitem(last=False)
+        return None
+    _failed.pop(key, None)
+    await asyncio.to_thread(_feedback_cache.put, key, feedback)
+    return {**feedback, "cached": False}
+
+
+def _groq_enabled() -> bool:
+    return llm_gateway.enabled("groq")
+
+
+async def generate_feedback_async(
+    scoring_data: dict,
+    resume_text: str,
+    job_description: str = "",
+    timeout: Optional[float] = None,
+    profile: Optional[ResumeProfile] = None,
+    budget: Optional[float] = None,
+) -> dict[str, Any]:
+    """
+    Feedback for the API path: the Groq call goes through llm_gateway
+    (pooled connections, retries, concurrency limit, circuit breaker). `timeout`
+    is the call's deadline in seconds, retries included; past it the rule-based
+    feedback is returned.
+    profile (from the parser) lets the prompt quote section-scoped text and weak bullets.
+
+    `budget` (seconds) bounds how long the caller waits. If the LLM has not
+    answered by then, the rule-based feedback is returned with "feedback_id"
+    and "feedback_pending": True while the call finishes in the background;
+    its result is cached, so feedback_status(feedback_id) or the next
+    identical request gets the AI version.
+    """
+    if not _groq_enabled():
+        return _rule_based_feedback(scoring_data, resume_text, profile)
+
+    messages = _build_messages(scoring_data, resume_text, job_description, profile)
+    key = make_feedback_key(GROQ_MODEL, PROMPT_VERSION, messages)
+    # SQLite lookups run off the event loop
+    hit = await asyncio.to_thread(_feedback_cache.get, key)
+    if hit is not None:
+        return {**hit, "cached": True}
+
+    task = _pending.get(key)
+    if task is None:
+        if not llm_gateway.available("groq"):
+            # Provider is failing: don't spend the budget (or its quota) on it
+            return {**_rule_based_feedback(scoring_data, resume_text, profile), "llm_skipped": "circuit_open"}
+        task = asyncio.create_task(_groq_feedback_async(key, messages, timeout))
+        _pending[key] = task
+        task.add_done_callback(lambda _: _pending.pop(key, None))
+
+    try:
+        # shield: a missed budget (or a disconnected client) must not cancel the call
+        feedback = await asyncio.wait_for(asyncio.shield(task), timeout=budget)
+    except asyncio.TimeoutError:
+        return {
+            **_rule_based_feedback(scoring_data, resume_text, profile),
+            "feedback_id": key,
+            "feedback_pending": True,
+        }
+    return feedback or _rule_based_feedback(scoring_data, resume_text, profile)
+
 
-def generate_feedback(scoring_data: dict, resume_text: str, job_description: str = "") -> dict[str, Any]:
-    if GROQ_API_KEY and GROQ_API_KEY != "your_groq_api_key_here":
-        return _groq_feedback(scoring_data, resume_text, job_description)
-    return _rule_based_feedback(scoring_data, resume_text)
+async def feedback_status(feedback_id: str) -> Optional[dict]:
+    """
+    State of a background feedback call: {"status": "pending"}, {"status":
+    "ready", "feedback": {...}} or {"status": "failed"}; None for unknown ids.
+    """
+    if feedback_id in _pending:
+        return {"status": "pending"}
+    hit = await asyncio.to_thread(_feedback_cache.get, feedback_id)
+    if hit is not None:
+        return {"status": "ready", "feedback": {**hit, "cached": True}}
+    if feedback_id in _failed:
+        return {"status": "failed"}
+    return None
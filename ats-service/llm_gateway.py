@@ -0,0 +1,422 @@
+"""
+llm_gateway.py — Shared async gateway for every LLM call in the service
+One keep-alive HTTP connection pool per event loop (httpx.AsyncClient) instead
+of a new SDK client + TLS handshake per request, plus:
+
+    - a concurrency semaphore per provider (queued calls wait, they don't pile
+      onto the provider's rate limiter)
+    - retries on 429 / 5xx / connection errors with full-jitter backoff, or the
+      provider's Retry-After when it sends one
+    - a per-call deadline covering queueing, every attempt and every backoff;
+      a retry that cannot finish before the deadline is not attempted
+    - a circuit breaker per provider: while the error/timeout rate over the
+      last LLM_BREAKER_WINDOW_S is above LLM_BREAKER_FAILURE_RATE, calls fail
+      fast with LLMUnavailable; after LLM_BREAKER_COOLDOWN_S one probe call is
+      let through and its outcome closes or re-opens the breaker
+    - per-provider counters: calls, retries, rate limits, timeouts, tokens,
+      p50/p95 latency (see stats(), exposed on /metrics)
+
+Providers speak their HTTP APIs directly:
+    groq       — OpenAI-compatible /chat/completions
+    anthropic  — /v1/messages
+
+Settings (env):
+    LLM_TIMEOUT_S                  — default per-call deadline
+    LLM_MAX_RETRIES                — retries after the first attempt
+    LLM_BACKOFF_BASE_S / _MAX_S    — full-jitter backoff bounds
+    LLM_MAX_CONNECTIONS            — keep-alive pool size per event loop
+    LLM_MAX_CONCURRENCY_<PROVIDER> — in-flight calls per provider
+    LLM_BREAKER_WINDOW_S / _MIN_CALLS / _FAILURE_RATE / _COOLDOWN_S
+"""
+import asyncio
+import os
+import random
+import threading
+import time
+import weakref
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import NamedTuple, Optional
+
+import httpx
+
+TIMEOUT_S = float(os.getenv("LLM_TIMEOUT_S", "20"))
+MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+BACKOFF_BASE_S = float(os.getenv("LLM_BACKOFF_BASE_S", "0.5"))
+BACKOFF_MAX_S = float(os.getenv("LLM_BACKOFF_MAX_S", "8"))
+MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))
+BREAKER_WINDOW_S = float(os.getenv("LLM_BREAKER_WINDOW_S", "60"))
+BREAKER_MIN_CALLS = int(os.getenv("LLM_BREAKER_MIN_CALLS", "10"))
+BREAKER_FAILURE_RATE = float(os.getenv("LLM_BREAKER_FAILURE_RATE", "0.5"))
+BREAKER_COOLDOWN_S = float(os.getenv("LLM_BREAKER_COOLDOWN_S", "30"))
+
+# Worth another attempt: rate limited, overloaded, or a transient server error
+_RETRY_STATUS = {408, 429, 500, 502, 503, 504, 529}
+# Latency samples kept per provider for the percentiles in stats()
+_LATENCY_SAMPLES = 512
+
+
+class LLMError(Exception):
+    """The provider call failed (after retries) or returned an unusable response."""
+
+    def __init__(self, provider: str, message: str, status: Optional[int] = None):
+        super().__init__(f"{provider}: {message}")
+        self.provider = provider
+        self.status = status
+
+
+class LLMTimeout(LLMError):
+    """The call did not complete within its deadline."""
+
+
+class LLMUnavailable(LLMError):
+    """The provider's circuit breaker is open; the call was not attempted."""
+
+
+class LLMResponse(NamedTuple):
+    text: str
+    model: str
+    input_tokens: int
+    output_tokens: int
+    latency_ms: float
+    attempts: int
+
+
+class _Provider(NamedTuple):
+    url: str
+    key_env: str
+    concurrency: int
+
+
+PROVIDERS = {
+    "groq": _Provider(
+        "https://api.groq.com/openai/v1/chat/completions",
+        "GROQ_API_KEY",
+        int(os.getenv("LLM_MAX_CONCURRENCY_GROQ", "8")),
+    ),
+    "anthropic": _Provider(
+        "https://api.anthropic.com/v1/messages",
+        "ANTHROPIC_API_KEY",
+        int(os.getenv("LLM_MAX_CONCURRENCY_ANTHROPIC", "4")),
+    ),
+}
+
+
+def _request(
+    provider: str, model: str, messages: list[dict], max_tokens: int,
+    temperature: float, response_format: Optional[dict],
+) -> tuple[dict, dict]:
+    """(headers, json body) for one chat call."""
+    api_key = os.getenv(PROVIDERS[provider].key_env, "")
+    if provider == "anthropic":
+        system = "\n\n".join(m["content"] for m in messages if m["role"] == "system")
+        body = {
+            "model": model,
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "messages": [m for m in messages if m["role"] != "system"],
+        }
+        if system:
+            body["system"] = system
+        headers = {"x-api-key": api_key, "anthropic-version": "2023-06-01"}
+        return headers, body
+
+    body = {"model": model, "messages": messages, "max_tokens": max_tokens, "temperature": temperature}
+    if response_format:
+        body["response_format"] = response_format
+    return {"Authorization": f"Bearer {api_key}"}, body
+
+
+def _parse(provider: str, data: dict) -> tuple[str, int, int]:
+    """(text, input_tokens, output_tokens) from a provider response body."""
+    usage = data.get("usage") or {}
+    if provider == "anthropic":
+        text = "".join(block.get("text", "") for block in data.get("content", []) if block.get("type") == "text")
+        return text, usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+    text = data["choices"][0]["message"]["content"] or ""
+    return text, usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0)
+
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    """Seconds the provider asked us to wait (Retry-After: delta-seconds or HTTP date)."""
+    value = response.headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _backoff(attempt: int) -> float:
+    # Full jitter: uniform over [0, min(cap, base * 2^attempt)]
+    return random.uniform(0, min(BACKOFF_MAX_S, BACKOFF_BASE_S * (2 ** attempt)))
+
+
+class _Stats:
+    def __init__(self):
+        self.calls = 0
+        self.ok = 0
+        self.failed = 0
+        self.retries = 0
+        self.rate_limited = 0
+        self.timeouts = 0
+        self.in_flight = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.latencies_ms: deque = deque(maxlen=_LATENCY_SAMPLES)
+
+
+class _Breaker:
+    """Failure-rate circuit breaker (closed → open → half-open probe → closed/open)."""
+
+    def __init__(self):
+        self.outcomes: deque = deque()  # (time, ok) within the window
+        self.opened_at: Optional[float] = None
+        self.probing = False
+        self.trips = 0
+        self.short_circuited = 0
+
+    def state(self, now: float) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "open" if now - self.opened_at < BREAKER_COOLDOWN_S else "half_open"
+
+    def allow(self, now: float) -> bool:
+        state = self.state(now)
+        if state == "closed":
+            return True
+        if state == "half_open" and not self.probing:
+            self.probing = True
+            return True
+        self.short_circuited += 1
+        return False
+
+    def record(self, now: float, ok: bool, probe: bool) -> None:
+        if probe:
+            self.probing = False
+            if ok:
+                self.opened_at = None
+                self.outcomes.clear()
+            else:
+                self.opened_at = now
+            return
+        if self.opened_at is not None:
+            return  # started before the breaker tripped
+        self.outcomes.append((now, ok))
+        while self.outcomes and now - self.outcomes[0][0] > BREAKER_WINDOW_S:
+            self.outcomes.popleft()
+        failures = sum(1 for _, success in self.outcomes if not success)
+        if len(self.outcomes) >= BREAKER_MIN_CALLS and failures / len(self.outcomes) >= BREAKER_FAILURE_RATE:
+            self.opened_at = now
+            self.trips += 1
+            print(f"[llm_gateway] Circuit opened: {failures}/{len(self.outcomes)} calls failed "
+                  f"in the last {BREAKER_WINDOW_S:g}s")
+
+    def release(self) -> None:
+        """The probe was cancelled before it produced an outcome."""
+        self.probing = False
+
+
+class _LoopState:
+    """Connection pool + semaphores; asyncio objects are bound to one event loop."""
+
+    def __init__(self):
+        self.client = httpx.AsyncClient(
+            timeout=httpx.Timeout(TIMEOUT_S),
+            limits=httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_CONNECTIONS),
+        )
+        self.semaphores = {name: asyncio.Semaphore(p.concurrency) for name, p in PROVIDERS.items()}
+
+
+_states: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopState]" = weakref.WeakKeyDictionary()
+_stats = {name: _Stats() for name in PROVIDERS}
+_breakers = {name: _Breaker() for name in PROVIDERS}
+_lock = threading.Lock()
+
+
+def _state() -> _LoopState:
+    loop = asyncio.get_running_loop()
+    state = _states.get(loop)
+    if state is None:
+        state = _states[loop] = _LoopState()
+    return state
+
+
+def enabled(provider: str) -> bool:
+    """True when the provider's API key is configured."""
+    key = os.getenv(PROVIDERS[provider].key_env, "")
+    return bool(key) and not key.startswith("your_")
+
+
+def available(provider: str) -> bool:
+    """False while the provider's circuit breaker is open (calls would fail fast)."""
+    with _lock:
+        return _breakers[provider].state(time.monotonic()) != "open"
+
+
+async def chat(
+    provider: str,
+    model: str,
+    messages: list[dict],
+    max_tokens: int = 1024,
+    temperature: float = 0.2,
+    response_format: Optional[dict] = None,
+    deadline_s: Optional[float] = None,
+) -> LLMResponse:
+    """
+    One chat completion. `messages` use the OpenAI shape ({"role", "content"});
+    system messages are moved to Anthropic's `system` field when needed.
+    Raises LLMTimeout past the deadline (default LLM_TIMEOUT_S), LLMUnavailable
+    while the provider's circuit breaker is open, LLMError otherwise.
+    """
+    if provider not in PROVIDERS:
+        raise LLMError(provider, "unknown provider")
+    state = _state()
+    stats = _stats[provider]
+    breaker = _breakers[provider]
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    deadline = started + (deadline_s if deadline_s is not None else TIMEOUT_S)
+    headers, body = _request(provider, model, messages, max_tokens, temperature, response_format)
+
+    with _lock:
+        if not breaker.allow(time.monotonic()):
+            raise LLMUnavailable(provider, "circuit breaker is open")
+        probe = breaker.opened_at is not None
+        stats.calls += 1
+    try:
+        (text, input_tokens, output_tokens), attempts = await _call(
+            provider, state, stats, headers, body, deadline
+        )
+    except LLMTimeout:
+        with _lock:
+            stats.timeouts += 1
+            stats.failed += 1
+            breaker.record(time.monotonic(), False, probe)
+        raise
+    except LLMError:
+        with _lock:
+            stats.failed += 1
+            breaker.record(time.monotonic(), False, probe)
+        raise
+    except BaseException:
+        if probe:
+            with _lock:
+                breaker.release()
+        raise
+
+    latency_ms = (loop.time() - started) * 1000
+    with _lock:
+        breaker.record(time.monotonic(), True, probe)
+        stats.ok += 1
+        stats.input_tokens += input_tokens
+        stats.output_tokens += output_tokens
+        stats.latencies_ms.append(latency_ms)
+    return LLMResponse(text, model, input_tokens, output_tokens, round(latency_ms, 1), attempts)
+
+
+async def _call(
+    provider: str, state: _LoopState, stats: _Stats, headers: dict, body: dict, deadline: float
+) -> tuple[tuple[str, int, int], int]:
+    """Queue for the provider slot, then attempt with retries. Returns (parsed, attempts)."""
+    loop = asyncio.get_running_loop()
+    url = PROVIDERS[provider].url
+    semaphore = state.semaphores[provider]
+
+    try:
+        await asyncio.wait_for(semaphore.acquire(), timeout=max(0.0, deadline - loop.time()))
+    except asyncio.TimeoutError:
+        raise LLMTimeout(provider, "deadline passed while queued for a provider slot")
+
+    with _lock:
+        stats.in_flight += 1
+    try:
+        attempt = 0
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                raise LLMTimeout(provider, f"deadline passed after {attempt} attempt(s)")
+            wait = None
+            try:
+                response = await asyncio.wait_for(
+                    state.client.post(url, headers=headers, json=body), timeout=remaining
+                )
+            except asyncio.TimeoutError:
+                raise LLMTimeout(provider, f"no response within the deadline (attempt {attempt + 1})")
+            except httpx.TransportError as e:
+                error = LLMError(provider, f"{type(e).__name__}: {e}")
+            else:
+                if response.status_code == 200:
+                    try:
+                        return _parse(provider, response.json()), attempt + 1
+                    except (ValueError, KeyError, IndexError, TypeError) as e:
+                        raise LLMError(provider, f"unexpected response body ({e})", 200)
+                error = LLMError(provider, f"HTTP {response.status_code}: {response.text[:200]}", response.status_code)
+                if response.status_code not in _RETRY_STATUS:
+                    raise error
+                if response.status_code == 429:
+                    with _lock:
+                        stats.rate_limited += 1
+                wait = _retry_after(response)
+
+            if attempt >= MAX_RETRIES:
+                raise error
+            wait = _backoff(attempt) if wait is None else wait
+            if loop.time() + wait >= deadline:
+                # The retry could not finish in time; fail now instead of sleeping
+                raise error
+            attempt += 1
+            with _lock:
+                stats.retries += 1
+            await asyncio.sleep(wait)
+    finally:
+        with _lock:
+            stats.in_flight -= 1
+        semaphore.release()
+
+
+def _percentile(samples: list[float], q: float) -> Optional[float]:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 1)
+
+
+def stats() -> dict:
+    out = {}
+    now = time.monotonic()
+    with _lock:
+        for name, s in _stats.items():
+            latencies = list(s.latencies_ms)
+            breaker = _breakers[name]
+            out[name] = {
+                "enabled": enabled(name),
+                "breaker": breaker.state(now),
+                "breaker_trips": breaker.trips,
+                "short_circuited": breaker.short_circuited,
+                "concurrency": PROVIDERS[name].concurrency,
+                "calls": s.calls,
+                "ok": s.ok,
+                "failed": s.failed,
+                "retries": s.retries,
+                "rate_limited": s.rate_limited,
+                "timeouts": s.timeouts,
+                "in_flight": s.in_flight,
+                "input_tokens": s.input_tokens,
+                "output_tokens": s.output_tokens,
+                "latency_p50_ms": _percentile(latencies, 0.50),
+                "latency_p95_ms": _percentile(latencies, 0.95),
+            }
+    return out
+
+
+async def aclose() -> None:
+    """Close the connection pool of the running event loop (app shutdown)."""
+    state = _states.pop(asyncio.get_running_loop(), None)
+    if state is not None:
+        await state.client.aclose()
@@ -1,50 +1,151 @@
 """
 main.py — FastAPI ATS microservice entrypoint
 Endpoints:
-    POST /analyze  — analyze a resume PDF (+ optional job description)
-    GET  /health   — liveness probe
+    POST /analyze        — analyze a resume PDF (+ optional job description)
+    GET  /analyze/feedback/{id} — poll LLM feedback that missed /analyze's budget_ms
+    POST /analyze/stream — same, as SSE: score first, LLM feedback when ready
+    POST /analyze/multi  — rank one resume PDF against many job descriptions
+    POST /analyze/batch  — score many resume PDFs (zip or multipart) against one JD, streamed
+    GET  /percentiles    — distribution of stored ATS scores
+    GET  /health         — liveness probe
+    GET  /metrics        — cache / batcher / worker-pool / parse-pool / writer / parser-tier / LLM / feedback-cache counters
 Run with: uvicorn main:app --host 0.0.0.0 --port 8000 --reload
 """
+import asyncio
+import json
 import os
 os.environ["HF_HUB_DISABLE_SYMLINKS"] = "1"
+import zipfile
 from contextlib import asynccontextmanager
 
+from typing import List, Optional
+
 from dotenv import load_dotenv
-from fastapi import FastAPI, File, Form, HTTPException, UploadFile
+from fastapi import FastAPI, File, Form, HTTPException, Query, Request, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 
 load_dotenv()
 
+from body_limit import BodyLimitMiddleware
+from execution import STAGE_TIMEOUTS, StageTimeout, pool_stats, run_stage, shutdown_pools, start_pools
+from parse_pool import parse_pool_stats, parse_runner, shutdown_parse_pool, start_parse_pool
+
 # Pre-load the embedding model at startup (avoids cold-start on first request)
 try:
-    from embeddings import get_model
+    from embeddings import backend_name, batcher_stats, cache_stats, get_model, shutdown_batcher
 except:
     get_model = None
+    backend_name = None
+    cache_stats = None
+    batcher_stats = None
+    shutdown_batcher = None
+
+try:
+    from llm_feedback import feedback_cache_stats, feedback_status, generate_feedback_async
+except:
+    feedback_cache_stats = None
+    feedback_status = None
+    generate_feedback_async = None
 
 try:
-    from llm_feedback import generate_feedback
+    from llm_gateway import aclose as close_llm_gateway, stats as llm_stats
 except:
-    generate_feedback = None
+    close_llm_gateway = None
+    llm_stats = None
 
 try:
-    from parser import extract_text
+    from parser import parse_cache_stats, parse_pdf, parser_stats
 except:
-    extract_text = None
+    parse_pdf = None
+    parse_cache_stats = None
+    parser_stats = None
 
 try:
-    from scorer import score_resume
+    from scorer import (
+        get_centroids,
+        get_percentile_index,
+        percentile_distribution,
+        prepare_job,
+        score_resume,
+        score_resume_many,
+        shutdown_writer,
+        writer_stats,
+    )
 except:
+    get_centroids = None
+    get_percentile_index = None
+    percentile_distribution = None
+    prepare_job = None
     score_resume = None
+    score_resume_many = None
+    shutdown_writer = None
+    writer_stats = None
+
+try:
+    from batch_pipeline import BatchSource, run_batch
+except:
+    BatchSource = None
+    run_batch = None
+
+# Upper bound on JDs per /analyze/multi call
+MAX_MULTI_JDS = int(os.getenv("MAX_MULTI_JDS", "50"))
+
+# Largest accepted resume PDF
+MAX_UPLOAD_BYTES = int(float(os.getenv("MAX_UPLOAD_MB", "5")) * 1024 * 1024)
+# Room for the other form fields (JD text, up to MAX_MULTI_JDS JDs) on top of the PDF
+MAX_FORM_BYTES = int(float(os.getenv("MAX_FORM_MB", "1")) * 1024 * 1024)
+
+# Upper bound on resumes per /analyze/batch call (zip entries + uploaded files)
+MAX_BATCH_FILES = int(os.getenv("MAX_BATCH_FILES", "2000"))
+# Whole /analyze/batch request body, PDFs and zips included
+BATCH_MAX_BODY_BYTES = int(float(os.getenv("BATCH_MAX_BODY_MB", "500")) * 1024 * 1024)
 
 
 
 # ---------------------------------------------------------------------------
 # App init
 # ---------------------------------------------------------------------------
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    start_pools()
+    # Docling worker processes load their converters in the background
+    start_parse_pool()
+    # Build the percentile index from stored scores before taking traffic
+    if get_percentile_index:
+        await asyncio.to_thread(get_percentile_index)
+    # Memory-map the benchmark centroids used for no-JD scoring
+    if get_centroids:
+        await asyncio.to_thread(get_centroids)
+    yield
+    shutdown_pools()
+    shutdown_parse_pool()
+    # Let the embedding micro-batcher finish in-flight batches before exit
+    if shutdown_batcher:
+        shutdown_batcher()
+    # Flush queued resume embeddings to ChromaDB; score threads abandoned by
+    # shutdown_pools() that finish later have their writes refused
+    if shutdown_writer:
+        shutdown_writer()
+    # Close the pooled LLM connections
+    if close_llm_gateway:
+        await close_llm_gateway()
+
+
 app = FastAPI(
     title="Antigravity ATS Engine",
     description="High-precision ATS resume scorer",
     version="1.0.0",
+    lifespan=lifespan,
+)
+# Refuse oversized bodies before Starlette spools them (/analyze/batch has its
+# own total cap; each PDF in it is still checked against MAX_UPLOAD_MB)
+app.add_middleware(
+    BodyLimitMiddleware,
+    limits={
+        **dict.fromkeys(("/analyze", "/analyze/stream", "/analyze/multi"), MAX_UPLOAD_BYTES + MAX_FORM_BYTES),
+        "/analyze/batch": BATCH_MAX_BODY_BYTES,
+    },
 )
 # Allow the Next.js frontend to call this service
 app.add_middleware(
@@ -70,27 +171,61 @@ async def health():
     return {
         "status": "ok",
         "model": "BAAI/bge-small-en-v1.5",
+        "embedding_backend": backend_name() if backend_name else None,
         "llm": "llama-3-8b-8192 (groq)",
         "vectordb": "chromadb",
     }
 
+@app.get("/metrics")
+async def metrics():
+    return {
+        "embedding_cache": cache_stats() if cache_stats else None,
+        "embedding_batcher": batcher_stats() if batcher_stats else None,
+        "worker_pools": pool_stats(),
+        "parse_pool": parse_pool_stats(),
+        "chroma_writer": writer_stats() if writer_stats else None,
+        "parse_cache": parse_cache_stats() if parse_cache_stats else None,
+        "parser": parser_stats() if parser_stats else None,
+        "llm": llm_stats() if llm_stats else None,
+        "feedback_cache": feedback_cache_stats() if feedback_cache_stats else None,
+    }
+
+@app.get("/percentiles")
+async def percentiles(role: str = ""):
+    """Distribution of stored ATS scores (quantiles + histogram), optionally for one role."""
+    if percentile_distribution is None:
+        raise HTTPException(status_code=503, detail="Scorer is not available.")
+    return percentile_distribution(role or None)
+
 @app.get("/")
 def home():
     return {"status": "backend running 🚀"}
-@app.post("/analyze")
-async def analyze_resume(
-    resume: UploadFile = File(..., description="PDF resume file"),
-    job_description: str = Form(default="", description="Job description text (optional)"),
-):
+
+
+async def _read_upload(resume: UploadFile) -> bytes:
     """
-    Analyze a resume PDF against an optional job description.
+    Read the (already spooled) upload, capped at MAX_UPLOAD_BYTES.
+    BodyLimitMiddleware has bounded the whole request body; this rejects a
+    PDF over MAX_UPLOAD_BYTES (413) and anything without a %PDF header (415).
+    """
+    too_large = HTTPException(
+        status_code=413,
+        detail=f"PDF is too large; the limit is {MAX_UPLOAD_BYTES // (1024 * 1024)} MB.",
+    )
+    if resume.size is not None and resume.size > MAX_UPLOAD_BYTES:
+        raise too_large
+    pdf_bytes = await resume.read(MAX_UPLOAD_BYTES + 1)
+    if len(pdf_bytes) > MAX_UPLOAD_BYTES:
+        raise too_large
+    if b"%PDF-" not in pdf_bytes[:1024]:
+        raise HTTPException(status_code=415, detail="File is not a PDF (missing %PDF header).")
+    return pdf_bytes
 
-    Returns:
-    - overall_score (0-100)
-    - breakdown (semantic, keyword, format subscores)
-    - matched_keywords / missing_keywords
-    - critical_improvements (LLM or rule-based)
-    - star_analysis (narrative summary)
+
+async def _read_resume(resume: UploadFile) -> dict:
+    """
+    Validate the upload and parse it, mapping failures to HTTP errors.
+    Returns the parser result: {"text", "profile", "tier", "cached"}.
     """
     # --- Validate file type ---
     if not resume.filename or not resume.filename.lower().endswith(".pdf"):
@@ -99,36 +234,64 @@ async def analyze_resume(
             detail="Only PDF files are supported. Please upload a .pdf resume.",
         )
 
-    # --- Read & parse PDF ---
+    pdf_bytes = await _read_upload(resume)
+
+    # --- Parse PDF (page-count precheck, then tiered extraction) ---
     try:
-        pdf_bytes = await resume.read()
         if len(pdf_bytes) < 100:
             raise ValueError("PDF file appears to be empty.")
-        resume_text = extract_text(pdf_bytes)
-        if len(resume_text.strip()) < 50:
+        parsed = await run_stage("parse", parse_pdf, pdf_bytes, parse_runner())
+        if len(parsed["text"].strip()) < 50:
             raise ValueError("Could not extract readable text from PDF. Try a text-based PDF (not a scanned image).")
+    except StageTimeout as e:
+        raise HTTPException(status_code=504, detail=f"PDF parsing error: {e}")
     except ValueError as e:
         raise HTTPException(status_code=422, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"PDF parsing error: {e}")
+    return parsed
+
+
+def _ndjson_line(event: dict) -> str:
+    return json.dumps(event) + "\n"
 
-    # --- Score the resume ---
+
+def _sse_event(event_type: str, data: dict) -> str:
+    """Format a Server-Sent Event message."""
+    return f"event: {event_type}\ndata: {json.dumps(data)}\n\n"
+
+
+async def _score_parsed(parsed: dict, job_description: str, role: str, seniority: str) -> dict:
+    """Run score_resume on the score pool, mapping failures to HTTP errors."""
     try:
-        scoring_data = score_resume(resume_text, job_description)
+        return await run_stage(
+            "score", score_resume, parsed["text"], job_description,
+            role or None, seniority or None, parsed["profile"],
+        )
+    except StageTimeout as e:
+        raise HTTPException(status_code=504, detail=f"Scoring error: {e}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Scoring error: {e}")
 
-    # --- Generate LLM / rule-based feedback ---
+
+async def _generate_feedback(
+    scoring_data: dict, parsed: dict, job_description: str, budget: Optional[float] = None
+) -> dict:
+    """LLM / rule-based feedback; never raises. `budget` caps the wait in seconds."""
     try:
-        feedback = generate_feedback(scoring_data, resume_text, job_description)
+        return await generate_feedback_async(
+            scoring_data, parsed["text"], job_description,
+            timeout=STAGE_TIMEOUTS["feedback"], profile=parsed["profile"], budget=budget,
+        )
     except Exception as e:
-        feedback = {
+        return {
             "critical_improvements": ["Feedback generation failed. Please check logs."],
             "star_analysis": "",
             "ai_powered": False,
         }
 
-    # --- Build final response ---
+
+def _score_payload(scoring_data: dict, parsed: dict) -> dict:
     return {
         "overall_score": scoring_data["overall_score"],
         "breakdown": scoring_data["breakdown"],
@@ -136,6 +299,15 @@ async def analyze_resume(
         "missing_keywords": scoring_data["missing_keywords"],
         "sections_detected": scoring_data["sections_detected"],
         "word_count": scoring_data["word_count"],
+        "percentile": scoring_data.get("percentile"),
+        "reference": scoring_data.get("reference"),
+        "parse_tier": parsed["tier"],
+        "parse_cached": parsed["cached"],
+    }
+
+
+def _feedback_payload(feedback: dict) -> dict:
+    return {
         "top_improvement": feedback.get("top_improvement", ""),
         "missing_critical_skills": feedback.get("missing_critical_skills", []),
         "bullet_point_rewrite": feedback.get("bullet_point_rewrite", {"original": "", "suggested": ""}),
@@ -143,9 +315,289 @@ async def analyze_resume(
         "star_analysis": feedback.get("star_analysis", ""),
         "ai_powered": feedback.get("ai_powered", False),
         "model_used": feedback.get("model", "rule-based"),
+        "feedback_cached": feedback.get("cached", False),
+        "feedback_id": feedback.get("feedback_id"),
+        "feedback_pending": feedback.get("feedback_pending", False),
+        "llm_skipped": feedback.get("llm_skipped"),
     }
 
 
+@app.post("/analyze")
+async def analyze_resume(
+    resume: UploadFile = File(..., description="PDF resume file"),
+    job_description: str = Form(default="", description="Job description text (optional)"),
+    role: str = Form(default="", description="Target role hint, e.g. 'Software Engineer' (optional, used when no JD)"),
+    seniority: str = Form(default="", description="Seniority hint: fresher / junior / mid-level / senior (optional)"),
+    budget_ms: Optional[int] = Query(default=None, ge=0, description="Latency budget for the whole request (optional)"),
+):
+    """
+    Analyze a resume PDF against an optional job description.
+    Without a JD, the resume is compared to the benchmark centroid for the
+    given role / seniority hints (or the overall benchmark centroid).
+
+    With budget_ms, LLM feedback that is not ready when the budget runs out is
+    replaced by rule-based feedback (feedback_pending=true, plus a feedback_id
+    to poll at /analyze/feedback/{feedback_id}); the LLM call keeps running.
+
+    Returns:
+    - overall_score (0-100)
+    - breakdown (semantic, keyword, format subscores)
+    - matched_keywords / missing_keywords
+    - critical_improvements (LLM or rule-based)
+    - star_analysis (narrative summary)
+    """
+    started = asyncio.get_running_loop().time()
+    parsed = await _read_resume(resume)
+    scoring_data = await _score_parsed(parsed, job_description, role, seniority)
+    budget = None
+    if budget_ms is not None:
+        # Whatever parsing and scoring left of the budget goes to the LLM
+        budget = max(0.0, budget_ms / 1000 - (asyncio.get_running_loop().time() - started))
+    feedback = await _generate_feedback(scoring_data, parsed, job_description, budget)
+    return {**_score_payload(scoring_data, parsed), **_feedback_payload(feedback)}
+
+
+@app.get("/analyze/feedback/{feedback_id}")
+async def analyze_feedback(feedback_id: str):
+    """
+    Poll feedback that missed an /analyze budget:
+    202 {"status": "pending"} while the LLM call runs; then 200 with
+    {"status": "ready", ...feedback fields} or {"status": "failed"} (the
+    rule-based feedback already returned stands). 404 for unknown ids.
+    """
+    status = await feedback_status(feedback_id) if feedback_status else None
+    if status is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired feedback_id.")
+    if status["status"] == "pending":
+        return JSONResponse(status_code=202, content={"feedback_id": feedback_id, "status": "pending"})
+    if status["status"] == "failed":
+        return {"feedback_id": feedback_id, "status": "failed"}
+    return {**_feedback_payload(status["feedback"]), "feedback_id": feedback_id, "status": "ready"}
+
+
+@app.post("/analyze/stream")
+async def analyze_resume_stream(
+    resume: UploadFile = File(..., description="PDF resume file"),
+    job_description: str = Form(default="", description="Job description text (optional)"),
+    role: str = Form(default="", description="Target role hint (optional, used when no JD)"),
+    seniority: str = Form(default="", description="Seniority hint (optional, used when no JD)"),
+):
+    """
+    Same analysis as /analyze, delivered progressively as Server-Sent Events:
+    - event: score     — score payload, sent as soon as scoring finishes
+    - event: feedback  — LLM (or rule-based) feedback once it is ready
+    - event: done      — timings; the stream ends
+    Parse and scoring errors are returned as normal HTTP errors before the stream starts.
+    """
+    started = asyncio.get_running_loop().time()
+    parsed = await _read_resume(resume)
+    scoring_data = await _score_parsed(parsed, job_description, role, seniority)
+    score_ms = round((asyncio.get_running_loop().time() - started) * 1000, 1)
+
+    async def events():
+        yield _sse_event("score", _score_payload(scoring_data, parsed))
+        feedback = await _generate_feedback(scoring_data, parsed, job_description)
+        yield _sse_event("feedback", _feedback_payload(feedback))
+        total_ms = round((asyncio.get_running_loop().time() - started) * 1000, 1)
+        yield _sse_event("done", {"score_ms": score_ms, "total_ms": total_ms})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.post("/analyze/multi")
+async def analyze_resume_multi(
+    resume: UploadFile = File(..., description="PDF resume file"),
+    job_descriptions: List[str] = Form(..., description="Job description texts (repeat the field once per JD)"),
+    role: str = Form(default="", description="Target role hint (optional, used for blank JDs)"),
+    seniority: str = Form(default="", description="Seniority hint (optional, used for blank JDs)"),
+):
+    """
+    Rank one resume PDF against many job descriptions in a single call.
+    The PDF is parsed and embedded once; all JDs are embedded in one batch.
+    A blank JD is scored like /analyze with no JD (role/seniority centroid).
+
+    Returns:
+    - results: ranked best-first, each with rank, index (input position),
+      overall_score, breakdown, matched / missing keywords and reference
+    """
+    if not job_descriptions:
+        raise HTTPException(status_code=400, detail="Provide at least one job description.")
+    if len(job_descriptions) > MAX_MULTI_JDS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many job descriptions ({len(job_descriptions)}); the limit is {MAX_MULTI_JDS}.",
+        )
+
+    parsed = await _read_resume(resume)
+
+    try:
+        results = await run_stage(
+            "score", score_resume_many, parsed["text"], job_descriptions, parsed["profile"],
+            role or None, seniority or None,
+        )
+    except StageTimeout as e:
+        raise HTTPException(status_code=504, detail=f"Scoring error: {e}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Scoring error: {e}")
+
+    return {
+        "results": [
+            {
+                "rank": r["rank"],
+                "index": r["index"],
+                "overall_score": r["overall_score"],
+                "breakdown": r["breakdown"],
+                "matched_keywords": r["matched_keywords"],
+                "missing_keywords": r["missing_keywords"],
+                "reference": r["reference"],
+            }
+            for r in results
+        ],
+        "sections_detected": results[0]["sections_detected"],
+        "word_count": results[0]["word_count"],
+    }
+
+
+def _pdf_error(pdf_bytes: bytes) -> Optional[tuple[int, str]]:
+    """Per-file checks for /analyze/batch, same limits as _read_upload: (status, detail) or None."""
+    if len(pdf_bytes) > MAX_UPLOAD_BYTES:
+        return 413, f"PDF is too large; the limit is {MAX_UPLOAD_BYTES // (1024 * 1024)} MB."
+    if b"%PDF-" not in pdf_bytes[:1024]:
+        return 415, "File is not a PDF (missing %PDF header)."
+    if len(pdf_bytes) < 100:
+        return 422, "PDF file appears to be empty."
+    return None
+
+
+def _batch_sources(files: List[UploadFile], archives: list) -> list:
+    """
+    Expand uploads into BatchSources. PDFs are read lazily (at most
+    MAX_UPLOAD_BYTES + 1 bytes each); zip archives contribute their .pdf entries.
+    """
+    sources = []
+    for upload in files:
+        name = upload.filename or "upload"
+        if name.lower().endswith(".zip"):
+            try:
+                archive = zipfile.ZipFile(upload.file)
+            except zipfile.BadZipFile:
+                raise HTTPException(status_code=400, detail=f"{name} is not a valid zip archive.")
+            archives.append(archive)
+            for info in archive.infolist():
+                base = os.path.basename(info.filename)
+                if info.is_dir() or info.filename.startswith("__MACOSX/") or base.startswith("."):
+                    continue
+                if base.lower().endswith(".pdf"):
+                    sources.append(BatchSource(
+                        f"{name}/{info.filename}",
+                        # Read off the event loop; never decompress more than the cap (zip bombs)
+                        lambda a=archive, i=info: asyncio.to_thread(
+                            lambda: a.open(i).read(MAX_UPLOAD_BYTES + 1)
+                        ),
+                    ))
+        else:
+            sources.append(BatchSource(name, lambda u=upload: u.read(MAX_UPLOAD_BYTES + 1)))
+    return sources
+
+
+# The form is parsed in the handler (FastAPI's own parse stops at Starlette's
+# default of 1000 files), so the fields are described here for /docs
+_BATCH_FORM_SCHEMA = {
+    "type": "object",
+    "required": ["files"],
+    "properties": {
+        "files": {
+            "type": "array",
+            "items": {"type": "string", "format": "binary"},
+            "description": "Resume PDFs and/or .zip archives of PDFs",
+        },
+        "job_description": {"type": "string", "default": "", "description": "Job description every resume is scored against"},
+        "role": {"type": "string", "default": "", "description": "Target role hint (optional, used when no JD)"},
+        "seniority": {"type": "string", "default": "", "description": "Seniority hint (optional, used when no JD)"},
+        "stream": {"type": "string", "default": "ndjson", "description": "Response format: ndjson or sse"},
+    },
+}
+
+
+def _form_text(form, name: str, default: str = "") -> str:
+    value = form.get(name, default)
+    return value if isinstance(value, str) else default
+
+
+@app.post(
+    "/analyze/batch",
+    openapi_extra={"requestBody": {"required": True, "content": {"multipart/form-data": {"schema": _BATCH_FORM_SCHEMA}}}},
+)
+async def analyze_resume_batch(request: Request):
+    """
+    Score many resumes against one JD. Parsing, embedding and scoring run as
+    overlapping pipeline stages; the JD is embedded once. With no JD every
+    resume is compared to the role/seniority centroid, as on /analyze.
+    No LLM feedback.
+
+    Streams one event per resume as it finishes (completion order):
+    - {"type": "result", "index", "filename", "overall_score", "breakdown", ...}
+    - {"type": "error", "index", "filename", "status", "detail"}
+    followed by a final {"type": "summary"} with results in input order,
+    the best-first ranking and throughput (resumes_per_s).
+    """
+    if run_batch is None or prepare_job is None:
+        raise HTTPException(status_code=503, detail="Batch scoring is not available.")
+
+    form = await request.form(max_files=MAX_BATCH_FILES)
+    archives: list = []
+    try:
+        stream = _form_text(form, "stream", "ndjson")
+        if stream not in ("ndjson", "sse"):
+            raise HTTPException(status_code=400, detail="stream must be 'ndjson' or 'sse'.")
+        files = [f for f in form.getlist("files") if not isinstance(f, str)]
+        if not files:
+            raise HTTPException(status_code=422, detail="At least one file is required in 'files'.")
+
+        sources = _batch_sources(files, archives)
+        if not sources:
+            raise HTTPException(status_code=400, detail="No PDF files found in the upload.")
+        if len(sources) > MAX_BATCH_FILES:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Too many resumes ({len(sources)}); the limit is {MAX_BATCH_FILES}.",
+            )
+
+        role, seniority = _form_text(form, "role"), _form_text(form, "seniority")
+        try:
+            job = await run_stage("score", prepare_job, _form_text(form, "job_description"), role or None, seniority or None)
+        except StageTimeout as e:
+            raise HTTPException(status_code=504, detail=f"Scoring error: {e}")
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Scoring error: {e}")
+    except BaseException:
+        for archive in archives:
+            archive.close()
+        await form.close()
+        raise
+
+    async def body():
+        try:
+            start = {"type": "start", "total": len(sources)}
+            yield _sse_event("start", start) if stream == "sse" else _ndjson_line(start)
+            async for event in run_batch(sources, job, _pdf_error):
+                yield _sse_event(event["type"], event) if stream == "sse" else _ndjson_line(event)
+        finally:
+            for archive in archives:
+                archive.close()
+            await form.close()
+
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream" if stream == "sse" else "application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 # ---------------------------------------------------------------------------
 # Dev runner
 # ---------------------------------------------------------------------------
@@ -0,0 +1,148 @@
+"""
+parse_cache.py — Cache of PDF parse results keyed by document hash
+Key = SHA-256 of the PDF bytes + parser version + pipeline options, so
+re-uploading the same file skips Docling entirely while any parser upgrade
+or option change invalidates old entries automatically.
+
+Two tiers:
+    1. Small in-memory LRU front (most recent documents)
+    2. SQLite store on disk, bounded by total size with LRU eviction and a TTL
+
+feedback_cache.py reuses the same two-tier store (in its own table) for LLM feedback.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+
+def make_parse_key(pdf_bytes: bytes, fingerprint: str) -> str:
+    h = hashlib.sha256()
+    h.update(fingerprint.encode("utf-8"))
+    h.update(b"\0")
+    h.update(pdf_bytes)
+    return h.hexdigest()
+
+
+class ParseCache:
+    def __init__(
+        self,
+        disk_path: Optional[str] = None,
+        max_bytes: int = 256 * 1024 * 1024,
+        ttl_s: float = 7 * 24 * 3600,
+        memory_items: int = 128,
+        table: str = "parses",
+    ):
+        self.disk_path = disk_path or None
+        self.table = table
+        self.max_bytes = max_bytes
+        self.ttl_s = ttl_s
+        self.memory_items = memory_items
+        self._memory: "OrderedDict[str, tuple[float, dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if self.disk_path:
+            os.makedirs(os.path.dirname(os.path.abspath(self.disk_path)), exist_ok=True)
+            self._db = sqlite3.connect(self.disk_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} ("
+                " key TEXT PRIMARY KEY,"
+                " value TEXT NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " last_access REAL NOT NULL)"
+            )
+            self._db.execute(f"CREATE INDEX IF NOT EXISTS {table}_last_access ON {table} (last_access)")
+            self._db.commit()
+
+    def get(self, key: str) -> Optional[dict]:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and now - entry[0] <= self.ttl_s:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    f"SELECT value, created_at FROM {self.table} WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and now - row[1] <= self.ttl_s:
+                    self._db.execute(f"UPDATE {self.table} SET last_access = ? WHERE key = ?", (now, key))
+                    self._db.commit()
+                    value = json.loads(row[0])
+                    self._put_memory(key, row[1], value)
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return value
+
+            self.misses += 1
+            return None
+
+    def put(self, key: str, value: dict) -> None:
+        now = time.time()
+        with self._lock:
+            self._put_memory(key, now, value)
+            if self._db is None:
+                return
+            payload = json.dumps(value, ensure_ascii=False)
+            try:
+                self._db.execute(
+                    f"INSERT OR REPLACE INTO {self.table} (key, value, size, created_at, last_access)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    (key, payload, len(payload.encode("utf-8")), now, now),
+                )
+                self._evict_disk(now)
+                self._db.commit()
+            except sqlite3.Error as e:
+                print(f"[{self.table} cache] Disk write failed ({e}); keeping memory tier only.")
+
+    def _put_memory(self, key: str, created_at: float, value: dict) -> None:
+        self._memory[key] = (created_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def _evict_disk(self, now: float) -> None:
+        cur = self._db.execute(f"DELETE FROM {self.table} WHERE created_at < ?", (now - self.ttl_s,))
+        self.evictions += cur.rowcount
+        total = self._db.execute(f"SELECT COALESCE(SUM(size), 0) FROM {self.table}").fetchone()[0]
+        while total > self.max_bytes:
+            row = self._db.execute(
+                f"SELECT key, size FROM {self.table} ORDER BY last_access ASC LIMIT 1"
+            ).fetchone()
+            if row is None:
+                break
+            self._db.execute(f"DELETE FROM {self.table} WHERE key = ?", (row[0],))
+            total -= row[1]
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            stats = {
+                "memory_entries": len(self._memory),
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "disk_path": self.disk_path,
+            }
+            if self._db is not None:
+                count, size = self._db.execute(
+                    f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM {self.table}"
+                ).fetchone()
+                stats.update({"disk_entries": count, "disk_bytes": size, "max_bytes": self.max_bytes})
+            return stats
@@ -0,0 +1,310 @@
+"""
+parse_pool.py — Dedicated worker processes for PDF parsing
+Docling conversions vary widely in time and memory, and one pathological PDF
+can hang or balloon a process. Parsing therefore runs in a fixed set of
+worker processes, separate from the API process and the embedding stage:
+
+    - each worker loads Docling's DocumentConverter once at startup
+    - every document gets a wall-clock deadline; a worker that misses it is
+      killed and replaced (→ ParseDeadline, a StageTimeout → 504)
+    - a worker whose RSS crosses the hard limit mid-document is killed too
+      (→ ValueError → 422), as is one that dies on its own
+    - after max_docs documents, or when RSS ends a document above the
+      ceiling, the worker is recycled (graceful exit, fresh process)
+
+Callers are the "parse" stage threads (execution.run_stage); each one checks
+out an idle worker, so PARSE_WORKERS threads drive PARSE_WORKERS processes.
+
+Settings (env):
+    PARSE_POOL                  — process (default) | thread (parse in-process)
+    PARSE_WORKERS               — number of worker processes
+    PARSE_DOC_DEADLINE_S        — per-document wall clock (default PARSE_TIMEOUT_S)
+    PARSE_WORKER_MAX_DOCS       — recycle after this many documents
+    PARSE_WORKER_MAX_RSS_MB     — recycle above this RSS; kill mid-document at 1.5×
+    PARSE_WORKER_START_TIMEOUT_S — time allowed for a worker to load Docling
+"""
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+from typing import Optional
+
+from execution import STAGE_TIMEOUTS, STAGE_WORKERS, StageTimeout
+
+POOL_MODE = os.getenv("PARSE_POOL", "process").strip().lower()
+DOC_DEADLINE_S = float(os.getenv("PARSE_DOC_DEADLINE_S", str(STAGE_TIMEOUTS["parse"])))
+MAX_DOCS = int(os.getenv("PARSE_WORKER_MAX_DOCS", "200"))
+MAX_RSS_MB = float(os.getenv("PARSE_WORKER_MAX_RSS_MB", "1500"))
+START_TIMEOUT_S = float(os.getenv("PARSE_WORKER_START_TIMEOUT_S", "120"))
+
+# How often the caller checks the worker's RSS while waiting for a result
+_POLL_S = 0.25
+# Hard kill threshold, relative to the recycle ceiling
+_KILL_FACTOR = 1.5
+
+
+class ParseDeadline(StageTimeout):
+    """The document did not parse within the per-document deadline."""
+
+    def __init__(self, timeout: float):
+        super().__init__("parse", timeout)
+
+
+def _rss_mb(pid: int) -> Optional[float]:
+    """Resident set size of a process in MB (Linux /proc; None elsewhere)."""
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+# ---------------------------------------------------------------------------
+# Worker process
+# ---------------------------------------------------------------------------
+
+def _worker_main(conn) -> None:
+    # Workers never touch the parse cache — the API process owns it
+    os.environ["PARSE_CACHE_PATH"] = ""
+    import parser
+
+    parser.get_converter()
+    conn.send(("ready", os.getpid()))
+    while True:
+        try:
+            pdf_bytes = conn.recv()
+        except EOFError:
+            return
+        if pdf_bytes is None:  # graceful recycle / shutdown
+            return
+        try:
+            conn.send(("ok", parser.parse_document(pdf_bytes)))
+        except ValueError as e:
+            conn.send(("invalid", str(e)))
+        except Exception as e:
+            conn.send(("error", f"{type(e).__name__}: {e}"))
+
+
+class _Worker:
+    def __init__(self, ctx):
+        self.conn, child_conn = ctx.Pipe()
+        self.proc = ctx.Process(target=_worker_main, args=(child_conn,), name="ats-parse", daemon=True)
+        self.proc.start()
+        child_conn.close()
+        self.ready = False
+        self.docs = 0
+
+    def wait_ready(self) -> None:
+        if self.ready:
+            return
+        if not self.conn.poll(START_TIMEOUT_S):
+            raise RuntimeError(f"parse worker did not start within {START_TIMEOUT_S:g}s")
+        self.conn.recv()
+        self.ready = True
+
+    def rss_mb(self) -> Optional[float]:
+        return _rss_mb(self.proc.pid)
+
+    def stop(self, graceful: bool) -> None:
+        if graceful and self.proc.is_alive():
+            try:
+                self.conn.send(None)
+                self.proc.join(5)
+            except (OSError, BrokenPipeError):
+                pass
+        if self.proc.is_alive():
+            self.proc.kill()
+            self.proc.join(5)
+        self.conn.close()
+
+
+# ---------------------------------------------------------------------------
+# Pool (API process side)
+# ---------------------------------------------------------------------------
+
+class ParsePool:
+    def __init__(
+        self,
+        size: int,
+        deadline_s: float = DOC_DEADLINE_S,
+        max_docs: int = MAX_DOCS,
+        max_rss_mb: float = MAX_RSS_MB,
+    ):
+        self.size = size
+        self.deadline_s = deadline_s
+        self.max_docs = max_docs
+        self.max_rss_mb = max_rss_mb
+        # spawn, not fork: the API process has threads and (possibly) torch loaded
+        self._ctx = mp.get_context("spawn")
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        self._workers: set[_Worker] = set()
+        self._lock = threading.Lock()
+        self._closed = False
+
+        self.docs = 0
+        self.deadlines = 0
+        self.rss_kills = 0
+        self.crashes = 0
+        self.recycles = 0
+
+        for _ in range(size):
+            self._start_spawner()
+
+    def _start_spawner(self, retired: Optional[_Worker] = None, graceful: bool = False) -> None:
+        threading.Thread(
+            target=self._spawn, args=(retired, graceful), name="ats-parse-spawn", daemon=True
+        ).start()
+
+    def _spawn(self, retired: Optional[_Worker], graceful: bool) -> None:
+        """
+        Background thread: stop the retired worker, then start a new one and
+        put it on the idle queue once Docling has loaded — request threads
+        never wait for a worker to start or stop.
+        """
+        if retired is not None:
+            retired.stop(graceful)
+        while True:
+            with self._lock:
+                if self._closed:
+                    return
+                worker = _Worker(self._ctx)
+                self._workers.add(worker)
+            try:
+                worker.wait_ready()
+            except (RuntimeError, EOFError, OSError) as e:
+                print(f"[parse_pool] Worker failed to start: {e}")
+                with self._lock:
+                    self._workers.discard(worker)
+                worker.stop(graceful=False)
+                time.sleep(1.0)
+                continue
+            with self._lock:
+                if self._closed:
+                    return
+                self._idle.put(worker)
+            return
+
+    def _replace(self, worker: _Worker, graceful: bool) -> None:
+        with self._lock:
+            self._workers.discard(worker)
+        self._start_spawner(worker, graceful)
+
+    def parse(self, pdf_bytes: bytes) -> dict:
+        """
+        Parse one document on an idle, ready worker (blocks until one is free).
+        Returns parser.parse_document's dict. Raises ParseDeadline on timeout,
+        ValueError for bad input or a worker killed for memory/crash.
+        """
+        try:
+            worker = self._idle.get(timeout=START_TIMEOUT_S)
+        except queue.Empty:
+            raise RuntimeError(f"no parse worker became ready within {START_TIMEOUT_S:g}s") from None
+        try:
+            worker.conn.send(pdf_bytes)
+            status, payload = self._wait(worker)
+        except BaseException:
+            self._replace(worker, graceful=False)
+            raise
+
+        worker.docs += 1
+        with self._lock:
+            self.docs += 1
+        rss = worker.rss_mb()
+        if worker.docs >= self.max_docs or (rss is not None and rss > self.max_rss_mb):
+            with self._lock:
+                self.recycles += 1
+            self._replace(worker, graceful=True)
+        else:
+            self._idle.put(worker)
+
+        if status == "invalid":
+            raise ValueError(payload)
+        if status == "error":
+            raise RuntimeError(payload)
+        return payload
+
+    def _wait(self, worker: _Worker) -> tuple[str, object]:
+        deadline = time.monotonic() + self.deadline_s
+        kill_rss = self.max_rss_mb * _KILL_FACTOR
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                with self._lock:
+                    self.deadlines += 1
+                raise ParseDeadline(self.deadline_s)
+            try:
+                if worker.conn.poll(min(_POLL_S, remaining)):
+                    return worker.conn.recv()
+            except (EOFError, OSError):
+                with self._lock:
+                    self.crashes += 1
+                raise ValueError("PDF could not be parsed (parser process exited).")
+            if not worker.proc.is_alive():
+                with self._lock:
+                    self.crashes += 1
+                raise ValueError("PDF could not be parsed (parser process exited).")
+            rss = worker.rss_mb()
+            if rss is not None and rss > kill_rss:
+                with self._lock:
+                    self.rss_kills += 1
+                raise ValueError(f"PDF could not be parsed (exceeded {kill_rss:.0f} MB).")
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            workers = list(self._workers)
+            self._workers.clear()
+        for worker in workers:
+            worker.stop(graceful=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            workers = list(self._workers)
+            out = {
+                "mode": "process",
+                "size": self.size,
+                "idle": self._idle.qsize(),
+                "deadline_s": self.deadline_s,
+                "max_docs": self.max_docs,
+                "max_rss_mb": self.max_rss_mb,
+                "docs": self.docs,
+                "deadlines": self.deadlines,
+                "rss_kills": self.rss_kills,
+                "crashes": self.crashes,
+                "recycles": self.recycles,
+            }
+        out["workers"] = [
+            {"pid": w.proc.pid, "ready": w.ready, "docs": w.docs, "rss_mb": w.rss_mb()} for w in workers
+        ]
+        return out
+
+
+# ---------------------------------------------------------------------------
+# Module-level pool (started from the app lifespan)
+# ---------------------------------------------------------------------------
+_pool: Optional[ParsePool] = None
+
+
+def start_parse_pool() -> Optional[ParsePool]:
+    global _pool
+    if POOL_MODE == "process" and _pool is None:
+        _pool = ParsePool(STAGE_WORKERS["parse"])
+        print(f"[parse_pool] Started {_pool.size} parse worker processes")
+    return _pool
+
+
+def parse_runner():
+    """Callable for parser.parse_pdf(runner=...), or None to parse in-process."""
+    return _pool.parse if _pool is not None else None
+
+
+def shutdown_parse_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.close()
+        _pool = None
+
+
+def parse_pool_stats() -> dict:
+    return _pool.stats() if _pool is not None else {"mode": "thread"}
@@ -1,13 +1,38 @@
 """
-parser.py — PDF text extraction using IBM Docling
-Leverages Docling for advanced structural, multi-column understanding without expensive APIs.
+parser.py — Tiered PDF text extraction
+    Tier 1 (fast)    — PyMuPDF text layer + quality/layout check (fast_pdf.py)
+    Tier 2 (docling) — IBM Docling layout pipeline, only when tier 1 fails its check
+Docling gives advanced structural, multi-column understanding without expensive
+APIs but costs seconds per document; most simple text resumes never need it.
+Parse results are cached by document hash (see parse_cache.py), so re-uploads skip both.
+
+PARSE_TIER: auto (default) | fast (never escalate) | docling (always Docling)
 """
+import io
+import json
 import os
 import re
-import tempfile
+import threading
+import time
+from collections import Counter
+from importlib.metadata import PackageNotFoundError, version
+from typing import Callable, Optional
 
+from docling.datamodel.base_models import DocumentStream
 from docling.document_converter import DocumentConverter
 
+import fast_pdf
+from parse_cache import ParseCache, make_parse_key
+from resume_profile import ResumeProfile, analyze
+
+# Longer documents are rejected before any extraction work (resumes are 1-3 pages)
+MAX_PDF_PAGES = int(os.getenv("MAX_PDF_PAGES", "10"))
+
+PARSE_TIERS = ("auto", "fast", "docling")
+_TIER_MODE = os.getenv("PARSE_TIER", "auto").strip().lower()
+if _TIER_MODE not in PARSE_TIERS:
+    raise ValueError(f"PARSE_TIER must be one of {PARSE_TIERS}, got {_TIER_MODE!r}")
+
 # Singleton converter to avoid reloading models on every request
 _converter = None
 
@@ -18,23 +43,164 @@ def get_converter() -> DocumentConverter:
         _converter = DocumentConverter()
     return _converter
 
-def extract_text(pdf_bytes: bytes) -> str:
+# ---------------------------------------------------------------------------
+# Parse-result cache — keyed by PDF hash + Docling version + pipeline options.
+# Bump _PIPELINE_OPTIONS["revision"] whenever extraction/cleaning output changes.
+# ---------------------------------------------------------------------------
+_PIPELINE_OPTIONS = {"converter": "default", "export": "markdown", "revision": 3}
+
+
+def _package_version(name: str) -> str:
+    try:
+        return version(name)
+    except PackageNotFoundError:
+        return "unknown"
+
+
+def _parser_fingerprint() -> str:
+    return json.dumps(
+        {
+            "docling": _package_version("docling"),
+            "pymupdf": _package_version("pymupdf"),
+            "tier_mode": _TIER_MODE,
+            "fast": fast_pdf.settings(),
+            **_PIPELINE_OPTIONS,
+        },
+        sort_keys=True,
+    )
+
+
+_FINGERPRINT = _parser_fingerprint()
+_parse_cache = ParseCache(
+    disk_path=os.getenv("PARSE_CACHE_PATH", "./parse_cache.sqlite3"),
+    max_bytes=int(os.getenv("PARSE_CACHE_MAX_MB", "256")) * 1024 * 1024,
+    ttl_s=float(os.getenv("PARSE_CACHE_TTL_DAYS", "7")) * 24 * 3600,
+    memory_items=int(os.getenv("PARSE_CACHE_MEMORY_ITEMS", "128")),
+)
+
+
+def parse_cache_stats() -> dict:
+    return _parse_cache.stats()
+
+
+# ---------------------------------------------------------------------------
+# Tier counters for /metrics (uncached parses only; docling timings include
+# the rejected fast attempt — that's the real cost of escalating)
+# ---------------------------------------------------------------------------
+_stats_lock = threading.Lock()
+_tier_counts: Counter = Counter()
+_tier_ms: Counter = Counter()
+_escalations: Counter = Counter()
+
+
+def _record(tier: str, elapsed_ms: float, reason: Optional[str] = None) -> None:
+    with _stats_lock:
+        _tier_counts[tier] += 1
+        _tier_ms[tier] += elapsed_ms
+        if reason:
+            _escalations[reason] += 1
+
+
+def parser_stats() -> dict:
+    with _stats_lock:
+        total = sum(_tier_counts.values())
+        return {
+            "mode": _TIER_MODE,
+            "parses": dict(_tier_counts),
+            "avg_ms": {t: round(_tier_ms[t] / n, 1) for t, n in _tier_counts.items()},
+            "fast_path_rate": round(_tier_counts["fast"] / total, 4) if total else 0.0,
+            "escalations": dict(_escalations),
+        }
+
+
+def parse_pdf(pdf_bytes: bytes, runner: Optional[Callable[[bytes], dict]] = None) -> dict:
     """
-    Extract clean text from a PDF byte stream using Docling.
+    Extract text and detected sections, served from the parse cache when this
+    exact document was parsed before. On a miss the document is parsed by
+    `runner` (e.g. the parse_pool worker processes) or in-process.
+    Returns {"text": str, "profile": ResumeProfile, "tier": "fast" | "docling", "cached": bool}.
+    """
+    key = make_parse_key(pdf_bytes, _FINGERPRINT)
+    hit = _parse_cache.get(key)
+    if hit is None:
+        parsed = (runner or parse_document)(pdf_bytes)
+        _record(parsed["tier"], parsed["parse_ms"], parsed["escalation"])
+        hit = {"text": parsed["text"], "profile": parsed["profile"], "tier": parsed["tier"]}
+        _parse_cache.put(key, hit)
+        cached = False
+    else:
+        cached = True
+    return {**hit, "profile": ResumeProfile.from_dict(hit["profile"]), "cached": cached}
+
+
+def parse_document(pdf_bytes: bytes) -> dict:
+    """
+    Uncached parse: page precheck, tiered extraction, structural profile.
+    Self-contained so it can run inside a parse worker process (the profile
+    is returned as a plain dict).
+    Returns {"text", "profile", "tier", "parse_ms", "escalation"}.
     """
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
-        tmp.write(pdf_bytes)
-        tmp_path = tmp.name
+    t0 = time.perf_counter()
+    precheck(pdf_bytes)
+    text, tier, escalation = extract_text_tiered(pdf_bytes)
+    return {
+        "text": text,
+        "profile": analyze(text).to_dict(),
+        "tier": tier,
+        "parse_ms": (time.perf_counter() - t0) * 1000,
+        "escalation": escalation,
+    }
 
+
+def precheck(pdf_bytes: bytes) -> int:
+    """
+    Open the PDF (xref + page tree only, no content streams) and enforce
+    MAX_PDF_PAGES. Raises ValueError for unreadable, encrypted or oversized
+    documents; returns the page count.
+    """
     try:
-        converter = get_converter()
-        doc = converter.convert(tmp_path)
-        # export_to_markdown preserves lists and structure perfectly
-        text = doc.document.export_to_markdown()
-        return _clean_text(text)
-    finally:
-        if os.path.exists(tmp_path):
-            os.remove(tmp_path)
+        pages, encrypted = fast_pdf.page_info(pdf_bytes)
+    except Exception as e:
+        raise ValueError(f"Could not open PDF: {e}")
+    if encrypted:
+        raise ValueError("PDF is password-protected. Please upload an unlocked copy.")
+    if pages == 0:
+        raise ValueError("PDF has no pages.")
+    if pages > MAX_PDF_PAGES:
+        raise ValueError(f"PDF has {pages} pages; the limit is {MAX_PDF_PAGES}.")
+    return pages
+
+
+def extract_text_tiered(pdf_bytes: bytes) -> tuple[str, str, Optional[str]]:
+    """
+    Try the PyMuPDF text layer first and escalate to Docling when its quality
+    check fails (or PyMuPDF can't open the file).
+    Returns (clean_text, tier, escalation_reason).
+    """
+    reason = None
+    if _TIER_MODE != "docling":
+        try:
+            fast = fast_pdf.extract(pdf_bytes)
+            reason = fast.reason
+        except Exception as e:
+            fast, reason = None, "fast_error"
+            print(f"[parser] PyMuPDF failed ({e}); escalating to Docling.")
+        if reason is None or (_TIER_MODE == "fast" and fast is not None):
+            return _clean_text(fast.text), "fast", None
+
+    return extract_text(pdf_bytes), "docling", reason
+
+
+def extract_text(pdf_bytes: bytes) -> str:
+    """
+    Extract clean text from a PDF byte stream using Docling.
+    The bytes are handed over as an in-memory stream — no temp file round-trip.
+    """
+    converter = get_converter()
+    doc = converter.convert(DocumentStream(name="resume.pdf", stream=io.BytesIO(pdf_bytes)))
+    # export_to_markdown preserves lists and structure perfectly
+    text = doc.document.export_to_markdown()
+    return _clean_text(text)
 
 
 def _clean_text(text: str) -> str:
@@ -49,19 +215,6 @@ def _clean_text(text: str) -> str:
 def detect_sections(text: str) -> dict:
     """
     Detect common resume sections for structure scoring.
+    (Shortcut to resume_profile.analyze when only the booleans are needed.)
     """
-    text_lower = text.lower()
-    section_patterns = {
-        "contact": r"(email|phone|linkedin|github|portfolio|@)",
-        "summary": r"(summary|objective|profile|about me|professional summary)",
-        "experience": r"(experience|work history|employment|positions held)",
-        "education": r"(education|degree|university|college|bachelor|master|phd|bs|ms)",
-        "skills": r"(skills|technologies|tech stack|proficiencies|competencies)",
-        "projects": r"(projects|portfolio|open.?source)",
-        "certifications": r"(certif|credential|license|aws|gcp|azure)",
-        "achievements": r"(achievement|award|honor|recognition|publication)",
-    }
-    detected = {}
-    for section, pattern in section_patterns.items():
-        detected[section] = bool(re.search(pattern, text_lower))
-    return detected
+    return analyze(text).sections_detected
@@ -0,0 +1,148 @@
+"""
+percentiles.py — In-memory percentile index over stored ATS scores
+ATS scores are integers in 0-100, so each metric is kept as an exact
+101-bucket count array behind a Fenwick (binary indexed) tree:
+    add   — O(log 101)
+    rank  — O(log 101)  ("better than X% of resumes")
+No approximation and no scan of the ChromaDB collection per request.
+
+The index is built once from the resume_embeddings metadata at startup and
+updated incrementally as new scores are produced. An optional `role`
+partition is kept next to the global one.
+"""
+import threading
+from typing import Iterable, Optional
+
+METRICS = ("overall", "semantic")
+_GLOBAL = "all"
+_QUANTILES = (10, 25, 50, 75, 90)
+
+
+class ScoreDistribution:
+    """Exact distribution of integer scores 0-100 (Fenwick tree over counts)."""
+
+    SIZE = 101
+
+    def __init__(self):
+        self._tree = [0] * (self.SIZE + 1)
+        self.count = 0
+
+    def add(self, score: int) -> None:
+        i = min(max(int(score), 0), self.SIZE - 1) + 1
+        while i <= self.SIZE:
+            self._tree[i] += 1
+            i += i & -i
+        self.count += 1
+
+    def count_below(self, score: int) -> int:
+        """Number of stored scores strictly lower than `score`."""
+        i = min(max(int(score), 0), self.SIZE)
+        total = 0
+        while i > 0:
+            total += self._tree[i]
+            i -= i & -i
+        return total
+
+    def percentile(self, score: int) -> float:
+        """Percentage of stored scores strictly below `score` (0-100)."""
+        if not self.count:
+            return 0.0
+        return round(100.0 * self.count_below(score) / self.count, 1)
+
+    def quantile(self, q: float) -> int:
+        """Smallest score s such that at least q% of stored scores are <= s."""
+        target = max(1, -(-self.count * q // 100))  # ceil
+        lo, hi = 0, self.SIZE - 1
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.count_below(mid + 1) >= target:
+                hi = mid
+            else:
+                lo = mid + 1
+        return lo
+
+    def histogram(self, bucket: int = 10) -> dict[str, int]:
+        out = {}
+        for start in range(0, self.SIZE, bucket):
+            end = min(start + bucket, self.SIZE)
+            out[f"{start}-{end - 1}"] = self.count_below(end) - self.count_below(start)
+        return out
+
+
+def _partition_key(role: Optional[str]) -> Optional[str]:
+    role = (role or "").strip().lower()
+    return role or None
+
+
+class PercentileIndex:
+    """
+    Global + per-role distributions for every metric in METRICS.
+    Role-specific ranks are only used once a partition holds min_partition_size
+    scores; smaller partitions fall back to the global distribution.
+    """
+
+    def __init__(self, min_partition_size: int = 30):
+        self.min_partition_size = min_partition_size
+        self._parts: dict[str, dict[str, ScoreDistribution]] = {}
+        self._lock = threading.Lock()
+
+    def _part(self, key: str) -> dict[str, ScoreDistribution]:
+        part = self._parts.get(key)
+        if part is None:
+            part = {m: ScoreDistribution() for m in METRICS}
+            self._parts[key] = part
+        return part
+
+    def add(self, scores: dict[str, int], role: Optional[str] = None) -> None:
+        keys = [_GLOBAL]
+        role_key = _partition_key(role)
+        if role_key:
+            keys.append(role_key)
+        with self._lock:
+            for key in keys:
+                part = self._part(key)
+                for metric in METRICS:
+                    if scores.get(metric) is not None:
+                        part[metric].add(scores[metric])
+
+    def load(self, metadatas: Iterable[dict]) -> int:
+        """Bulk-load stored metadata rows ({"score", "semantic", "role"?})."""
+        loaded = 0
+        for meta in metadatas:
+            if not meta or meta.get("score") is None:
+                continue
+            self.add({"overall": meta["score"], "semantic": meta.get("semantic")}, meta.get("role"))
+            loaded += 1
+        return loaded
+
+    def _resolve(self, role: Optional[str]) -> tuple[str, dict[str, ScoreDistribution]]:
+        role_key = _partition_key(role)
+        part = self._parts.get(role_key) if role_key else None
+        if part is not None and part["overall"].count >= self.min_partition_size:
+            return role_key, part
+        return _GLOBAL, self._part(_GLOBAL)
+
+    def rank(self, scores: dict[str, int], role: Optional[str] = None) -> dict:
+        """"Better than X% of resumes" for each metric, against the stored population."""
+        with self._lock:
+            key, part = self._resolve(role)
+            out = {m: part[m].percentile(scores[m]) for m in METRICS if scores.get(m) is not None}
+            out["sample_size"] = part["overall"].count
+            out["partition"] = key
+            return out
+
+    def distribution(self, role: Optional[str] = None) -> dict:
+        with self._lock:
+            key, part = self._resolve(role)
+            return {
+                "partition": key,
+                "count": part["overall"].count,
+                "partitions": sorted(k for k in self._parts if k != _GLOBAL),
+                **{
+                    metric: {
+                        "quantiles": {f"p{q}": dist.quantile(q) for q in _QUANTILES} if dist.count else {},
+                        "histogram": dist.histogram(),
+                    }
+                    for metric, dist in part.items()
+                },
+            }
@@ -0,0 +1,204 @@
+"""
+resume_profile.py — Single-pass structural analysis of resume text
+One walk over the lines of the extracted text produces a ResumeProfile:
+    sections           — heading-delimited spans with character offsets
+    sections_detected  — the per-section booleans used by the format score
+    bullets            — list-item lines (offsets + whether they carry a number)
+    quantified         — quantified-achievement hits ("40% faster", "5 years")
+    word / token count — whitespace words; lexical tokens (words + punctuation)
+    contact            — email, phone, LinkedIn, GitHub, other URLs
+
+The parser builds it once (it is cached with the parse result) and the scorer,
+format score and LLM prompt builder read from it instead of rescanning the text.
+Offsets index into the exact text passed to analyze().
+"""
+import re
+from dataclasses import asdict, dataclass, field
+from typing import Optional
+
+# Per-section signals (same vocabulary the format score has always used).
+# Substring matches anywhere in the text — e.g. "@" flags contact info.
+SECTION_SIGNALS = {
+    "contact": r"(email|phone|linkedin|github|portfolio|@)",
+    "summary": r"(summary|objective|profile|about me|professional summary)",
+    "experience": r"(experience|work history|employment|positions held)",
+    "education": r"(education|degree|university|college|bachelor|master|phd|bs|ms)",
+    "skills": r"(skills|technologies|tech stack|proficiencies|competencies)",
+    "projects": r"(projects|portfolio|open.?source)",
+    "certifications": r"(certif|credential|license|aws|gcp|azure)",
+    "achievements": r"(achievement|award|honor|recognition|publication)",
+}
+_SIGNAL_RES = {name: re.compile(p) for name, p in SECTION_SIGNALS.items()}
+# One combined pattern: a line is scanned once, and only the lines that hit
+# anything are checked against the individual signals
+_ANY_SIGNAL = re.compile("|".join(SECTION_SIGNALS.values()))
+
+# Heading vocabulary → section name (a heading is a short line made of one of these)
+_HEADINGS = {
+    "summary": ("summary", "professional summary", "profile", "professional profile", "objective",
+                "career objective", "about me", "about"),
+    "experience": ("experience", "work experience", "professional experience", "work history",
+                   "employment", "employment history", "career history", "internships", "internship"),
+    "education": ("education", "academic background", "academics", "qualifications"),
+    "skills": ("skills", "technical skills", "core skills", "key skills", "technologies",
+               "tech stack", "competencies", "core competencies", "proficiencies", "tools"),
+    "projects": ("projects", "personal projects", "academic projects", "key projects", "open source"),
+    "certifications": ("certifications", "certificates", "licenses", "licenses & certifications",
+                       "licenses and certifications", "courses"),
+    "achievements": ("achievements", "awards", "honors", "honors & awards", "awards & achievements",
+                     "accomplishments", "publications", "recognition"),
+}
+_HEADING_LOOKUP = {alias: name for name, aliases in _HEADINGS.items() for alias in aliases}
+_HEADING_STRIP = re.compile(r"^[#*_\s|]+|[#*_:\s|]+$")
+
+_BULLET_LINE = re.compile(r"^\s*(?:[-*•◦▪●■➢➤►▸‣⁃∙]|\d{1,2}[.)])\s+\S")
+_QUANT = re.compile(
+    r"\b\d+[\+%xX]?\s*(years?|months?|projects?|team|members?|%|users?|customers?|revenue|increase|decrease|improve)",
+    re.IGNORECASE,
+)
+_DIGIT = re.compile(r"\d")
+_TOKEN = re.compile(r"\w+|[^\w\s]")
+
+_EMAIL = re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+")
+_PHONE = re.compile(r"(?<![\w/])\+?\d[\d\s().-]{7,}\d(?!\w)")
+_LINKEDIN = re.compile(r"(?:https?://)?(?:[\w-]+\.)?linkedin\.com/[^\s)|,]+", re.IGNORECASE)
+_GITHUB = re.compile(r"(?:https?://)?(?:www\.)?github\.com/[^\s)|,]+", re.IGNORECASE)
+_URL = re.compile(r"(?:https?://|www\.)[^\s)|,]+", re.IGNORECASE)
+
+
+@dataclass
+class SectionSpan:
+    name: str
+    heading: str
+    start: int  # offset of the heading line
+    end: int    # offset where the next section starts (or len(text))
+
+
+@dataclass
+class BulletLine:
+    start: int
+    end: int
+    quantified: bool  # contains at least one digit
+
+
+@dataclass
+class QuantHit:
+    text: str
+    start: int
+    end: int
+
+
+@dataclass
+class ResumeProfile:
+    sections: list[SectionSpan] = field(default_factory=list)
+    sections_detected: dict[str, bool] = field(default_factory=dict)
+    bullets: list[BulletLine] = field(default_factory=list)
+    quantified: list[QuantHit] = field(default_factory=list)
+    word_count: int = 0
+    token_count: int = 0
+    contact: dict[str, Optional[str]] = field(default_factory=dict)
+
+    def section(self, name: str) -> Optional[SectionSpan]:
+        return next((s for s in self.sections if s.name == name), None)
+
+    def section_text(self, text: str, name: str) -> str:
+        """Text of the first section called `name` (empty if the resume has none)."""
+        span = self.section(name)
+        return text[span.start:span.end] if span else ""
+
+    def bullet_texts(self, text: str, quantified: Optional[bool] = None) -> list[str]:
+        return [
+            text[b.start:b.end].strip()
+            for b in self.bullets
+            if quantified is None or b.quantified == quantified
+        ]
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ResumeProfile":
+        return cls(
+            sections=[SectionSpan(**s) for s in data.get("sections", [])],
+            sections_detected=dict(data.get("sections_detected", {})),
+            bullets=[BulletLine(**b) for b in data.get("bullets", [])],
+            quantified=[QuantHit(**q) for q in data.get("quantified", [])],
+            word_count=data.get("word_count", 0),
+            token_count=data.get("token_count", 0),
+            contact=dict(data.get("contact", {})),
+        )
+
+
+def _heading(line: str) -> Optional[str]:
+    """Section name if the line is a section heading, else None."""
+    if len(line) > 60:
+        return None
+    label = _HEADING_STRIP.sub("", line).lower()
+    return _HEADING_LOOKUP.get(label)
+
+
+def _first(pattern: re.Pattern, text: str) -> Optional[str]:
+    m = pattern.search(text)
+    return m.group(0).strip() if m else None
+
+
+def analyze(text: str) -> ResumeProfile:
+    """Build the profile in one pass over the lines of `text`."""
+    profile = ResumeProfile(sections_detected={name: False for name in SECTION_SIGNALS})
+    detected = profile.sections_detected
+    current: Optional[SectionSpan] = None
+    offset = 0
+
+    for line in text.splitlines(keepends=True):
+        start, end = offset, offset + len(line.rstrip("\r\n"))
+        offset += len(line)
+        body = line.strip()
+        if not body:
+            continue
+
+        profile.word_count += len(body.split())
+        profile.token_count += len(_TOKEN.findall(body))
+
+        lower = body.lower()
+        if not all(detected.values()) and _ANY_SIGNAL.search(lower):
+            for name, signal in _SIGNAL_RES.items():
+                if not detected[name] and signal.search(lower):
+                    detected[name] = True
+
+        name = _heading(body)
+        if name is not None:
+            if current is not None:
+                current.end = start
+            elif start > 0:
+                # Everything above the first heading is the header / contact block
+                profile.sections.append(SectionSpan("contact", "", 0, start))
+            current = SectionSpan(name, body, start, len(text))
+            profile.sections.append(current)
+            continue
+
+        if _BULLET_LINE.match(line):
+            profile.bullets.append(BulletLine(start, end, bool(_DIGIT.search(body))))
+
+        # Matched on `body` itself: lower() can change the length ("İ" → 2 code
+        # points), which would shift every offset after it
+        body_start = start + len(line) - len(line.lstrip())
+        for m in _QUANT.finditer(body):
+            profile.quantified.append(
+                QuantHit(body[m.start():m.end()], body_start + m.start(), body_start + m.end())
+            )
+
+    if current is None and text.strip():
+        profile.sections.append(SectionSpan("contact", "", 0, len(text)))
+
+    profile.contact = {
+        "email": _first(_EMAIL, text),
+        "phone": _first(_PHONE, text),
+        "linkedin": _first(_LINKEDIN, text),
+        "github": _first(_GITHUB, text),
+        "website": next(
+            (u for u in (m.group(0) for m in _URL.finditer(text))
+             if "linkedin.com" not in u.lower() and "github.com" not in u.lower()),
+            None,
+        ),
+    }
+    return profile
@@ -1,18 +1,30 @@
 """
 scorer.py — Hybrid ATS scoring engine
 Weights: Semantic Match (60%) + Keyword Presence (25%) + Format/Structure (15%)
-Stores resume embeddings in ChromaDB for future percentile ranking.
+Stores resume embeddings in ChromaDB; their score metadata feeds the percentile index.
 """
 import os
-import re
-import uuid
-from typing import Any
+import threading
+from typing import Any, NamedTuple
+
+import numpy as np
 
 import chromadb
 from chromadb.config import Settings
 
-from embeddings import chunk_and_embed, cosine_sim, get_embedding
-from parser import detect_sections
+from centroids import ANY, CentroidStore, normalize_role
+from chroma_writer import WriteBehindWriter
+from embeddings import (
+    chunk_and_embed,
+    cosine_sim,
+    cosine_sims,
+    embed_document_with_queries,
+    get_embedding,
+    model_name,
+)
+from keyword_matcher import KeywordMatcher
+from percentiles import PercentileIndex
+from resume_profile import ResumeProfile, analyze
 
 # ---------------------------------------------------------------------------
 # ChromaDB setup — persists to disk in ./chroma_db
@@ -35,16 +47,112 @@ def _get_collection():
 
 
 # ---------------------------------------------------------------------------
-# Keyword extraction (regex + common tech patterns)
+# Write-behind buffer — embeddings are flushed to ChromaDB in batches
+# ---------------------------------------------------------------------------
+_writer: Optional[WriteBehindWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_writer() -> WriteBehindWriter:
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = WriteBehindWriter(
+                _get_collection,
+                max_queue=int(os.getenv("CHROMA_WRITE_MAX_QUEUE", "10000")),
+                batch_size=int(os.getenv("CHROMA_WRITE_BATCH_SIZE", "64")),
+                flush_interval_s=float(os.getenv("CHROMA_WRITE_FLUSH_S", "2")),
+                policy=os.getenv("CHROMA_WRITE_POLICY", "drop"),
+            )
+        return _writer
+
+
+def writer_stats() -> Optional[dict]:
+    return _writer.stats() if _writer is not None else None
+
+
+def shutdown_writer() -> None:
+    """
+    Flush queued embeddings to ChromaDB (called on app shutdown). The closed
+    writer stays in place, so a score still running on an abandoned stage
+    thread gets it from get_writer() and its submit is refused, instead of
+    lazily starting a new writer that is never flushed.
+    """
+    with _writer_lock:
+        if _writer is not None:
+            _writer.close()
+
+
+# ---------------------------------------------------------------------------
+# Percentile index — built from stored score metadata once, then updated
+# in-process as new scores arrive (no per-request scan of the collection)
+# ---------------------------------------------------------------------------
+_percentiles: Optional[PercentileIndex] = None
+_percentiles_lock = threading.Lock()
+
+
+def _iter_stored_metadata(page_size: int = 5000):
+    collection = _get_collection()
+    offset = 0
+    while True:
+        page = collection.get(include=["metadatas"], limit=page_size, offset=offset)
+        metadatas = page.get("metadatas") or []
+        yield from metadatas
+        if len(metadatas) < page_size:
+            return
+        offset += page_size
+
+
+def get_percentile_index() -> PercentileIndex:
+    global _percentiles
+    with _percentiles_lock:
+        if _percentiles is None:
+            index = PercentileIndex(
+                min_partition_size=int(os.getenv("PERCENTILE_MIN_PARTITION", "30"))
+            )
+            try:
+                loaded = index.load(_iter_stored_metadata())
+                print(f"[scorer] Percentile index built from {loaded} stored scores.")
+            except Exception as e:
+                print(f"[scorer] Could not read stored scores ({e}); percentiles start empty.")
+            _percentiles = index
+        return _percentiles
+
+
+def percentile_distribution(role: Optional[str] = None) -> dict:
+    return get_percentile_index().distribution(normalize_role(role) or None)
+
+
+# ---------------------------------------------------------------------------
+# Benchmark centroids — memory-mapped artifact from scripts/build_centroids.py
+# ---------------------------------------------------------------------------
+_CENTROIDS_PATH = os.getenv("CENTROIDS_PATH", "./artifacts/centroids")
+_centroids: Optional[CentroidStore] = None
+_centroids_loaded = False
+_centroids_lock = threading.Lock()
+
+
+def get_centroids() -> Optional[CentroidStore]:
+    """Centroid store, or None if the artifact has not been built."""
+    global _centroids, _centroids_loaded
+    with _centroids_lock:
+        if not _centroids_loaded:
+            _centroids = CentroidStore.load(_CENTROIDS_PATH, model_name())
+            _centroids_loaded = True
+        return _centroids
+
+
+# ---------------------------------------------------------------------------
+# Keyword extraction (single-pass compiled matcher over the skill taxonomy)
 # ---------------------------------------------------------------------------
 
 TECH_KEYWORDS = [
     # Languages
-    "python", "java", "javascript", "typescript", "c\\+\\+", "c#", "go", "rust",
+    "python", "java", "javascript", "typescript", "c++", "c#", "go", "rust",
     "ruby", "swift", "kotlin", "scala", "r", "matlab", "bash", "shell",
     # Web
-    "react", "next\\.js", "vue", "angular", "svelte", "node\\.js", "express",
-    "fastapi", "django", "flask", "spring boot", "asp\\.net",
+    "react", "next.js", "vue", "angular", "svelte", "node.js", "express",
+    "fastapi", "django", "flask", "spring boot", "asp.net",
     # Data / ML
     "tensorflow", "pytorch", "scikit-learn", "pandas", "numpy", "keras",
     "hugging face", "langchain", "llm", "machine learning", "deep learning",
@@ -57,25 +165,47 @@ TECH_KEYWORDS = [
     "firebase", "supabase",
     # Soft / General
     "agile", "scrum", "rest api", "graphql", "microservices", "system design",
-    "leadership", "communication", "problem.?solving",
+    "leadership", "communication", "problem solving",
 ]
 
 SOFT_SKILLS = [
-    "leadership", "communication", "teamwork", "collaboration", "problem.?solving",
+    "leadership", "communication", "teamwork", "collaboration", "problem solving",
     "critical thinking", "time management", "adaptability", "creativity", "mentoring",
 ]
 
+# Alternate surface forms that should count as the same skill
+KEYWORD_ALIASES = {
+    "problem solving": ["problem-solving", "problemsolving"],
+    "machine learning": ["machine-learning"],
+    "deep learning": ["deep-learning"],
+    "hugging face": ["huggingface", "hugging-face"],
+    "scikit-learn": ["scikit learn", "sklearn"],
+    "spring boot": ["spring-boot", "springboot"],
+    "rest api": ["rest apis", "restful api", "restful apis"],
+    "ci/cd": ["ci-cd", "ci / cd"],
+    "github actions": ["github-actions"],
+    "system design": ["system-design"],
+    "time management": ["time-management"],
+    "critical thinking": ["critical-thinking"],
+}
+
+
+def _build_matcher() -> KeywordMatcher:
+    taxonomy = {kw: KEYWORD_ALIASES.get(kw, []) for kw in TECH_KEYWORDS + SOFT_SKILLS}
+    # Optional extended taxonomy (thousands of skills + aliases) — same single-pass cost
+    taxonomy_path = os.getenv("SKILL_TAXONOMY_PATH", "")
+    if taxonomy_path and os.path.exists(taxonomy_path):
+        return KeywordMatcher.from_file(taxonomy_path, base=taxonomy)
+    return KeywordMatcher(taxonomy)
+
+
+# Compiled once at import; reused for every resume and JD
+_KEYWORD_MATCHER = _build_matcher()
+
 
 def _extract_keywords_from_text(text: str) -> set[str]:
-    """Extract tech keywords / skills from a block of text using regex."""
-    text_lower = text.lower()
-    found = set()
-    for kw in TECH_KEYWORDS + SOFT_SKILLS:
-        if re.search(r'\b' + kw + r'\b', text_lower):
-            # Normalize to clean label
-            clean = kw.replace("\\+\\+", "++").replace("\\.", ".").replace(".?", " ")
-            found.add(clean.strip())
-    return found
+    """Extract tech keywords / skills from a block of text in one regex pass."""
+    return _KEYWORD_MATCHER.labels(text)
 
 
 def _calculate_keyword_score(
@@ -100,12 +230,14 @@ def _calculate_keyword_score(
     return min(score, 1.0), sorted(matched), sorted(missing)[:10]
 
 
-def _calculate_format_score(sections: dict, resume_text: str) -> float:
+def _calculate_format_score(profile: ResumeProfile) -> float:
     """
     Score resume formatting and structure on 0-1 scale.
     Checks: essential sections present, bullet usage, length, contact info.
+    Reads everything from the precomputed profile — no rescanning of the text.
     """
     score = 0.0
+    sections = profile.sections_detected
 
     # Core sections (60 points)
     essential = ["contact", "experience", "education", "skills"]
@@ -120,23 +252,17 @@ def _calculate_format_score(sections: dict, resume_text: str) -> float:
             score += 0.05  # max 0.20
 
     # Bullet point usage (10 points)
-    bullet_count = len(re.findall(r'[•\-\*]\s+\w', resume_text))
-    if bullet_count >= 5:
+    if len(profile.bullets) >= 5:
         score += 0.10
 
     # Length check (10 points) — ideal 400-800 words
-    word_count = len(resume_text.split())
-    if 300 <= word_count <= 1000:
+    if 300 <= profile.word_count <= 1000:
         score += 0.10
 
     # Quantified achievements (15 points) — numbers in context
-    quant_matches = re.findall(
-        r'\b\d+[\+%xX]?\s*(years?|months?|projects?|team|members?|%|users?|customers?|revenue|increase|decrease|improve)',
-        resume_text.lower()
-    )
-    if len(quant_matches) >= 3:
+    if len(profile.quantified) >= 3:
         score += 0.15
-    elif len(quant_matches) >= 1:
+    elif len(profile.quantified) >= 1:
         score += 0.07
 
     return min(score, 1.0)
@@ -146,84 +272,254 @@ def _calculate_format_score(sections: dict, resume_text: str) -> float:
 # Main scoring function
 # ---------------------------------------------------------------------------
 
-def score_resume(
-    resume_text: str, job_description: str = ""
-) -> dict[str, Any]:
-    """
-    Full hybrid ATS scoring pipeline.
-    Returns structured scoring dict with overall score, breakdown, and keywords.
-    """
+# Generic "strong resume" reference used when no JD is supplied.
+# Constant text, so its embedding is served from the embedding cache after the first call.
+STRONG_RESUME_REF = (
+    "Experienced professional with proven track record of achievements. "
+    "Led cross-functional teams, delivered measurable results. "
+    "Skilled in modern technologies, agile methodologies. "
+    "Strong communication, leadership, and problem-solving abilities. "
+    "Multiple quantified accomplishments in previous roles."
+)
 
-    # --- 1. Semantic Score (60% weight) ---
-    resume_emb = chunk_and_embed(resume_text)
 
-    if job_description.strip():
-        jd_emb = get_embedding(job_description)
-        semantic_score = cosine_sim(resume_emb, jd_emb)
-    else:
-        # No JD — score resume quality against a generic "strong resume" reference
-        STRONG_RESUME_REF = (
-            "Experienced professional with proven track record of achievements. "
-            "Led cross-functional teams, delivered measurable results. "
-            "Skilled in modern technologies, agile methodologies. "
-            "Strong communication, leadership, and problem-solving abilities. "
-            "Multiple quantified accomplishments in previous roles."
-        )
-        ref_emb = get_embedding(STRONG_RESUME_REF)
-        semantic_score = cosine_sim(resume_emb, ref_emb)
-        # Boost slightly since there's no JD mismatch penalty
-        semantic_score = min(semantic_score * 1.15, 1.0)
+WEIGHTS = {"semantic": 0.60, "keyword": 0.25, "format": 0.15}
+# Generic reference only: there is no JD mismatch penalty to offset
+GENERIC_BOOST = 1.15
 
-    # --- 2. Keyword Score (25% weight) ---
-    resume_keywords = _extract_keywords_from_text(resume_text)
-    jd_keywords = _extract_keywords_from_text(job_description) if job_description else set()
 
-    keyword_score, matched_keywords, missing_keywords = _calculate_keyword_score(
-        resume_keywords, jd_keywords
-    )
+def _blank_jd_target(role: Optional[str], seniority: Optional[str]) -> tuple[Optional[np.ndarray], dict]:
+    """
+    What a resume with no JD is compared against, as (centroid, reference).
+    centroid is None when no centroid artifact is loaded: callers then use
+    STRONG_RESUME_REF with GENERIC_BOOST.
+    """
+    centroids = get_centroids()
+    if centroids is None:
+        return None, {"type": "generic"}
+    centroid, entry = centroids.lookup(role, seniority)
+    return centroid, {
+        "type": "centroid",
+        "role": entry["role"],
+        "seniority": entry["seniority"],
+        "benchmarks": entry["count"],
+    }
+
+
+def _to_pct(v: float) -> int:
+    """Scale a 0-1 subscore to a 0-100 integer."""
+    return round(v * 100)
 
-    # --- 3. Format/Structure Score (15% weight) ---
-    sections = detect_sections(resume_text)
-    format_score = _calculate_format_score(sections, resume_text)
 
-    # --- 4. Composite Score ---
-    WEIGHTS = {"semantic": 0.60, "keyword": 0.25, "format": 0.15}
+def _composite_score(semantic_score: float, keyword_score: float, format_score: float) -> int:
     composite = (
         semantic_score * WEIGHTS["semantic"]
         + keyword_score * WEIGHTS["keyword"]
         + format_score * WEIGHTS["format"]
     )
-
-    # Scale to 0-100 integer
-    def to_pct(v: float) -> int:
-        return round(v * 100)
-
-    overall = to_pct(composite)
     # Apply a floor of 20 and ceiling of 98 for realism
-    overall = max(20, min(98, overall))
-
-    # --- 5. Store embedding in ChromaDB ---
-    try:
-        collection = _get_collection()
-        doc_id = str(uuid.uuid4())
-        collection.add(
-            embeddings=[resume_emb.tolist()],
-            documents=[resume_text[:500]],  # Store excerpt
-            ids=[doc_id],
-            metadatas=[{"score": overall, "semantic": to_pct(semantic_score)}],
-        )
-    except Exception:
-        pass  # ChromaDB failure is non-fatal
+    return max(20, min(98, _to_pct(composite)))
 
+
+def _build_result(
+    semantic_score: float,
+    resume_keywords: set[str],
+    jd_keywords: set[str],
+    profile: ResumeProfile,
+    format_score: float,
+) -> dict[str, Any]:
+    """Keyword scoring + composite for one (resume, JD) pair."""
+    keyword_score, matched_keywords, missing_keywords = _calculate_keyword_score(
+        resume_keywords, jd_keywords
+    )
     return {
-        "overall_score": overall,
+        "overall_score": _composite_score(semantic_score, keyword_score, format_score),
         "breakdown": {
-            "semantic": to_pct(semantic_score),
-            "keyword": to_pct(keyword_score),
-            "format": to_pct(format_score),
+            "semantic": _to_pct(semantic_score),
+            "keyword": _to_pct(keyword_score),
+            "format": _to_pct(format_score),
         },
         "matched_keywords": matched_keywords[:15],
         "missing_keywords": missing_keywords[:10],
-        "sections_detected": sections,
-        "word_count": len(resume_text.split()),
+        "sections_detected": profile.sections_detected,
+        "word_count": profile.word_count,
     }
+
+
+def score_resume(
+    resume_text: str,
+    job_description: str = "",
+    role: Optional[str] = None,
+    seniority: Optional[str] = None,
+    profile: Optional[ResumeProfile] = None,
+) -> dict[str, Any]:
+    """
+    Full hybrid ATS scoring pipeline.
+    Returns structured scoring dict with overall score, breakdown, and keywords.
+    role / seniority are optional hints used when no JD is given, to pick the
+    benchmark centroid the resume is compared against.
+    profile is the parser's structural analysis of resume_text (built here if omitted).
+    """
+
+    # --- 1. Semantic Score (60% weight) ---
+    has_jd = bool(job_description.strip())
+    centroid, reference = (None, {"type": "job_description"}) if has_jd else _blank_jd_target(role, seniority)
+    if has_jd:
+        # Resume chunks + JD go to the model in a single batched encode call
+        resume_emb, target_embs = embed_document_with_queries(resume_text, [job_description])
+        semantic_score = cosine_sim(resume_emb, target_embs[0])
+    elif centroid is not None:
+        # No JD — compare against the precomputed benchmark centroid for the
+        # role/seniority: no extra encode call, just one dot product
+        resume_emb = chunk_and_embed(resume_text)
+        semantic_score = cosine_sim(resume_emb, centroid)
+    else:
+        # No JD and no centroid artifact — generic "strong resume" reference
+        resume_emb, target_embs = embed_document_with_queries(resume_text, [STRONG_RESUME_REF])
+        semantic_score = min(cosine_sim(resume_emb, target_embs[0]) * GENERIC_BOOST, 1.0)
+
+    if reference.get("role", ANY) != ANY:
+        role_key = reference["role"]
+    else:
+        role_key = normalize_role(role) or None
+
+    # --- 2-4. Keyword (25%), Format/Structure (15%) and composite ---
+    if profile is None:
+        profile = analyze(resume_text)
+    result = _build_result(
+        semantic_score,
+        _extract_keywords_from_text(resume_text),
+        _extract_keywords_from_text(job_description) if has_jd else set(),
+        profile,
+        _calculate_format_score(profile),
+    )
+
+    # --- 5. Percentile rank against previously scored resumes, then record this one ---
+    scores = {"overall": result["overall_score"], "semantic": result["breakdown"]["semantic"]}
+    index = get_percentile_index()
+    result["percentile"] = index.rank(scores, role_key)
+    index.add(scores, role_key)
+    result["reference"] = reference
+
+    # --- 6. Queue embedding for ChromaDB (written in batches off the request path) ---
+    get_writer().submit(
+        embedding=resume_emb.tolist(),
+        document=resume_text[:500],  # Store excerpt
+        metadata={
+            "score": result["overall_score"],
+            "semantic": _to_pct(semantic_score),
+            **({"role": role_key} if role_key else {}),
+        },
+    )
+
+    return result
+
+
+def score_resume_many(
+    resume_text: str,
+    jds: list[str],
+    profile: Optional[ResumeProfile] = None,
+    role: Optional[str] = None,
+    seniority: Optional[str] = None,
+) -> list[dict[str, Any]]:
+    """
+    Score one resume against many job descriptions.
+    The resume is embedded and analysed once, its chunks and all JDs go through
+    one batched encode call, and every semantic score comes from one
+    matrix-vector product.
+    Blank JDs are scored exactly like score_resume with no JD (role/seniority
+    centroid, else the boosted generic reference).
+    Returns results ranked best-first; each keeps its input position as `index`.
+    Embeddings are not stored in ChromaDB (that happens once per /analyze).
+    """
+    blank = [not jd.strip() for jd in jds]
+    centroid, blank_reference = _blank_jd_target(role, seniority) if any(blank) else (None, {})
+    real = [jd for jd, b in zip(jds, blank) if not b]
+    # The generic reference is encoded once, however many JDs are blank
+    generic = any(blank) and centroid is None
+    targets = real + [STRONG_RESUME_REF] if generic else real
+    if targets:
+        # Resume chunks + every JD in one batched encode call
+        resume_emb, jd_matrix = embed_document_with_queries(resume_text, targets)
+        sims = cosine_sims(jd_matrix, resume_emb)
+    else:
+        resume_emb, sims = chunk_and_embed(resume_text), np.empty(0)
+    if centroid is not None:
+        blank_sim = cosine_sim(resume_emb, centroid)
+    else:
+        blank_sim = float(sims[-1]) if generic else 0.0
+    real_sims = iter(sims[: len(real)])
+    similarities = [blank_sim if b else float(next(real_sims)) for b in blank]
+
+    resume_keywords = _extract_keywords_from_text(resume_text)
+    if profile is None:
+        profile = analyze(resume_text)
+    format_score = _calculate_format_score(profile)
+
+    results = []
+    for i, jd in enumerate(jds):
+        semantic_score = float(similarities[i])
+        if blank[i] and centroid is None:
+            semantic_score = min(semantic_score * GENERIC_BOOST, 1.0)
+        result = _build_result(
+            semantic_score, resume_keywords, _extract_keywords_from_text(jd), profile, format_score
+        )
+        result["index"] = i
+        result["reference"] = blank_reference if blank[i] else {"type": "job_description"}
+        results.append(result)
+
+    results.sort(key=lambda r: r["overall_score"], reverse=True)
+    for rank, result in enumerate(results, start=1):
+        result["rank"] = rank
+    return results
+
+
+# ---------------------------------------------------------------------------
+# Bulk scoring against one JD (/analyze/batch) — the JD is embedded and its
+# keywords extracted once, then every resume only needs its own embedding
+# ---------------------------------------------------------------------------
+
+class JobTarget(NamedTuple):
+    text: str
+    embedding: np.ndarray
+    keywords: set[str]
+    reference: dict
+
+
+def prepare_job(job_description: str, role: Optional[str] = None, seniority: Optional[str] = None) -> JobTarget:
+    """
+    Embed the JD and extract its keywords once. A blank JD targets the same
+    reference score_resume uses: the role/seniority centroid, else the
+    generic reference.
+    """
+    if job_description.strip():
+        return JobTarget(
+            job_description, get_embedding(job_description), _extract_keywords_from_text(job_description),
+            {"type": "job_description"},
+        )
+    centroid, reference = _blank_jd_target(role, seniority)
+    embedding = centroid if centroid is not None else get_embedding(STRONG_RESUME_REF)
+    return JobTarget("", embedding, set(), reference)
+
+
+def score_against_job(
+    resume_text: str, resume_emb: np.ndarray, job: JobTarget, profile: Optional[ResumeProfile] = None
+) -> dict[str, Any]:
+    """
+    Score an already-embedded resume against a prepared JD (same formula as
+    score_resume). Nothing is stored in ChromaDB or the percentile index.
+    """
+    semantic_score = cosine_sim(resume_emb, job.embedding)
+    if job.reference["type"] == "generic":
+        semantic_score = min(semantic_score * GENERIC_BOOST, 1.0)
+    if profile is None:
+        profile = analyze(resume_text)
+    result = _build_result(
+        semantic_score,
+        _extract_keywords_from_text(resume_text),
+        job.keywords,
+        profile,
+        _calculate_format_score(profile),
+    )
+    result["reference"] = job.reference
+    return result
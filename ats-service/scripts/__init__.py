@@ -0,0 +1 @@
+# scripts package
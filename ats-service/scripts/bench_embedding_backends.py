@@ -0,0 +1,252 @@
+"""
+scripts/bench_embedding_backends.py — Parity check + benchmark for embedding backends
+Runs the fixed resume/JD corpus below through every EMBED_BACKEND
+(torch, onnx, onnx-int8), each in its own subprocess so RSS is measured per
+backend, then:
+  - checks cosine agreement of every embedding against the torch baseline
+  - checks overall_score stays within ±1 point of the torch baseline
+  - reports model load time, per-call latency (p50 / p95) and peak RSS
+    (RSS needs the resource module or psutil; shown as n/a otherwise)
+
+Exits non-zero if any parity check fails, so it can gate a backend switch.
+
+Usage:
+    cd ats-service
+    python scripts/bench_embedding_backends.py
+    python scripts/bench_embedding_backends.py --backends torch onnx-int8 --repeats 20
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Optional
+
+try:
+    import resource  # Unix only
+except ImportError:
+    resource = None
+
+ATS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ATS_DIR)
+
+# Minimum cosine(torch, backend) per embedding; int8 loses a little precision
+MIN_COSINE = {"onnx": 0.999, "onnx-int8": 0.98}
+MAX_SCORE_DELTA = 1
+
+# ---------------------------------------------------------------------------
+# Fixed parity corpus
+# ---------------------------------------------------------------------------
+
+RESUMES = [
+    """Priya Sharma | priya.sharma@email.com | +91 98765 43210 | linkedin.com/in/priyasharma
+SUMMARY
+Backend engineer with 4 years of experience building Python microservices and data pipelines.
+EXPERIENCE
+Software Engineer, Flipkart (2021 - Present)
+- Built FastAPI services handling 12,000 requests per second with p99 under 80 ms
+- Migrated 30 cron jobs to Airflow, reducing failed runs by 45%
+- Led a team of 3 engineers to ship a Redis-backed rate limiter used by 40 services
+Junior Developer, Infosys (2019 - 2021)
+- Wrote Django REST APIs for an internal HR portal used by 5,000 employees
+- Added PostgreSQL indexes that cut report generation time from 9 minutes to 40 seconds
+EDUCATION
+B.Tech Computer Science, NIT Trichy, 2019
+SKILLS
+Python, FastAPI, Django, PostgreSQL, Redis, Docker, Kubernetes, AWS, CI/CD, Agile""",
+    """Rahul Verma | rahul.v@email.com | github.com/rahulv
+PROFESSIONAL SUMMARY
+Data analyst turning messy business data into dashboards and forecasts.
+WORK HISTORY
+Data Analyst, Swiggy (2022 - Present)
+- Designed Tableau dashboards tracking delivery SLAs across 500 cities
+- Built a demand forecasting model in Python (pandas, scikit-learn) improving accuracy by 18%
+- Automated weekly reporting with SQL and saved 10 analyst hours per week
+Analytics Intern, Zomato (2021)
+- Cleaned and joined 20 million order records for a churn analysis
+EDUCATION
+B.Sc Statistics, Delhi University, 2021
+SKILLS
+SQL, Python, pandas, numpy, scikit-learn, Tableau, Excel, communication, problem solving""",
+    """Anita Desai | anita.desai@email.com
+OBJECTIVE
+Product manager focused on growth and experimentation for consumer apps.
+EXPERIENCE
+Product Manager, Razorpay (2020 - Present)
+- Owned onboarding funnel; ran 25 A/B tests that lifted activation by 12%
+- Partnered with design and engineering to launch a payments link feature used by 200k merchants
+- Defined quarterly OKRs and roadmap for a squad of 9
+Associate Product Manager, Paytm (2018 - 2020)
+- Launched a referral program that acquired 1.2 million users in 6 months
+EDUCATION
+MBA, IIM Bangalore, 2018
+SKILLS
+Product strategy, A/B testing, SQL, Jira, stakeholder management, leadership, agile, scrum""",
+]
+
+JOB_DESCRIPTIONS = [
+    "We are hiring a backend engineer with strong Python, FastAPI and PostgreSQL experience. "
+    "You will design microservices, work with Docker and Kubernetes on AWS, and own CI/CD pipelines.",
+    "Looking for a data analyst skilled in SQL, Python (pandas) and Tableau to build dashboards, "
+    "forecast demand and communicate insights to business stakeholders.",
+    "Seeking a product manager to drive growth experiments, define roadmaps and OKRs, and lead "
+    "cross-functional agile teams shipping consumer payment features.",
+    "",  # no-JD path: scored against the strong-resume reference
+]
+
+
+def _cases() -> list[tuple[int, int]]:
+    return [(r, j) for r in range(len(RESUMES)) for j in range(len(JOB_DESCRIPTIONS))]
+
+
+# ---------------------------------------------------------------------------
+# Worker — runs inside a subprocess with EMBED_BACKEND already set
+# ---------------------------------------------------------------------------
+
+def _percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+def _peak_rss_mb() -> Optional[float]:
+    if resource is not None:
+        # ru_maxrss is KiB on Linux
+        return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    try:
+        import psutil
+    except ImportError:
+        return None
+    info = psutil.Process().memory_info()
+    # peak_wset is the Windows peak working set
+    return round(getattr(info, "peak_wset", info.rss) / (1024 * 1024), 1)
+
+
+def _corpus_texts() -> list[str]:
+    return RESUMES + [jd for jd in JOB_DESCRIPTIONS if jd]
+
+
+def embed_corpus() -> list[list[float]]:
+    import embeddings
+
+    return [embeddings.chunk_and_embed(t).tolist() for t in _corpus_texts()]
+
+
+def run_worker(repeats: int) -> dict:
+    import embeddings
+    import scorer
+
+    t0 = time.perf_counter()
+    embeddings.get_model()
+    load_s = time.perf_counter() - t0
+
+    texts = _corpus_texts()
+    vectors = embed_corpus()
+
+    # Cache is disabled by the parent (EMBED_CACHE_MAX_BYTES=0), so every call encodes
+    latencies_ms = []
+    for _ in range(repeats):
+        for t in texts:
+            t1 = time.perf_counter()
+            embeddings.chunk_and_embed(t)
+            latencies_ms.append((time.perf_counter() - t1) * 1000)
+
+    scores = [
+        scorer.score_resume(RESUMES[r], JOB_DESCRIPTIONS[j])["overall_score"] for r, j in _cases()
+    ]
+
+    return {
+        "backend": embeddings.backend_name(),
+        "load_s": round(load_s, 3),
+        "p50_ms": round(statistics.median(latencies_ms), 2),
+        "p95_ms": round(_percentile(latencies_ms, 95), 2),
+        "peak_rss_mb": _peak_rss_mb(),
+        "vectors": vectors,
+        "scores": scores,
+    }
+
+
+# ---------------------------------------------------------------------------
+# Parent — spawns one worker per backend and compares against torch
+# ---------------------------------------------------------------------------
+
+def _run(backend: str, args: list[str], **env) -> object:
+    env = dict(
+        os.environ,
+        EMBED_BACKEND=backend,
+        EMBED_CACHE_MAX_BYTES="0",
+        EMBED_CACHE_PATH="",
+        EMBED_BATCH_WINDOW_MS="0",
+        **env,
+    )
+    proc = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--worker", *args],
+        cwd=ATS_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        sys.stderr.write(proc.stdout + proc.stderr)
+        raise SystemExit(f"❌ {backend} worker failed (exit {proc.returncode})")
+    # The worker prints the JSON result as its last line
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def run_backend(backend: str, repeats: int, chroma_dir: str, **env) -> dict:
+    """Worker result for one backend: vectors, scores, load time, latency, RSS."""
+    return _run(backend, ["--repeats", str(repeats)], CHROMA_DB_PATH=os.path.join(chroma_dir, backend), **env)
+
+
+def cosine(a: list[float], b: list[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    na = sum(x * x for x in a) ** 0.5
+    nb = sum(y * y for y in b) ** 0.5
+    return dot / (na * nb) if na and nb else 0.0
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--backends", nargs="+", default=["torch", "onnx", "onnx-int8"])
+    ap.add_argument("--repeats", type=int, default=10)
+    ap.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_worker(args.repeats)))
+        return 0
+
+    backends = ["torch"] + [b for b in args.backends if b != "torch"]
+    results = {}
+    with tempfile.TemporaryDirectory() as chroma_dir:
+        for backend in backends:
+            print(f"🔄 Running {backend}…")
+            results[backend] = run_backend(backend, args.repeats, chroma_dir)
+
+    print(f"\n{'backend':<10} {'load s':>8} {'p50 ms':>8} {'p95 ms':>8} {'RSS MB':>8} {'min cos':>8} {'max Δscore':>10}")
+    baseline = results["torch"]
+    failed = False
+    for backend in backends:
+        res = results[backend]
+        min_cos = min(cosine(a, b) for a, b in zip(baseline["vectors"], res["vectors"]))
+        max_delta = max(abs(a - b) for a, b in zip(baseline["scores"], res["scores"]))
+        rss = res["peak_rss_mb"] if res["peak_rss_mb"] is not None else "n/a"
+        ok = backend == "torch" or (min_cos >= MIN_COSINE[backend] and max_delta <= MAX_SCORE_DELTA)
+        failed |= not ok
+        print(
+            f"{backend:<10} {res['load_s']:>8} {res['p50_ms']:>8} {res['p95_ms']:>8} "
+            f"{rss:>8} {min_cos:>8.4f} {max_delta:>10}  {'✅' if ok else '❌'}"
+        )
+
+    if failed:
+        print(f"\n❌ Parity failed (need cosine >= {MIN_COSINE} and |Δ overall_score| <= {MAX_SCORE_DELTA})")
+        return 1
+    print("\n✅ All backends within parity thresholds")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,135 @@
+"""
+scripts/bench_parsers.py — Latency + agreement benchmark for the PDF extraction tiers
+Runs every PDF in the corpus through both tiers of parser.py:
+    fast    — PyMuPDF text layer (fast_pdf.extract)
+    docling — full Docling pipeline (parser.extract_text)
+and reports per-document latency, whether the fast path passed its quality
+check (or why it escalated), and how close the fast text is to Docling's:
+    sim      — difflib ratio over the word sequence (reading order matters)
+    jaccard  — word-set overlap (order-insensitive)
+    sections — detect_sections agreement (what the format score sees)
+
+Usage:
+    cd ats-service
+    python scripts/bench_parsers.py                      # PDFs in the repo root
+    python scripts/bench_parsers.py path/to/pdfs --repeats 5
+"""
+import argparse
+import difflib
+import glob
+import os
+import re
+import statistics
+import sys
+import time
+
+ATS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ATS_DIR)
+
+# Benchmark the extractors themselves, never the parse cache
+os.environ["PARSE_CACHE_PATH"] = ""
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+import fast_pdf
+from parser import _clean_text, detect_sections, extract_text
+
+DEFAULT_CORPUS = os.path.dirname(ATS_DIR)
+
+
+def _words(text: str) -> list[str]:
+    return re.findall(r"\w+", text.lower())
+
+
+def _similarity(a: str, b: str) -> tuple[float, float]:
+    wa, wb = _words(a), _words(b)
+    sim = difflib.SequenceMatcher(None, wa, wb, autojunk=False).ratio()
+    sa, sb = set(wa), set(wb)
+    jaccard = len(sa & sb) / len(sa | sb) if sa | sb else 1.0
+    return sim, jaccard
+
+
+def _timed(fn, pdf_bytes: bytes, repeats: int):
+    result, times_ms = None, []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        result = fn(pdf_bytes)
+        times_ms.append((time.perf_counter() - t0) * 1000)
+    return result, statistics.median(times_ms)
+
+
+def _collect(paths: list[str]) -> list[str]:
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(glob.glob(os.path.join(path, "**", "*.pdf"), recursive=True)))
+        elif path.lower().endswith(".pdf"):
+            files.append(path)
+    return files
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("paths", nargs="*", default=[DEFAULT_CORPUS], help="PDF files or directories")
+    ap.add_argument("--repeats", type=int, default=3, help="runs per tier per PDF (median is reported)")
+    args = ap.parse_args()
+
+    files = _collect(args.paths)
+    if not files:
+        print(f"❌ No PDFs found in {args.paths}")
+        return 1
+
+    print(f"📂 {len(files)} PDFs, {args.repeats} repeats per tier\n")
+    print(f"{'file':<32} {'fast ms':>8} {'docl ms':>9} {'speedup':>8} {'sim':>6} {'jacc':>6} {'sect':>5}  fast check")
+
+    rows = []
+    for path in files:
+        with open(path, "rb") as f:
+            pdf_bytes = f.read()
+        try:
+            fast, fast_ms = _timed(fast_pdf.extract, pdf_bytes, args.repeats)
+            docling_text, docling_ms = _timed(extract_text, pdf_bytes, args.repeats)
+        except Exception as e:
+            print(f"{os.path.basename(path)[:32]:<32} ❌ {e}")
+            continue
+
+        fast_text = _clean_text(fast.text)
+        sim, jaccard = _similarity(fast_text, docling_text)
+        fast_sections, docling_sections = detect_sections(fast_text), detect_sections(docling_text)
+        sections_agree = sum(fast_sections[k] == docling_sections[k] for k in docling_sections)
+        rows.append({
+            "fast_ms": fast_ms, "docling_ms": docling_ms, "sim": sim, "jaccard": jaccard,
+            "accepted": fast.reason is None,
+        })
+        print(
+            f"{os.path.basename(path)[:32]:<32} {fast_ms:>8.1f} {docling_ms:>9.1f} "
+            f"{docling_ms / max(fast_ms, 1e-3):>7.0f}x {sim:>6.3f} {jaccard:>6.3f} "
+            f"{sections_agree:>2}/{len(docling_sections)}  {fast.reason or '✅ pass'} {fast.quality}"
+        )
+
+    if not rows:
+        return 1
+
+    accepted = [r for r in rows if r["accepted"]]
+    escalated = [r for r in rows if not r["accepted"]]
+    # Expected latency under PARSE_TIER=auto: fast for accepted docs, fast + docling otherwise
+    auto_ms = [r["fast_ms"] if r["accepted"] else r["fast_ms"] + r["docling_ms"] for r in rows]
+
+    print("\nSummary")
+    print(f"  fast path accepted     : {len(accepted)}/{len(rows)}")
+    print(f"  median latency  fast   : {statistics.median(r['fast_ms'] for r in rows):.1f} ms")
+    print(f"  median latency  docling: {statistics.median(r['docling_ms'] for r in rows):.1f} ms")
+    print(f"  median latency  auto   : {statistics.median(auto_ms):.1f} ms")
+    if accepted:
+        print(f"  similarity (accepted)  : sim {statistics.mean(r['sim'] for r in accepted):.3f}"
+              f"  jaccard {statistics.mean(r['jaccard'] for r in accepted):.3f}")
+    if escalated:
+        print(f"  similarity (escalated) : sim {statistics.mean(r['sim'] for r in escalated):.3f}"
+              f"  jaccard {statistics.mean(r['jaccard'] for r in escalated):.3f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
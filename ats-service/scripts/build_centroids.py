@@ -0,0 +1,99 @@
+"""
+scripts/build_centroids.py — Offline build of per-role / per-seniority centroids
+Embeds every rag-service benchmark resume with the ATS embedding pipeline
+(same chunking + model as /analyze), averages them per (role, seniority),
+per role and globally, L2-normalizes each mean and writes the artifact that
+centroids.py memory-maps at startup.
+
+Re-run whenever the benchmark set changes.
+
+Usage:
+    cd ats-service
+    python scripts/build_centroids.py
+    python scripts/build_centroids.py --data ../rag-service/data/benchmark_resumes.json --out ./artifacts/centroids
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import defaultdict
+
+import numpy as np
+
+ATS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ATS_DIR)
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from centroids import ANY, normalize_role, normalize_seniority
+from embeddings import chunk_and_embed, model_name
+
+DEFAULT_DATA = os.path.join(os.path.dirname(ATS_DIR), "rag-service", "data", "benchmark_resumes.json")
+
+
+def _load_resumes(path: str) -> list[dict]:
+    with open(path, encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            return [json.loads(line) for line in f if line.strip()]
+        return json.load(f)
+
+
+def _normalized_mean(vectors: list[np.ndarray]) -> np.ndarray:
+    mean = np.mean(vectors, axis=0)
+    norm = np.linalg.norm(mean)
+    return (mean / norm if norm > 0 else mean).astype(np.float32)
+
+
+def build(data_path: str, out_prefix: str) -> None:
+    if not os.path.exists(data_path):
+        print(f"❌ File not found: {data_path}")
+        print("   Run rag-service/scripts/generate_benchmarks.py first.")
+        sys.exit(1)
+
+    resumes = _load_resumes(data_path)
+    print(f"📂 Loaded {len(resumes)} benchmark resumes from {data_path}")
+
+    groups: dict[tuple[str, str], list[np.ndarray]] = defaultdict(list)
+    started = time.perf_counter()
+    for i, r in enumerate(resumes, 1):
+        text = r.get("full_text", "")
+        if not text.strip():
+            continue
+        vec = chunk_and_embed(text)
+        role = normalize_role(r.get("role")) or ANY
+        seniority = normalize_seniority(r.get("seniority")) or ANY
+        for key in {(role, seniority), (role, ANY), (ANY, ANY)}:
+            groups[key].append(vec)
+        if i % 50 == 0:
+            print(f"  🔄 {i}/{len(resumes)} embedded")
+
+    if (ANY, ANY) not in groups:
+        print("❌ No resumes with full_text found — nothing to build.")
+        sys.exit(1)
+
+    keys = sorted(groups)
+    matrix = np.vstack([_normalized_mean(groups[k]) for k in keys])
+    entries = [
+        {"role": role, "seniority": seniority, "count": len(groups[(role, seniority)]), "row": row}
+        for row, (role, seniority) in enumerate(keys)
+    ]
+
+    os.makedirs(os.path.dirname(os.path.abspath(out_prefix)), exist_ok=True)
+    np.save(f"{out_prefix}.npy", matrix)
+    with open(f"{out_prefix}.json", "w", encoding="utf-8") as f:
+        json.dump({"model": model_name(), "dim": int(matrix.shape[1]), "entries": entries}, f, indent=2)
+
+    print(f"\n🎉 Wrote {len(entries)} centroids ({matrix.shape[1]}-dim) to {out_prefix}.npy/.json "
+          f"in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Build per-role/seniority centroid embeddings.")
+    ap.add_argument("--data", default=DEFAULT_DATA, help="benchmark_resumes.json (or .jsonl)")
+    ap.add_argument("--out", default=os.getenv("CENTROIDS_PATH", "./artifacts/centroids"),
+                    help="output path prefix (.npy and .json are appended)")
+    args = ap.parse_args()
+    build(args.data, args.out)
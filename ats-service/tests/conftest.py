@@ -0,0 +1,5 @@
+import os
+import sys
+
+# ats-service modules are imported flat (uvicorn runs from this directory)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
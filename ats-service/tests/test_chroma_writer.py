@@ -0,0 +1,30 @@
+from chroma_writer import WriteBehindWriter
+
+
+class _Collection:
+    def __init__(self):
+        self.ids = []
+
+    def add(self, ids, embeddings, documents, metadatas):
+        self.ids.extend(ids)
+
+
+def test_close_flushes_queued_records():
+    collection = _Collection()
+    writer = WriteBehindWriter(lambda: collection, batch_size=64, flush_interval_s=60)
+    for i in range(3):
+        assert writer.submit([0.0], f"doc {i}", {})
+
+    writer.close()
+    assert len(collection.ids) == 3
+    assert writer.stats()["flushed"] == 3
+
+
+def test_submit_after_close_is_refused():
+    collection = _Collection()
+    writer = WriteBehindWriter(lambda: collection, flush_interval_s=60)
+    writer.close()
+
+    assert not writer.submit([0.0], "late", {})
+    assert writer.stats()["dropped"] == 1
+    assert writer.stats()["pending"] == 0
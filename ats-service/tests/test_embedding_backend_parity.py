@@ -0,0 +1,48 @@
+"""
+ONNX / int8 must pass the same parity gate as scripts/bench_embedding_backends.py:
+cosine agreement with torch per embedding, and overall_score within
+MAX_SCORE_DELTA. Each backend runs in its own subprocess (EMBED_BACKEND is read
+at import). Skipped unless sentence-transformers, optimum, chromadb and a cached
+copy of the model are available; the subprocesses run with HF_HUB_OFFLINE=1 so
+the test never downloads.
+"""
+import pytest
+
+from scripts.bench_embedding_backends import MAX_SCORE_DELTA, MIN_COSINE, cosine, run_backend
+
+pytest.importorskip("sentence_transformers")
+pytest.importorskip("optimum.onnxruntime")
+pytest.importorskip("chromadb")
+huggingface_hub = pytest.importorskip("huggingface_hub")
+
+_MODEL_NAME = "BAAI/bge-small-en-v1.5"
+if not isinstance(huggingface_hub.try_to_load_from_cache(_MODEL_NAME, "config.json"), str):
+    pytest.skip(f"{_MODEL_NAME} is not in the local Hugging Face cache", allow_module_level=True)
+
+
+@pytest.fixture(scope="module")
+def workdir(tmp_path_factory):
+    return tmp_path_factory.mktemp("parity")
+
+
+def _run(backend, workdir):
+    return run_backend(
+        backend, 1, str(workdir / "chroma"),
+        HF_HUB_OFFLINE="1", EMBED_ONNX_DIR=str(workdir / "onnx"), PARSE_CACHE_PATH="", FEEDBACK_CACHE_PATH="",
+    )
+
+
+@pytest.fixture(scope="module")
+def torch_result(workdir):
+    return _run("torch", workdir)
+
+
+@pytest.mark.parametrize("backend", ["onnx", "onnx-int8"])
+def test_backend_matches_torch(backend, torch_result, workdir):
+    result = _run(backend, workdir)
+
+    assert len(result["vectors"]) == len(torch_result["vectors"])
+    for a, b in zip(torch_result["vectors"], result["vectors"]):
+        assert cosine(a, b) >= MIN_COSINE[backend]
+    for a, b in zip(torch_result["scores"], result["scores"]):
+        assert abs(a - b) <= MAX_SCORE_DELTA
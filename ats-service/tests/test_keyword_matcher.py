@@ -0,0 +1,24 @@
+from keyword_matcher import KeywordMatcher
+
+
+def _matcher() -> KeywordMatcher:
+    return KeywordMatcher({"linux": [], "github actions": ["gh actions"], "go": ["golang"]})
+
+
+def test_finds_labels_case_insensitively():
+    assert _matcher().labels("Shipped Golang services on LINUX with GitHub  Actions") == {
+        "go", "linux", "github actions",
+    }
+
+
+def test_word_boundaries():
+    assert _matcher().labels("google") == set()
+
+
+def test_non_ascii_capitals_do_not_raise():
+    # "İ".lower() is "i" + U+0307, which is not a key of the alias table
+    matcher = _matcher()
+    assert matcher.labels("LİNUX guru") == {"linux"}
+    assert matcher.labels("GİTHUB ACTİONS") == {"github actions"}
+    hits = matcher.find_all("LİNUX guru")
+    assert (hits[0].start, hits[0].end) == (0, 5)
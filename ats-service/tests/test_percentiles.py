@@ -0,0 +1,68 @@
+import math
+import random
+
+import pytest
+
+from percentiles import PercentileIndex, ScoreDistribution
+
+
+def _quantile(ordered: list[int], q: float) -> int:
+    """Smallest score s with at least q% of scores <= s (nearest rank)."""
+    return ordered[max(1, math.ceil(len(ordered) * q / 100)) - 1]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_distribution_matches_sorted_list(seed):
+    rng = random.Random(seed)
+    scores = [rng.randint(0, 100) for _ in range(rng.randint(1, 500))]
+    dist = ScoreDistribution()
+    for s in scores:
+        dist.add(s)
+    ordered = sorted(scores)
+
+    for probe in range(-1, 103):
+        below = sum(s < probe for s in scores)
+        assert dist.count_below(probe) == below
+        assert dist.percentile(probe) == round(100.0 * below / len(scores), 1)
+    for q in (1, 10, 25, 50, 75, 90, 99, 100):
+        assert dist.quantile(q) == _quantile(ordered, q)
+    assert sum(dist.histogram().values()) == len(scores)
+
+
+def test_out_of_range_scores_are_clamped():
+    dist = ScoreDistribution()
+    dist.add(-5)
+    dist.add(150)
+    assert dist.quantile(50) == 0 and dist.quantile(100) == 100
+
+
+def test_empty_distribution():
+    assert ScoreDistribution().percentile(50) == 0.0
+
+
+def test_small_role_partition_falls_back_to_global():
+    index = PercentileIndex(min_partition_size=3)
+    rng = random.Random(0)
+    everyone = [rng.randint(0, 100) for _ in range(50)]
+    for s in everyone:
+        index.add({"overall": s, "semantic": s})
+    pm = [10, 20]
+    for s in pm:
+        index.add({"overall": s, "semantic": s}, role="Product Manager")
+
+    rank = index.rank({"overall": 15, "semantic": 15}, role="product manager")
+    population = everyone + pm
+    assert rank["partition"] == "all" and rank["sample_size"] == len(population)
+    assert rank["overall"] == round(100.0 * sum(s < 15 for s in population) / len(population), 1)
+
+    index.add({"overall": 30, "semantic": 30}, role="product manager ")
+    rank = index.rank({"overall": 15, "semantic": 15}, role="Product Manager")
+    assert rank["partition"] == "product manager" and rank["sample_size"] == 3
+    assert rank["overall"] == round(100.0 / 3, 1)
+
+
+def test_load_skips_rows_without_a_score():
+    index = PercentileIndex()
+    loaded = index.load([{"score": 70, "semantic": 60, "role": "x"}, {"semantic": 50}, None, {"score": 40}])
+    assert loaded == 2
+    assert index.distribution()["count"] == 2
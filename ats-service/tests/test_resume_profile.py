@@ -0,0 +1,15 @@
+from resume_profile import analyze
+
+
+def test_quantified_offsets_survive_length_changing_lowercase():
+    # "İ".lower() is two code points; offsets must still index the original text
+    text = "EXPERIENCE\n- İİİİİİİİİİ at İstanbul: increased revenue by 45% over 12 months\n"
+    hits = analyze(text).quantified
+
+    assert [h.text for h in hits] == ["45%", "12 months"]
+    assert all(text[h.start:h.end] == h.text for h in hits)
+
+
+def test_quantified_matches_any_case():
+    text = "- Led 5 Projects and grew Revenue 3X\n"
+    assert [h.text for h in analyze(text).quantified] == ["5 Projects"]
@@ -5,13 +5,16 @@ Exposes the RAG pipeline as a REST API on port 8001.
 Endpoints:
     POST /api/suggestions  — main suggestion endpoint
     GET  /health           — liveness probe
+    GET  /metrics          — retriever + LLM gateway counters
     GET  /docs             — interactive Swagger UI (auto-generated by FastAPI)
 
 Run with:
     cd rag-service
     uvicorn api.main:app --reload --port 8001
 """
+import asyncio
 import os
+from contextlib import asynccontextmanager
 
 from dotenv import load_dotenv
 from fastapi import FastAPI, HTTPException
@@ -20,10 +23,25 @@ from pydantic import BaseModel, field_validator
 
 load_dotenv()
 
+from engine import llm_gateway
+
 # ─────────────────────────────────────────────────────────────────────────────
 # App init
 # ─────────────────────────────────────────────────────────────────────────────
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load the benchmark index before taking traffic (no-op if it isn't built yet)
+    try:
+        from engine.retriever import get_backend
+        await asyncio.to_thread(get_backend)
+    except Exception as e:
+        print(f"[api] Benchmark index not loaded at startup ({e})")
+    yield
+    # Close the pooled LLM connections
+    await llm_gateway.aclose()
+
+
 app = FastAPI(
     title="Career.ai RAG Suggestion Engine",
     description="Retrieval-Augmented Generation engine that compares a candidate resume "
@@ -31,6 +49,7 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -92,10 +111,21 @@ async def health():
         "version": "1.0.0",
         "embedding_model": "all-MiniLM-L6-v2",
         "llm": "claude-sonnet-4-20250514",
-        "vector_db": "chromadb (cosine)",
+        "vector_db": f"{os.getenv('RETRIEVER_BACKEND', 'numpy')} (cosine)",
     }
 
 
+@app.get("/metrics")
+async def metrics():
+    """Retriever backend / query counters and per-provider LLM gateway counters."""
+    try:
+        from engine.retriever import retriever_stats
+        retriever = retriever_stats()
+    except Exception:
+        retriever = None
+    return {"retriever": retriever, "llm": llm_gateway.stats()}
+
+
 @app.get("/")
 async def root():
     return {
@@ -120,11 +150,11 @@ async def get_suggestions(req: SuggestionRequest):
         score_current, score_projected, top_insight,
         missing_keywords, weak_bullets, structural_issues,
         strengths, benchmark_insight, benchmark_keywords,
-        benchmarks_used, avg_similarity
+        benchmarks_used, avg_similarity, benchmark_role, keyword_coverage
     """
     try:
         run_pipeline = _get_pipeline()
-        result = run_pipeline(
+        result = await run_pipeline(
             user_resume=req.resume_text,
             job_description=req.job_description,
             job_role=req.job_role,
@@ -134,6 +164,10 @@ async def get_suggestions(req: SuggestionRequest):
             status_code=503,
             detail=f"ChromaDB not initialised. Run scripts/ingest.py first. ({e})",
         )
+    except llm_gateway.LLMTimeout as e:
+        raise HTTPException(status_code=504, detail=f"LLM timed out: {e}")
+    except llm_gateway.LLMError as e:
+        raise HTTPException(status_code=502, detail=f"LLM error: {e}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Pipeline error: {e}")
 
@@ -1,38 +1,34 @@
 """
 ai_tailor.py — AI-powered resume tailoring and cover letter generation
-Uses Groq (free tier) with fallback to rule-based generation.
+Uses Groq (free tier, via engine/llm_gateway) with fallback to rule-based generation.
 """
-import os
 import re
 from typing import Optional
 
+from engine import llm_gateway
+
 # ─────────────────────────────────────────────────────────────────────────────
-# Groq client
+# Groq (pooled async client, retries and metrics live in engine/llm_gateway)
 # ─────────────────────────────────────────────────────────────────────────────
-try:
-    from groq import Groq
-    _groq_client = Groq(api_key=os.getenv("GROQ_API_KEY", ""))
-    GROQ_AVAILABLE = bool(os.getenv("GROQ_API_KEY"))
-except Exception:
-    _groq_client = None
-    GROQ_AVAILABLE = False
+GROQ_AVAILABLE = llm_gateway.enabled("groq")
 
 GROQ_MODEL = "llama3-8b-8192"
 
 
-def _call_groq(prompt: str, max_tokens: int = 1024) -> str:
+async def _call_groq(prompt: str, max_tokens: int = 1024) -> str:
     """Call Groq API with error handling."""
-    if not GROQ_AVAILABLE or _groq_client is None:
+    if not GROQ_AVAILABLE:
         return ""
     try:
-        response = _groq_client.chat.completions.create(
-            model=GROQ_MODEL,
-            messages=[{"role": "user", "content": prompt}],
+        response = await llm_gateway.chat(
+            "groq",
+            GROQ_MODEL,
+            [{"role": "user", "content": prompt}],
             max_tokens=max_tokens,
             temperature=0.7,
         )
-        return response.choices[0].message.content.strip()
-    except Exception as e:
+        return response.text.strip()
+    except llm_gateway.LLMError as e:
         print(f"[Groq] Error: {e}")
         return ""
 
@@ -41,7 +37,7 @@ def _call_groq(prompt: str, max_tokens: int = 1024) -> str:
 # Resume Tailoring
 # ─────────────────────────────────────────────────────────────────────────────
 
-def tailor_resume(resume_text: str, job_description: str, job_title: str = "", company: str = "") -> dict:
+async def tailor_resume(resume_text: str, job_description: str, job_title: str = "", company: str = "") -> dict:
     """
     Generate tailoring suggestions and an optimized summary for a specific job.
     Returns: { tailored_summary, keywords_to_add, bullets_to_strengthen, ats_score_boost }
@@ -71,7 +67,7 @@ Provide a JSON response with these exact keys:
 
 Return only valid JSON, no markdown fences."""
 
-    raw = _call_groq(prompt, max_tokens=800)
+    raw = await _call_groq(prompt, max_tokens=800)
 
     # Parse JSON response
     try:
@@ -114,7 +110,7 @@ def _rule_based_tailor(resume_text: str, jd: str, job_title: str) -> dict:
 # Cover Letter Generation
 # ─────────────────────────────────────────────────────────────────────────────
 
-def generate_cover_letter(
+async def generate_cover_letter(
     resume_text: str,
     job_description: str,
     job_title: str = "",
@@ -160,7 +156,7 @@ Return JSON:
 
 Return only valid JSON, no markdown fences."""
 
-    raw = _call_groq(prompt, max_tokens=700)
+    raw = await _call_groq(prompt, max_tokens=700)
 
     try:
         clean = re.sub(r'```(?:json)?|```', '', raw).strip()
@@ -202,7 +198,7 @@ I'd welcome the opportunity to discuss how my background can contribute to your
 # Custom Question Answering (for application forms)
 # ─────────────────────────────────────────────────────────────────────────────
 
-def answer_application_questions(
+async def answer_application_questions(
     resume_text: str,
     questions: list[str],
     job_title: str = "",
@@ -233,7 +229,7 @@ Return JSON array:
 ]
 Return only valid JSON."""
 
-    raw = _call_groq(prompt, max_tokens=600)
+    raw = await _call_groq(prompt, max_tokens=600)
 
     try:
         clean = re.sub(r'```(?:json)?|```', '', raw).strip()
@@ -10,6 +10,7 @@ Endpoints:
     POST /api/answer-questions  — Answer custom application questions
     POST /api/batch-apply       — Batch apply with SSE streaming progress
     GET  /health                — Liveness probe
+    GET  /metrics               — LLM gateway counters (calls, retries, tokens, latency)
 
 Run with:
     uvicorn auto_apply_service.main:app --port 5000 --reload
@@ -20,6 +21,7 @@ import json
 import os
 import sys
 import time
+from contextlib import asynccontextmanager
 from typing import Optional
 
 # Add parent to path so imports work
@@ -38,14 +40,23 @@ load_dotenv()
 # ─────────────────────────────────────────────────────────────────────────────
 from auto_apply_service.job_scraper import scrape_jobs_multi, compute_match_score, JOBSPY_AVAILABLE
 from auto_apply_service.ai_tailor import tailor_resume, generate_cover_letter, answer_application_questions, GROQ_AVAILABLE
+from engine import llm_gateway
 
 # ─────────────────────────────────────────────────────────────────────────────
 # App init
 # ─────────────────────────────────────────────────────────────────────────────
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Close the pooled LLM connections
+    await llm_gateway.aclose()
+
+
 app = FastAPI(
     title="career.AI Auto-Apply Engine",
     description="SpeedyApply-powered multi-platform job scraping, AI tailoring, and batch application.",
     version="2.0.0",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -115,6 +126,11 @@ async def health():
     }
 
 
+@app.get("/metrics")
+async def metrics():
+    return {"llm": llm_gateway.stats()}
+
+
 @app.get("/")
 async def root():
     return {"message": "career.ai Auto-Apply Engine running 🚀", "docs": "/docs"}
@@ -203,7 +219,7 @@ async def tailor_endpoint(req: TailorRequest):
     if not req.resume_text or not req.jd_text:
         raise HTTPException(status_code=400, detail="resume_text and jd_text are required")
 
-    result = tailor_resume(
+    result = await tailor_resume(
         resume_text=req.resume_text,
         job_description=req.jd_text,
         job_title=req.job_title,
@@ -220,7 +236,7 @@ async def cover_letter_endpoint(req: CoverLetterRequest):
     if not req.resume_text or not req.jd_text:
         raise HTTPException(status_code=400, detail="resume_text and jd_text are required")
 
-    result = generate_cover_letter(
+    result = await generate_cover_letter(
         resume_text=req.resume_text,
         job_description=req.jd_text,
         job_title=req.job_title,
@@ -235,7 +251,7 @@ async def questions_endpoint(req: QuestionsRequest):
     """
     Generate AI answers to custom application questions.
     """
-    result = answer_application_questions(
+    result = await answer_application_questions(
         resume_text=req.resume_text,
         questions=req.questions,
         job_title=req.job_title,
@@ -288,7 +304,7 @@ async def batch_apply(req: BatchApplyRequest):
             tailor_result = {}
             try:
                 jd = job.description or f"{job.position} at {job.company}"
-                tailor_result = tailor_resume(
+                tailor_result = await tailor_resume(
                     resume_text=req.resume_text,
                     job_description=jd,
                     job_title=job.position,
@@ -314,7 +330,7 @@ async def batch_apply(req: BatchApplyRequest):
 
                 try:
                     jd = job.description or f"{job.position} at {job.company}"
-                    cover_result = generate_cover_letter(
+                    cover_result = await generate_cover_letter(
                         resume_text=req.resume_text,
                         job_description=jd,
                         job_title=job.position,
@@ -0,0 +1,158 @@
+"""
+engine/catalog.py — Role / seniority catalog of the benchmark set
+Counts of every role and seniority value in the index, built when the
+retriever loads (and rebuilt when ingest publishes a new index), plus the
+resolution of free-text role hints to a known role:
+
+    1. normalized exact match            "software engineer"
+    2. alias table                        "SDE", "full stack developer"
+    3. the same after dropping seniority  "Senior Software Engineer"
+    4. fuzzy string match (difflib)       "sofware enginer"
+    5. embedding match against the role names (ROLE_MATCH_MIN_SIM)
+
+The retriever uses the counts to choose filtered or unfiltered search before
+querying, instead of trying a filter and retrying without it.
+"""
+import difflib
+import os
+import re
+import threading
+from collections import Counter
+from typing import Callable, List, Optional
+
+import numpy as np
+
+ROLE_MATCH_MIN_SIM = float(os.getenv("ROLE_MATCH_MIN_SIM", "0.6"))
+
+# Canonical role (normalized) → hints that mean it. Targets missing from the
+# catalog are ignored, so the table can name roles the benchmark set lacks.
+_ALIASES = {
+    "software engineer": (
+        "swe", "sde", "software developer", "software development engineer", "developer", "programmer",
+        "backend developer", "backend engineer", "frontend developer", "frontend engineer",
+        "front end developer", "full stack developer", "fullstack developer", "full stack engineer",
+        "web developer", "application developer", "java developer", "python developer",
+    ),
+    "data analyst": (
+        "data analytics", "analytics", "bi analyst", "business intelligence analyst", "mis analyst",
+        "reporting analyst", "sql analyst", "product analyst",
+    ),
+    "product manager": (
+        "pm", "apm", "associate product manager", "product owner", "product management", "technical product manager",
+    ),
+    "digital marketing": (
+        "digital marketer", "digital marketing executive", "digital marketing manager", "marketing",
+        "marketing executive", "seo", "seo specialist", "seo executive", "social media manager",
+        "performance marketing", "performance marketer", "growth marketer", "content marketer",
+    ),
+    "sales executive": (
+        "sales", "sales representative", "sales manager", "business development", "business development executive",
+        "bde", "bdr", "sdr", "account executive", "inside sales",
+    ),
+    "hr manager": (
+        "hr", "human resources", "hr executive", "hr generalist", "hrbp", "hr business partner",
+        "recruiter", "talent acquisition", "talent acquisition specialist",
+    ),
+    "financial analyst": (
+        "finance", "finance analyst", "fp&a", "fp&a analyst", "investment analyst", "equity research analyst",
+        "credit analyst", "accountant", "chartered accountant", "ca",
+    ),
+    "graphic designer": (
+        "designer", "visual designer", "ui designer", "ux designer", "ui/ux designer", "ui ux designer",
+        "product designer", "creative designer", "motion designer",
+    ),
+    "business analyst": ("ba", "business systems analyst", "it business analyst", "functional analyst"),
+    "devops engineer": (
+        "devops", "sre", "site reliability engineer", "cloud engineer", "platform engineer",
+        "infrastructure engineer", "build engineer", "release engineer", "devsecops engineer",
+    ),
+}
+_ALIAS_LOOKUP = {alias: role for role, aliases in _ALIASES.items() for alias in aliases}
+
+# Leading words that describe level, not role
+_SENIORITY_WORDS = {
+    "senior", "sr", "junior", "jr", "lead", "principal", "staff", "intern", "trainee", "fresher",
+    "mid", "mid-level", "entry", "entry-level", "head", "chief", "i", "ii", "iii",
+}
+_RESOLVE_CACHE_ITEMS = 1024
+
+
+def normalize_role(role: Optional[str]) -> str:
+    return " ".join(re.sub(r"[^a-z0-9+#/&. -]", " ", (role or "").lower()).replace("-", " ").split())
+
+
+def normalize_seniority(seniority: Optional[str]) -> str:
+    """'mid-level (3-6 yr)' -> 'mid-level', 'Senior' -> 'senior'."""
+    text = (seniority or "").lower().split("(")[0].strip()
+    return text.split()[0] if text else ""
+
+
+def _strip_seniority(norm: str) -> str:
+    words = [w for w in norm.split() if w not in _SENIORITY_WORDS]
+    return " ".join(words)
+
+
+class RoleCatalog:
+    def __init__(self, role_counts: dict[str, int], seniority_counts: dict[str, int]):
+        self.role_counts = dict(role_counts)
+        self.seniority_counts = dict(seniority_counts)
+        # normalized name → role exactly as stored in the metadata
+        self._by_norm = {normalize_role(r): r for r in self.role_counts if r}
+        self._role_names = sorted(self._by_norm)
+        self._role_matrix: Optional[np.ndarray] = None
+        self._resolved: dict[str, Optional[str]] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_metadatas(cls, metadatas: List[dict]) -> "RoleCatalog":
+        roles = Counter(m.get("role", "") for m in metadatas)
+        seniorities = Counter(m.get("seniority", "") for m in metadatas)
+        roles.pop("", None)
+        seniorities.pop("", None)
+        return cls(roles, seniorities)
+
+    def count(self, role: Optional[str]) -> int:
+        return self.role_counts.get(role, 0) if role else 0
+
+    def _lookup(self, norm: str) -> Optional[str]:
+        if norm in self._by_norm:
+            return self._by_norm[norm]
+        alias = _ALIAS_LOOKUP.get(norm)
+        return self._by_norm.get(alias) if alias else None
+
+    def _embedding_match(self, norm: str, embed: Callable[[str], List[float]]) -> Optional[str]:
+        if self._role_matrix is None:
+            self._role_matrix = np.asarray([embed(name) for name in self._role_names], dtype=np.float32)
+        sims = self._role_matrix @ np.asarray(embed(norm), dtype=np.float32)
+        best = int(np.argmax(sims))
+        return self._by_norm[self._role_names[best]] if sims[best] >= ROLE_MATCH_MIN_SIM else None
+
+    def resolve(self, hint: Optional[str], embed: Optional[Callable[[str], List[float]]] = None) -> Optional[str]:
+        """Known role closest to `hint`, or None (→ unfiltered search)."""
+        norm = normalize_role(hint)
+        if not norm or not self._role_names:
+            return None
+        with self._lock:
+            if norm in self._resolved:
+                return self._resolved[norm]
+
+        stripped = _strip_seniority(norm)
+        role = self._lookup(norm) or (self._lookup(stripped) if stripped else None)
+        if role is None:
+            candidates = self._role_names + [a for a, r in _ALIAS_LOOKUP.items() if r in self._by_norm]
+            close = difflib.get_close_matches(stripped or norm, candidates, n=1, cutoff=0.8)
+            role = self._lookup(close[0]) if close else None
+        if role is None and embed is not None:
+            role = self._embedding_match(stripped or norm, embed)
+
+        with self._lock:
+            if len(self._resolved) >= _RESOLVE_CACHE_ITEMS:
+                self._resolved.clear()
+            self._resolved[norm] = role
+        return role
+
+    def stats(self) -> dict:
+        return {
+            "roles": dict(sorted(self.role_counts.items())),
+            "seniorities": dict(sorted(self.seniority_counts.items())),
+        }
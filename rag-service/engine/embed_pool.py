@@ -0,0 +1,74 @@
+"""
+engine/embed_pool.py — Multi-process embedding for bulk ingest
+sentence-transformers on CPU scales poorly past a few threads inside one
+process, so bulk ingest runs INGEST_WORKERS processes that each load the model
+once and use INGEST_THREADS_PER_WORKER torch threads. With workers × threads ≈
+cores, throughput grows close to linearly with the worker count.
+
+Workers are started with "spawn" (torch is not fork-safe). A spawned child
+re-imports the parent's main module before the pool initializer runs, so the
+thread-count variables are set in the parent before the pool is created, and
+callers keep torch and chromadb out of their module-level imports. With one
+worker the model runs in-process on a single background thread instead.
+"""
+import multiprocessing
+import os
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import List
+
+import numpy as np
+
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", str(os.cpu_count() or 1)))
+INGEST_THREADS_PER_WORKER = int(os.getenv("INGEST_THREADS_PER_WORKER", "1"))
+
+
+def _set_thread_env(threads: int) -> None:
+    # Inherited by spawned workers, so their BLAS/OpenMP pools are sized from
+    # the first import of numpy or torch
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[var] = str(threads)
+    os.environ["TOKENIZERS_PARALLELISM"] = "false"
+
+
+def _init_worker(threads: int) -> None:
+    import torch
+
+    torch.set_num_threads(threads)
+    from engine.embedder import get_model
+
+    get_model()
+
+
+def _embed(texts: List[str]) -> np.ndarray:
+    from engine.embedder import embed_matrix
+
+    return embed_matrix(texts, batch_size=len(texts))
+
+
+class EmbedPool:
+    def __init__(self, workers: int = INGEST_WORKERS, threads_per_worker: int = INGEST_THREADS_PER_WORKER):
+        self.workers = max(1, workers)
+        self._executor: Executor
+        if self.workers == 1:
+            self._executor = ThreadPoolExecutor(max_workers=1)
+        else:
+            _set_thread_env(threads_per_worker)
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(threads_per_worker,),
+            )
+
+    def submit(self, texts: List[str]) -> Future:
+        """Embed one batch; the future resolves to a float32 (len(texts), dim) array."""
+        return self._executor.submit(_embed, texts)
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self) -> "EmbedPool":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -8,6 +8,8 @@ Every other file in this service imports from here.
 from sentence_transformers import SentenceTransformer
 from typing import List
 
+import numpy as np
+
 _model = None  # Singleton — loaded once, reused across all requests
 
 
@@ -45,3 +47,19 @@ def embed_batch(texts: List[str]) -> List[List[float]]:
         show_progress_bar=True,
     )
     return embeddings.tolist()
+
+
+def embed_matrix(texts: List[str], batch_size: int = 256) -> np.ndarray:
+    """
+    embed_batch for bulk ingest: one float32 array, no progress bar.
+    Callers pass length-sorted batches, so one batch_size chunk pads little.
+    """
+    model = get_model()
+    texts = [t[:3000] for t in texts]
+    return model.encode(
+        texts,
+        normalize_embeddings=True,
+        batch_size=batch_size,
+        show_progress_bar=False,
+        convert_to_numpy=True,
+    ).astype(np.float32, copy=False)
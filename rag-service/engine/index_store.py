@@ -0,0 +1,80 @@
+"""
+engine/index_store.py — Versioned benchmark index artifacts
+Every ingest writes a complete new version, then flips a pointer, so the API
+never reads a half-written index:
+
+    <VECTOR_INDEX_PATH>.versions/<version>/vectors.npy|json|docs.*   (engine/vector_index.py)
+    <VECTOR_INDEX_PATH>.versions/<version>/keywords.npz|json         (engine/keyword_index.py)
+    <VECTOR_INDEX_PATH>.current                                       → "<version>"
+
+The pointer is replaced with os.replace (atomic), and the retriever reloads
+when its mtime changes. The newest INDEX_KEEP_VERSIONS versions are kept for
+rollback: point .current at an older one by hand. A plain <prefix>.npy/.json
+artifact from before versioning is still loaded when there is no pointer.
+"""
+import os
+import shutil
+import time
+from typing import Optional
+
+INDEX_PATH = os.getenv("VECTOR_INDEX_PATH", "./artifacts/benchmark_index")
+# Model the indexed vectors come from (engine/embedder.py)
+EMBED_MODEL = "all-MiniLM-L6-v2"
+INDEX_KEEP_VERSIONS = int(os.getenv("INDEX_KEEP_VERSIONS", "2"))
+
+
+def _pointer(prefix: str) -> str:
+    return f"{prefix}.current"
+
+
+def _versions_dir(prefix: str) -> str:
+    return f"{prefix}.versions"
+
+
+def current_version(prefix: str) -> Optional[str]:
+    """Directory of the published version, or None."""
+    try:
+        with open(_pointer(prefix), encoding="utf-8") as f:
+            name = f.read().strip()
+    except OSError:
+        return None
+    return os.path.join(_versions_dir(prefix), name) if name else None
+
+
+def vectors_prefix(prefix: str) -> str:
+    version = current_version(prefix)
+    return os.path.join(version, "vectors") if version else prefix
+
+
+def keywords_prefix(prefix: str) -> Optional[str]:
+    version = current_version(prefix)
+    return os.path.join(version, "keywords") if version else None
+
+
+def marker(prefix: str) -> str:
+    """File whose mtime changes when a new index is published."""
+    pointer = _pointer(prefix)
+    return pointer if os.path.exists(pointer) else f"{prefix}.json"
+
+
+def new_version(prefix: str) -> str:
+    """Create an empty directory for the next version."""
+    now = time.time()
+    # Sortable by creation time, which publish() relies on for pruning
+    name = time.strftime("%Y%m%dT%H%M%S", time.gmtime(now)) + f".{int(now % 1 * 1e6):06d}"
+    path = os.path.join(_versions_dir(prefix), name)
+    os.makedirs(path)
+    return path
+
+
+def publish(prefix: str, version: str) -> None:
+    """Point readers at `version`, then drop all but the newest kept versions."""
+    with open(f"{_pointer(prefix)}.tmp", "w", encoding="utf-8") as f:
+        f.write(os.path.basename(version))
+    os.replace(f"{_pointer(prefix)}.tmp", _pointer(prefix))
+
+    root = _versions_dir(prefix)
+    names = sorted(os.listdir(root))
+    for name in names[:-INDEX_KEEP_VERSIONS] if INDEX_KEEP_VERSIONS > 0 else []:
+        if name != os.path.basename(version):
+            shutil.rmtree(os.path.join(root, name), ignore_errors=True)
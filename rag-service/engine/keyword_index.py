@@ -0,0 +1,215 @@
+"""
+engine/keyword_index.py — Ingest-time keyword index of the benchmark resumes
+Built once by scripts/ingest.py from every benchmark's full ats_keywords list
+(the ChromaDB metadata only keeps the top 15 as a string), so requests never
+re-split or re-count keyword strings.
+
+Artifact:
+    <prefix>.npz   — CSR arrays
+        postings_ptr / postings   keyword id → benchmark rows  (inverted index)
+        doc_ptr / doc_terms       benchmark row → keyword ids  (forward index)
+        role_df                   roles × keywords document frequency
+        seniority_df              seniorities × keywords document frequency
+    <prefix>.json  — {"ids", "vocabulary", "roles", "seniorities", "role_sizes",
+                      "seniority_sizes", "top_by_role"}
+
+Keywords are matched case-insensitively; each is reported in its most common
+spelling.
+"""
+import json
+import os
+import re
+from collections import Counter
+from typing import Iterable, List, Optional
+
+import numpy as np
+
+TOP_KEYWORDS_PER_ROLE = 30
+
+
+def normalize_keyword(keyword: str) -> str:
+    return " ".join(keyword.lower().split())
+
+
+def _csr(groups: List[List[int]]) -> tuple[np.ndarray, np.ndarray]:
+    ptr = np.zeros(len(groups) + 1, dtype=np.int64)
+    ptr[1:] = np.cumsum([len(g) for g in groups])
+    flat = np.fromiter((x for g in groups for x in g), dtype=np.int32, count=int(ptr[-1]))
+    return ptr, flat
+
+
+class KeywordIndex:
+    def __init__(self, arrays: dict, meta: dict):
+        self.ids: List[str] = meta["ids"]
+        self.vocabulary: List[str] = meta["vocabulary"]
+        self.roles: List[str] = meta["roles"]
+        self.seniorities: List[str] = meta["seniorities"]
+        self.role_sizes: List[int] = meta["role_sizes"]
+        self.seniority_sizes: List[int] = meta["seniority_sizes"]
+        self.top_by_role: dict[str, List[int]] = meta["top_by_role"]
+
+        self.postings_ptr = arrays["postings_ptr"]
+        self.postings = arrays["postings"]
+        self.doc_ptr = arrays["doc_ptr"]
+        self.doc_terms = arrays["doc_terms"]
+        self.role_df = arrays["role_df"]
+        self.seniority_df = arrays["seniority_df"]
+
+        self.row_of = {bid: row for row, bid in enumerate(self.ids)}
+        self.term_of = {normalize_keyword(kw): t for t, kw in enumerate(self.vocabulary)}
+        self.role_of = {r: i for i, r in enumerate(self.roles)}
+        self._patterns: dict[int, re.Pattern] = {}
+
+    @classmethod
+    def build(cls, ids: List[str], keywords: List[Iterable[str]], metadatas: List[dict]) -> "KeywordIndex":
+        term_of: dict[str, int] = {}
+        spellings: List[Counter] = []
+        doc_terms: List[List[int]] = []
+        for kws in keywords:
+            terms = []
+            for kw in kws:
+                norm = normalize_keyword(kw)
+                if not norm:
+                    continue
+                t = term_of.setdefault(norm, len(term_of))
+                if t == len(spellings):
+                    spellings.append(Counter())
+                spellings[t][kw.strip()] += 1
+                terms.append(t)
+            doc_terms.append(sorted(set(terms)))
+
+        roles = sorted({m.get("role", "") for m in metadatas})
+        seniorities = sorted({m.get("seniority", "") for m in metadatas})
+        role_idx = {r: i for i, r in enumerate(roles)}
+        seniority_idx = {s: i for i, s in enumerate(seniorities)}
+        vocab_size = len(term_of)
+        role_df = np.zeros((len(roles), vocab_size), dtype=np.int32)
+        seniority_df = np.zeros((len(seniorities), vocab_size), dtype=np.int32)
+        postings: List[List[int]] = [[] for _ in range(vocab_size)]
+        for row, (terms, meta) in enumerate(zip(doc_terms, metadatas)):
+            role_df[role_idx[meta.get("role", "")], terms] += 1
+            seniority_df[seniority_idx[meta.get("seniority", "")], terms] += 1
+            for t in terms:
+                postings[t].append(row)
+
+        role_sizes = Counter(m.get("role", "") for m in metadatas)
+        seniority_sizes = Counter(m.get("seniority", "") for m in metadatas)
+        postings_ptr, postings_flat = _csr(postings)
+        doc_ptr, doc_flat = _csr(doc_terms)
+        top_by_role = {
+            role: [int(t) for t in np.argsort(-role_df[i], kind="stable")[:TOP_KEYWORDS_PER_ROLE] if role_df[i, t] > 0]
+            for i, role in enumerate(roles)
+        }
+        arrays = {
+            "postings_ptr": postings_ptr, "postings": postings_flat,
+            "doc_ptr": doc_ptr, "doc_terms": doc_flat,
+            "role_df": role_df, "seniority_df": seniority_df,
+        }
+        meta = {
+            "ids": list(ids),
+            "vocabulary": [s.most_common(1)[0][0] for s in spellings],
+            "roles": roles,
+            "seniorities": seniorities,
+            "role_sizes": [role_sizes[r] for r in roles],
+            "seniority_sizes": [seniority_sizes[s] for s in seniorities],
+            "top_by_role": top_by_role,
+        }
+        return cls(arrays, meta)
+
+    @classmethod
+    def load(cls, prefix: str) -> Optional["KeywordIndex"]:
+        """Load the artifact; returns None if it does not exist."""
+        npz_path, meta_path = f"{prefix}.npz", f"{prefix}.json"
+        if not (os.path.exists(npz_path) and os.path.exists(meta_path)):
+            return None
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        with np.load(npz_path) as data:
+            arrays = {name: data[name] for name in data.files}
+        print(f"[keyword_index] Loaded {len(meta['vocabulary'])} keywords over {len(meta['ids'])} benchmarks")
+        return cls(arrays, meta)
+
+    def save(self, prefix: str) -> None:
+        """Write the artifact; files are replaced atomically."""
+        os.makedirs(os.path.dirname(os.path.abspath(prefix)), exist_ok=True)
+        meta = {
+            "ids": self.ids,
+            "vocabulary": self.vocabulary,
+            "roles": self.roles,
+            "seniorities": self.seniorities,
+            "role_sizes": self.role_sizes,
+            "seniority_sizes": self.seniority_sizes,
+            "top_by_role": self.top_by_role,
+        }
+        with open(f"{prefix}.npz.tmp", "wb") as f:
+            np.savez(
+                f, postings_ptr=self.postings_ptr, postings=self.postings, doc_ptr=self.doc_ptr,
+                doc_terms=self.doc_terms, role_df=self.role_df, seniority_df=self.seniority_df,
+            )
+        with open(f"{prefix}.json.tmp", "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(f"{prefix}.npz.tmp", f"{prefix}.npz")
+        os.replace(f"{prefix}.json.tmp", f"{prefix}.json")
+
+    def benchmarks_with(self, keyword: str) -> List[str]:
+        """Ids of the benchmarks listing `keyword`."""
+        t = self.term_of.get(normalize_keyword(keyword))
+        if t is None:
+            return []
+        return [self.ids[row] for row in self.postings[self.postings_ptr[t]:self.postings_ptr[t + 1]]]
+
+    def common_keywords(self, benchmark_ids: List[str], limit: int = 20, min_count: int = 2) -> Optional[List[str]]:
+        """
+        Keywords shared by at least min_count of the given benchmarks, most
+        common first. None if any id is not in the index (caller falls back).
+        """
+        rows = [self.row_of.get(bid) for bid in benchmark_ids]
+        if any(row is None for row in rows):
+            return None
+        if not rows:
+            return []
+        terms = np.concatenate([self.doc_terms[self.doc_ptr[r]:self.doc_ptr[r + 1]] for r in rows])
+        counts = np.bincount(terms, minlength=len(self.vocabulary))
+        top = np.argsort(-counts, kind="stable")[:limit]
+        return [self.vocabulary[t] for t in top if counts[t] >= min_count]
+
+    def _in_text(self, t: int, text: str) -> bool:
+        pattern = self._patterns.get(t)
+        if pattern is None:
+            kw = re.escape(normalize_keyword(self.vocabulary[t])).replace(r"\ ", r"\s+")
+            pattern = self._patterns[t] = re.compile(rf"(?<![a-z0-9]){kw}(?![a-z0-9])")
+        return pattern.search(text) is not None
+
+    def coverage(self, resume_text: str, role: Optional[str] = None) -> dict:
+        """
+        How much of the role population's top keywords the resume contains,
+        weighted by document frequency. role=None uses all benchmarks.
+        """
+        if role in self.role_of:
+            i = self.role_of[role]
+            population, df = self.role_sizes[i], self.role_df[i]
+            top = self.top_by_role[role]
+        else:
+            role, population, df = None, sum(self.role_sizes), self.role_df.sum(axis=0)
+            top = [int(t) for t in np.argsort(-df, kind="stable")[:TOP_KEYWORDS_PER_ROLE] if df[t] > 0]
+
+        text = resume_text.lower()
+        covered = [t for t in top if self._in_text(t, text)]
+        missing = [t for t in top if t not in set(covered)]
+        total = int(df[top].sum())
+        return {
+            "role": role,
+            "population": population,
+            "coverage": round(int(df[covered].sum()) / total, 3) if total else 0.0,
+            "covered": [self.vocabulary[t] for t in covered],
+            "missing": [
+                {"keyword": self.vocabulary[t], "share": round(int(df[t]) / population, 3)} for t in missing
+            ],
+        }
+
+    def stats(self) -> dict:
+        return {
+            "keywords": len(self.vocabulary),
+            "benchmarks": len(self.ids),
+            "postings": int(self.postings.shape[0]),
+        }
@@ -6,14 +6,23 @@ Ties the full RAG pipeline together:
   3. Generate Claude suggestions (Generation)
 
 Your FastAPI server only calls run_rag_pipeline() — nothing else.
+It is a coroutine: retrieval runs on a worker thread and the Claude call is
+awaited through engine/llm_gateway, so the event loop is never blocked.
 """
+import asyncio
 from typing import Optional
 
-from engine.retriever import extract_benchmark_keywords, find_similar_resumes
+from engine.retriever import extract_benchmark_keywords, find_similar_resumes, keyword_coverage, resolve_role
 from engine.suggester import generate_suggestions
 
 
-def run_rag_pipeline(
+def _retrieve(user_resume: str, job_role: Optional[str]) -> tuple[Optional[str], list, Optional[dict]]:
+    role = resolve_role(job_role)
+    similar = find_similar_resumes(user_resume=user_resume, job_role=role, n=5)
+    return role, similar, keyword_coverage(user_resume, role)
+
+
+async def run_rag_pipeline(
     user_resume: str,
     job_description: str,
     job_role: Optional[str] = None,
@@ -29,13 +38,12 @@ def run_rag_pipeline(
         benchmark_keywords   — keywords common across top benchmark resumes
         benchmarks_used      — number of retrieved benchmarks
         avg_similarity       — average cosine similarity of retrieved benchmarks
+        benchmark_role       — catalog role job_role resolved to (None = all roles)
+        keyword_coverage     — resume coverage of the top keywords across every
+                               benchmark of that role (None without a keyword index)
     """
     print("[1/3] Finding similar benchmarks…")
-    similar = find_similar_resumes(
-        user_resume=user_resume,
-        job_role=job_role,
-        n=5,
-    )
+    role, similar, coverage = await asyncio.to_thread(_retrieve, user_resume, job_role)
 
     benchmark_kws = extract_benchmark_keywords(similar)
     avg_sim = round(
@@ -45,7 +53,7 @@ def run_rag_pipeline(
     print(f"      Retrieved {len(similar)} benchmarks (avg similarity: {avg_sim})")
 
     print("[2/3] Generating Claude suggestions…")
-    suggestions = generate_suggestions(
+    suggestions = await generate_suggestions(
         user_resume=user_resume,
         similar_resumes=similar,
         job_description=job_description,
@@ -55,6 +63,8 @@ def run_rag_pipeline(
     suggestions["benchmark_keywords"] = benchmark_kws
     suggestions["benchmarks_used"] = len(similar)
     suggestions["avg_similarity"] = avg_sim
+    suggestions["benchmark_role"] = role
+    suggestions["keyword_coverage"] = coverage
 
     sc = suggestions.get("score_current", "?")
     sp = suggestions.get("score_projected", "?")
@@ -1,21 +1,52 @@
 """
 engine/retriever.py — Phase 4
-Searches ChromaDB for the N most similar benchmark resumes
+Searches the benchmark index for the N most similar benchmark resumes
 to whatever resume the user submits.
 
 This is the R in RAG — Retrieval.
+
+Backends (RETRIEVER_BACKEND):
+    numpy   — default. Exact in-memory search over the benchmark matrix
+              (engine/vector_index.py). It loads the published version of
+              VECTOR_INDEX_PATH (engine/index_store.py), or exports the
+              ChromaDB collection into memory if there is none.
+    chroma  — query the ChromaDB collection directly (needs chromadb)
+
+Each backend carries a RoleCatalog (engine/catalog.py) built when it loads.
+job_role hints are resolved to a known role, and the query plan is chosen up
+front from the partition size, so every request is a single search:
+    no / unknown role          → unfiltered
+    partition ≥ n benchmarks   → role-filtered
+    partition < n benchmarks   → the whole partition, backfilled with the best
+                                 unfiltered matches
+The backend is reloaded (index + catalog + keyword index) when ingest
+publishes a new version; the pointer's mtime is checked at most every
+INDEX_REFRESH_S seconds.
+
+Keyword statistics come from the version's keyword index
+(engine/keyword_index.py) when it exists, else from the retrieved metadata.
 """
 import os
+import threading
+import time
 from collections import Counter
 from typing import List, Optional
 
-import chromadb
+import numpy as np
 from dotenv import load_dotenv
 
+from engine import index_store
+from engine.index_store import EMBED_MODEL, INDEX_PATH
+from engine.catalog import RoleCatalog
 from engine.embedder import embed_text
+from engine.keyword_index import KeywordIndex
+from engine.vector_index import VectorIndex
 
 load_dotenv()
 
+BACKEND = os.getenv("RETRIEVER_BACKEND", "numpy").strip().lower()
+INDEX_REFRESH_S = float(os.getenv("INDEX_REFRESH_S", "5"))
+
 _collection = None  # Cached ChromaDB collection
 
 
@@ -23,6 +54,8 @@ def get_collection():
     """Lazy-load and cache the ChromaDB collection."""
     global _collection
     if _collection is None:
+        import chromadb
+
         chroma_path = os.getenv("CHROMA_DB_PATH", "./chroma_db")
         collection_name = os.getenv("COLLECTION_NAME", "benchmark_resumes")
         client = chromadb.PersistentClient(path=chroma_path)
@@ -32,6 +65,188 @@ def get_collection():
     return _collection
 
 
+def _to_similarity(cosine: float) -> float:
+    # Same 0–1 scale as ChromaDB's cosine distance d = 1 − cos: 1 − d/2
+    return round((1 + cosine) / 2, 3)
+
+
+def _plan(catalog: RoleCatalog, n: int, role: Optional[str]) -> str:
+    count = catalog.count(role)
+    if count == 0:
+        return "unfiltered"
+    return "filtered" if count >= n else "backfilled"
+
+
+class NumpyBackend:
+    name = "numpy"
+
+    def __init__(self, index: VectorIndex):
+        self.index = index
+        self.catalog = RoleCatalog.from_metadatas(index.metadatas)
+        self.keywords: Optional[KeywordIndex] = None
+
+    def query(self, query_emb: List[float], n: int, role: Optional[str]) -> List[dict]:
+        query = np.asarray(query_emb, dtype=np.float32)
+        plan = _plan(self.catalog, n, role)
+        if plan == "filtered":
+            hits = self.index.search(query, n, role=role)
+        elif plan == "backfilled":
+            hits = self.index.search_backfilled(query, n, role)
+        else:
+            hits = self.index.search(query, n)
+        texts = self.index.documents_at([row for row, _ in hits])
+        return [
+            {
+                "id": self.index.ids[row],
+                "text": text,
+                "metadata": self.index.metadatas[row],
+                "similarity": _to_similarity(cosine),
+            }
+            for (row, cosine), text in zip(hits, texts)
+        ]
+
+    def stats(self) -> dict:
+        return self.index.stats()
+
+
+class ChromaBackend:
+    name = "chroma"
+
+    def __init__(self, collection):
+        self.collection = collection
+        data = collection.get(include=["metadatas"])
+        self.catalog = RoleCatalog.from_metadatas([dict(m or {}) for m in data["metadatas"]])
+        self.keywords: Optional[KeywordIndex] = None
+
+    def _query(self, query_emb: List[float], n: int, where: Optional[dict]) -> List[dict]:
+        results = self.collection.query(
+            query_embeddings=[query_emb],
+            n_results=n,
+            where=where,
+            include=["documents", "metadatas", "distances"],
+        )
+        ids = results["ids"][0]
+        docs = results["documents"][0]
+        metas = results["metadatas"][0]
+        dists = results["distances"][0]
+        # ChromaDB cosine: distance 0=identical, 2=opposite → convert to similarity 0–1
+        return [
+            {"id": ids[i], "text": docs[i], "metadata": metas[i], "similarity": round(1 - dists[i] / 2, 3)}
+            for i in range(len(docs))
+        ]
+
+    def query(self, query_emb: List[float], n: int, role: Optional[str]) -> List[dict]:
+        plan = _plan(self.catalog, n, role)
+        if plan == "unfiltered":
+            hits = self._query(query_emb, n, None)
+        elif plan == "filtered":
+            hits = self._query(query_emb, n, {"role": role})
+        else:
+            # ChromaDB cannot backfill in one query: take the whole partition,
+            # then the best unfiltered hits that are not already in it
+            hits = self._query(query_emb, self.catalog.count(role), {"role": role})
+            seen = {h["id"] for h in hits}
+            hits += [h for h in self._query(query_emb, n, None) if h["id"] not in seen]
+        return hits[:n]
+
+    def stats(self) -> dict:
+        return {"vectors": self.collection.count()}
+
+
+_backend = None
+_backend_lock = threading.Lock()
+_index_mtime: Optional[float] = None
+_next_refresh = 0.0
+_stats_lock = threading.Lock()
+_queries = 0
+_query_ms = 0.0
+
+
+def _artifact_mtime() -> Optional[float]:
+    try:
+        return os.stat(index_store.marker(INDEX_PATH)).st_mtime
+    except OSError:
+        return None
+
+
+def _load_backend():
+    global _collection, _index_mtime
+    # ingest.py publishes the version last, after it has updated the collection
+    _index_mtime = _artifact_mtime()
+    if BACKEND == "chroma":
+        _collection = None
+        backend = ChromaBackend(get_collection())
+    else:
+        backend = NumpyBackend(_load_index())
+    keywords_prefix = index_store.keywords_prefix(INDEX_PATH)
+    backend.keywords = KeywordIndex.load(keywords_prefix) if keywords_prefix else None
+    return backend
+
+
+def _load_index() -> VectorIndex:
+    index = VectorIndex.load(index_store.vectors_prefix(INDEX_PATH))
+    if index is None:
+        try:
+            collection = get_collection()
+        except ImportError:
+            raise FileNotFoundError(
+                f"No benchmark index at {INDEX_PATH} and chromadb is not installed"
+            )
+        print(f"[retriever] No index at {INDEX_PATH}; loading vectors from ChromaDB into memory")
+        index = VectorIndex.from_chroma(collection, EMBED_MODEL)
+    return index
+
+
+def _maybe_refresh() -> None:
+    """Swap in a freshly loaded backend if ingest has rewritten the artifact since."""
+    global _backend, _next_refresh
+    now = time.monotonic()
+    if now < _next_refresh:
+        return
+    _next_refresh = now + INDEX_REFRESH_S
+    if _artifact_mtime() == _index_mtime:
+        return
+    with _backend_lock:
+        if _artifact_mtime() == _index_mtime:
+            return
+        try:
+            backend = _load_backend()
+        except Exception as e:
+            # Keep serving the old index (e.g. the published version was pruned)
+            print(f"[retriever] Reload after ingest failed ({e}); keeping the current index")
+            return
+        _backend = backend
+        print(f"[retriever] Reloaded the {backend.name} backend after ingest")
+
+
+def get_backend():
+    """Load the configured backend once (called at startup and on first query)."""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = _load_backend()
+                print(f"[retriever] Using the {_backend.name} backend")
+    _maybe_refresh()
+    return _backend
+
+
+def resolve_role(job_role: Optional[str]) -> Optional[str]:
+    """The catalog role a job_role hint maps to (None → unfiltered search)."""
+    return get_backend().catalog.resolve(job_role, embed=embed_text)
+
+
+def retriever_stats() -> dict:
+    with _stats_lock:
+        out = {"backend": BACKEND, "loaded": _backend is not None, "queries": _queries,
+               "avg_query_ms": round(_query_ms / _queries, 3) if _queries else 0.0}
+    if _backend is not None:
+        out.update(_backend.stats())
+        out["catalog"] = _backend.catalog.stats()
+        out["keyword_index"] = _backend.keywords.stats() if _backend.keywords else None
+    return out
+
+
 def find_similar_resumes(
     user_resume: str,
     job_role: Optional[str] = None,
@@ -39,50 +254,25 @@ def find_similar_resumes(
 ) -> List[dict]:
     """
     Find the N benchmark resumes most similar to the user's resume.
-    Optionally filter by job_role for tighter matches.
+    Optionally filter by job_role for tighter matches; the hint is resolved
+    against the role catalog ("SDE", "Senior Backend Developer", ...).
 
     Returns a list of dicts with keys:
+        id          — benchmark id
         text        — full resume text
         metadata    — {role, seniority, keywords}
         similarity  — cosine similarity score 0–1
     """
-    collection = get_collection()
+    global _queries, _query_ms
+    backend = get_backend()
+    role = backend.catalog.resolve(job_role, embed=embed_text)
     query_emb = embed_text(user_resume)
 
-    # Build optional where-filter for role
-    where = {"role": job_role} if job_role else None
-
-    try:
-        results = collection.query(
-            query_embeddings=[query_emb],
-            n_results=n,
-            where=where,
-            include=["documents", "metadatas", "distances"],
-        )
-    except Exception:
-        # Fall back without role filter if filtered query fails (e.g. no matching role)
-        results = collection.query(
-            query_embeddings=[query_emb],
-            n_results=n,
-            include=["documents", "metadatas", "distances"],
-        )
-
-    similar = []
-    docs = results["documents"][0]
-    metas = results["metadatas"][0]
-    dists = results["distances"][0]
-
-    for i in range(len(docs)):
-        # ChromaDB cosine: distance 0=identical, 2=opposite → convert to similarity 0–1
-        sim = round(1 - dists[i] / 2, 3)
-        similar.append(
-            {
-                "text": docs[i],
-                "metadata": metas[i],
-                "similarity": sim,
-            }
-        )
-
+    started = time.perf_counter()
+    similar = backend.query(query_emb, n, role)
+    with _stats_lock:
+        _queries += 1
+        _query_ms += (time.perf_counter() - started) * 1000
     return similar
 
 
@@ -92,6 +282,13 @@ def extract_benchmark_keywords(similar_resumes: List[dict]) -> List[str]:
     Returns up to 20 keywords that appear in at least 2 benchmarks.
     Useful for the LLM suggestion prompt context.
     """
+    keywords = _backend.keywords if _backend is not None else None
+    if keywords is not None:
+        found = keywords.common_keywords([r.get("id") for r in similar_resumes])
+        if found is not None:
+            return found
+
+    # No keyword index (or it predates these benchmarks): count the metadata strings
     all_kws: List[str] = []
     for r in similar_resumes:
         kws_raw = r["metadata"].get("keywords", "")
@@ -100,3 +297,13 @@ def extract_benchmark_keywords(similar_resumes: List[dict]) -> List[str]:
 
     counter = Counter(all_kws)
     return [kw for kw, count in counter.most_common(20) if count >= 2]
+
+
+def keyword_coverage(user_resume: str, role: Optional[str]) -> Optional[dict]:
+    """
+    Share of the role's top benchmark keywords (weighted by how many of the
+    role's benchmarks list them) that the resume contains. None without a
+    keyword index.
+    """
+    keywords = get_backend().keywords
+    return keywords.coverage(user_resume, role) if keywords is not None else None
@@ -3,20 +3,21 @@ engine/suggester.py — Phase 5
 The brain of the RAG engine.
 
 Takes the user's resume + 5 benchmark resumes + job description,
-sends them to Claude, and returns structured JSON suggestions.
+sends them to Claude (through engine/llm_gateway), and returns structured
+JSON suggestions.
 
 Prompt engineering is critical here — Claude must return valid JSON only.
 """
 import json
-import os
 from typing import List, Optional
 
-import anthropic
 from dotenv import load_dotenv
 
 load_dotenv()
 
-client = anthropic.Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+from engine import llm_gateway
+
+CLAUDE_MODEL = "claude-sonnet-4-20250514"
 
 # ─────────────────────────────────────────────────────────────────────────────
 # Claude Prompt
@@ -62,7 +63,7 @@ Respond ONLY with valid JSON. No preamble, no markdown, no trailing text.
 }}"""
 
 
-def generate_suggestions(
+async def generate_suggestions(
     user_resume: str,
     similar_resumes: List[dict],
     job_description: str,
@@ -70,6 +71,7 @@ def generate_suggestions(
     """
     Call Claude with the candidate resume + benchmarks + JD.
     Returns parsed suggestion JSON or an error dict.
+    Raises llm_gateway.LLMError (LLMTimeout past LLM_TIMEOUT_S) if the call fails.
     """
     # Build benchmark text block
     benchmarks_text = ""
@@ -85,13 +87,15 @@ def generate_suggestions(
         job_description=job_description[:1000] if job_description else "Not provided — use general best practices for the role.",
     )
 
-    response = client.messages.create(
-        model="claude-sonnet-4-20250514",
+    response = await llm_gateway.chat(
+        "anthropic",
+        CLAUDE_MODEL,
+        [{"role": "user", "content": prompt}],
         max_tokens=2500,
-        messages=[{"role": "user", "content": prompt}],
+        temperature=1.0,
     )
 
-    raw = response.content[0].text.strip()
+    raw = response.text.strip()
 
     # Strip markdown code block if Claude wraps in ```json … ```
     if raw.startswith("```"):
@@ -0,0 +1,279 @@
+"""
+engine/vector_index.py — In-memory exact vector index for the benchmark resumes
+At benchmark scale (hundreds to ~100k vectors) a brute-force matmul over one
+contiguous matrix is exact and faster than an ANN index, so retrieval needs no
+database round trip.
+
+Artifact (written by scripts/ingest.py, or exported from ChromaDB):
+    <prefix>.npy        — one L2-normalized embedding per row (float16 or float32)
+    <prefix>.json       — {"model", "dim", "dtype", "ids", "metadatas"}
+    <prefix>.docs.jsonl — one JSON string (the document text) per row
+    <prefix>.docs.npy   — int64 byte offsets of those lines (rows + 1)
+
+Document texts are read from disk by row when a result needs them, so neither
+loading an index nor writing one (VectorIndexWriter) holds every text at once.
+
+Rows are stored sorted by (role, seniority), so a role filter, or a role +
+seniority filter, is a contiguous slice of the matrix. A seniority-only filter
+is a precomputed row-index array. top-k uses argpartition, so only the k best
+rows are sorted.
+
+float32 artifacts are memory-mapped. float16 artifacts halve the file and are
+upcast to float32 once at load, because numpy has no BLAS path for float16.
+"""
+import json
+import os
+import threading
+from typing import Callable, Optional, Sequence, Union
+
+import numpy as np
+
+
+def _sort_key(meta: dict) -> tuple[str, str]:
+    return meta.get("role", ""), meta.get("seniority", "")
+
+
+class DocumentStore:
+    """Document texts of a saved index, read by row from <prefix>.docs.jsonl."""
+
+    def __init__(self, prefix: str):
+        self.offsets = np.load(f"{prefix}.docs.npy")
+        # Held open: the version directory may be pruned while this index is
+        # still serving, until the retriever reloads
+        self._file = open(f"{prefix}.docs.jsonl", "rb")
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self.offsets.shape[0] - 1
+
+    def __getitem__(self, row: int) -> str:
+        return self.take([row])[0]
+
+    def take(self, rows: Sequence[int]) -> list[str]:
+        out: dict[int, str] = {}
+        with self._lock:
+            for row in sorted(set(rows)):  # sequential reads
+                self._file.seek(int(self.offsets[row]))
+                out[row] = json.loads(self._file.read(int(self.offsets[row + 1] - self.offsets[row])))
+        return [out[row] for row in rows]
+
+
+class VectorIndex:
+    def __init__(
+        self,
+        matrix: np.ndarray,
+        ids: list[str],
+        documents: Union[list[str], DocumentStore],
+        metadatas: list[dict],
+        model: str = "",
+    ):
+        self.matrix = matrix
+        self.ids = ids
+        self.documents = documents
+        self.metadatas = metadatas
+        self.model = model
+
+        # Contiguous [start, end) slices (rows are sorted by role, seniority)
+        self.role_slices: dict[str, tuple[int, int]] = {}
+        self.role_seniority_slices: dict[tuple[str, str], tuple[int, int]] = {}
+        seniority_rows: dict[str, list[int]] = {}
+        for row, meta in enumerate(metadatas):
+            role, seniority = _sort_key(meta)
+            start, _ = self.role_slices.get(role, (row, row))
+            self.role_slices[role] = (start, row + 1)
+            start, _ = self.role_seniority_slices.get((role, seniority), (row, row))
+            self.role_seniority_slices[(role, seniority)] = (start, row + 1)
+            seniority_rows.setdefault(seniority, []).append(row)
+        self.seniority_rows = {s: np.asarray(rows, dtype=np.int64) for s, rows in seniority_rows.items()}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def documents_at(self, rows: Sequence[int]) -> list[str]:
+        if isinstance(self.documents, DocumentStore):
+            return self.documents.take(rows)
+        return [self.documents[r] for r in rows]
+
+    @classmethod
+    def build(
+        cls,
+        embeddings: np.ndarray,
+        ids: list[str],
+        documents: list[str],
+        metadatas: list[dict],
+        model: str = "",
+    ) -> "VectorIndex":
+        """Index rows given in any order (sorts them by role, seniority)."""
+        order = sorted(range(len(ids)), key=lambda i: _sort_key(metadatas[i]))
+        matrix = np.ascontiguousarray(np.asarray(embeddings, dtype=np.float32)[order])
+        return cls(
+            matrix,
+            [ids[i] for i in order],
+            [documents[i] for i in order],
+            [metadatas[i] for i in order],
+            model,
+        )
+
+    @classmethod
+    def from_chroma(cls, collection, model: str = "") -> "VectorIndex":
+        """Pull every vector + document out of a ChromaDB collection."""
+        data = collection.get(include=["embeddings", "documents", "metadatas"])
+        return cls.build(
+            np.asarray(data["embeddings"], dtype=np.float32),
+            list(data["ids"]),
+            list(data["documents"]),
+            [dict(m or {}) for m in data["metadatas"]],
+            model,
+        )
+
+    @classmethod
+    def load(cls, prefix: str, upcast: bool = True) -> Optional["VectorIndex"]:
+        """
+        Load the artifact; returns None if it does not exist. upcast=False keeps
+        a float16 matrix memory-mapped as stored (ingest only copies rows out).
+        """
+        npy_path, meta_path = f"{prefix}.npy", f"{prefix}.json"
+        if not (os.path.exists(npy_path) and os.path.exists(meta_path)):
+            return None
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        matrix = np.load(npy_path, mmap_mode="r")
+        if upcast and matrix.dtype != np.float32:
+            matrix = np.asarray(matrix, dtype=np.float32)
+        # Artifacts from before DocumentStore keep the texts in the JSON
+        documents = meta["documents"] if "documents" in meta else DocumentStore(prefix)
+        print(f"[vector_index] Loaded {matrix.shape[0]} vectors ({meta.get('dtype', 'float32')}) from {npy_path}")
+        return cls(matrix, meta["ids"], documents, meta["metadatas"], meta.get("model", ""))
+
+    def save(self, prefix: str, dtype: str = "float32") -> None:
+        """Write the artifact (rows already sorted); files are replaced atomically."""
+        dim = int(self.matrix.shape[1]) if len(self) else 0
+        writer = VectorIndexWriter(prefix, self.ids, self.metadatas, dim, self.model, dtype)
+        writer.set_rows(np.arange(len(self)), self.matrix)
+        writer.write_documents(self.documents_at)
+        writer.close()
+
+    def search(
+        self,
+        query: np.ndarray,
+        n: int = 5,
+        role: Optional[str] = None,
+        seniority: Optional[str] = None,
+    ) -> list[tuple[int, float]]:
+        """
+        Exact top-n by cosine similarity (rows and query are L2-normalized).
+        role / seniority restrict the search to their partition; an unknown
+        value yields no rows. Returns [(row, cosine)] best first.
+        """
+        query = np.asarray(query, dtype=np.float32)
+        if role and seniority:
+            start, end = self.role_seniority_slices.get((role, seniority), (0, 0))
+            rows, scores = None, self.matrix[start:end] @ query
+        elif role:
+            start, end = self.role_slices.get(role, (0, 0))
+            rows, scores = None, self.matrix[start:end] @ query
+        elif seniority:
+            start, rows = 0, self.seniority_rows.get(seniority, np.empty(0, dtype=np.int64))
+            scores = self.matrix[rows] @ query
+        else:
+            start, rows, scores = 0, None, self.matrix @ query
+
+        k = min(n, scores.shape[0])
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k] if k < scores.shape[0] else np.arange(scores.shape[0])
+        top = top[np.argsort(-scores[top])]
+        found = rows[top] if rows is not None else top + start
+        return [(int(row), float(scores[i])) for row, i in zip(found, top)]
+
+    def search_backfilled(self, query: np.ndarray, n: int, role: str) -> list[tuple[int, float]]:
+        """
+        Every row of a role partition smaller than n, best first, then the best
+        rows outside it up to n — from a single matmul over the whole matrix.
+        """
+        query = np.asarray(query, dtype=np.float32)
+        start, end = self.role_slices.get(role, (0, 0))
+        scores = self.matrix @ query
+        own = np.arange(start, end)
+        own = own[np.argsort(-scores[start:end])]
+
+        rest_scores = scores.copy()
+        rest_scores[start:end] = -np.inf
+        k = min(n - own.shape[0], scores.shape[0] - own.shape[0])
+        if k > 0:
+            rest = np.argpartition(-rest_scores, k - 1)[:k]
+            rest = rest[np.argsort(-rest_scores[rest])]
+            own = np.concatenate([own, rest])
+        return [(int(row), float(scores[row])) for row in own[:n]]
+
+    def stats(self) -> dict:
+        return {
+            "vectors": len(self),
+            "dim": int(self.matrix.shape[1]) if len(self) else 0,
+            "bytes": int(self.matrix.nbytes),
+            "roles": len(self.role_slices),
+            "seniorities": len(self.seniority_rows),
+            "model": self.model,
+        }
+
+
+class VectorIndexWriter:
+    """
+    Writes an artifact without holding the corpus in memory. Rows are given in
+    input order and placed at their sorted position in a memory-mapped .npy;
+    documents are streamed to disk in row order, a chunk at a time.
+
+        writer = VectorIndexWriter(prefix, ids, metadatas, dim, model, dtype)
+        writer.set_rows(input_rows, vectors)        # any order, any number of calls
+        writer.write_documents(fetch)               # fetch(input_rows) -> texts
+        writer.close()                              # atomically replaces the files
+    """
+
+    def __init__(
+        self,
+        prefix: str,
+        ids: list[str],
+        metadatas: list[dict],
+        dim: int,
+        model: str = "",
+        dtype: str = "float32",
+        chunk: int = 5000,
+    ):
+        os.makedirs(os.path.dirname(os.path.abspath(prefix)), exist_ok=True)
+        self.prefix = prefix
+        self.order = sorted(range(len(ids)), key=lambda i: _sort_key(metadatas[i]))
+        self.position = np.empty(len(ids), dtype=np.int64)
+        self.position[self.order] = np.arange(len(ids))
+        self.meta = {
+            "model": model,
+            "dim": dim,
+            "dtype": dtype,
+            "ids": [ids[i] for i in self.order],
+            "metadatas": [metadatas[i] for i in self.order],
+        }
+        self.chunk = chunk
+        self.matrix = np.lib.format.open_memmap(f"{prefix}.npy.tmp", mode="w+", dtype=dtype, shape=(len(ids), dim))
+
+    def set_rows(self, rows: Sequence[int], vectors: np.ndarray) -> None:
+        """Store vectors for the given input-order rows."""
+        self.matrix[self.position[np.asarray(rows, dtype=np.int64)]] = vectors
+
+    def write_documents(self, fetch: Callable[[list[int]], list[str]]) -> None:
+        offsets = np.zeros(len(self.order) + 1, dtype=np.int64)
+        with open(f"{self.prefix}.docs.jsonl.tmp", "wb") as f:
+            for c in range(0, len(self.order), self.chunk):
+                rows = self.order[c : c + self.chunk]
+                for i, text in enumerate(fetch(rows), start=c):
+                    f.write(json.dumps(text, ensure_ascii=False).encode("utf-8") + b"\n")
+                    offsets[i + 1] = f.tell()
+        with open(f"{self.prefix}.docs.npy.tmp", "wb") as f:
+            np.save(f, offsets)
+
+    def close(self) -> None:
+        self.matrix.flush()
+        del self.matrix
+        with open(f"{self.prefix}.json.tmp", "w", encoding="utf-8") as f:
+            json.dump(self.meta, f, ensure_ascii=False)
+        # The JSON goes last: load() needs it, so a half-replaced set is never read
+        for suffix in (".npy", ".docs.jsonl", ".docs.npy", ".json"):
+            os.replace(f"{self.prefix}{suffix}.tmp", f"{self.prefix}{suffix}")
@@ -0,0 +1,147 @@
+"""
+scripts/bench_retriever.py — numpy vs ChromaDB retrieval benchmark
+Builds synthetic benchmark sets (random L2-normalized 384-dim vectors spread
+over roles and seniorities) at several sizes and measures, per backend:
+    build   — time to load / index the vectors
+    p50/p95 — query latency, unfiltered and with a role filter
+    recall  — ChromaDB's top-k overlap with the exact numpy result (HNSW is approximate)
+
+Queries are pre-embedded, so only the search itself is timed. ChromaDB runs
+in-process on a temporary directory and is skipped if it is not installed.
+
+Usage:
+    cd rag-service
+    python scripts/bench_retriever.py                       # 480, 10k, 100k
+    python scripts/bench_retriever.py --sizes 480 10000 --queries 500 --dtype float16
+"""
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from engine.vector_index import VectorIndex
+
+DIM = 384
+ROLES = [
+    "Software Engineer", "Data Scientist", "Data Analyst", "Product Manager", "DevOps Engineer",
+    "Frontend Developer", "Backend Developer", "ML Engineer", "QA Engineer", "Business Analyst",
+]
+SENIORITIES = ["fresher", "junior", "mid-level", "senior"]
+
+
+def _unit(rows: int, rng: np.random.Generator) -> np.ndarray:
+    m = rng.standard_normal((rows, DIM)).astype(np.float32)
+    return m / np.linalg.norm(m, axis=1, keepdims=True)
+
+
+def _corpus(size: int, rng: np.random.Generator):
+    vectors = _unit(size, rng)
+    ids = [f"bench-{i}" for i in range(size)]
+    metas = [{"role": ROLES[i % len(ROLES)], "seniority": SENIORITIES[i % len(SENIORITIES)]} for i in range(size)]
+    docs = [""] * size
+    return vectors, ids, docs, metas
+
+
+def _latency(fn, queries: np.ndarray, roles: list) -> tuple[float, float, list]:
+    times, results = [], []
+    for q, role in zip(queries, roles):
+        t0 = time.perf_counter()
+        results.append(fn(q, role))
+        times.append((time.perf_counter() - t0) * 1000)
+    times.sort()
+    return statistics.median(times), times[int(0.95 * (len(times) - 1))], results
+
+
+def bench_numpy(vectors, ids, docs, metas, queries, roles, k: int, dtype: str, workdir: str):
+    prefix = os.path.join(workdir, f"index_{dtype}")
+    VectorIndex.build(vectors, ids, docs, metas).save(prefix, dtype=dtype)
+    t0 = time.perf_counter()
+    index = VectorIndex.load(prefix)
+    build_s = time.perf_counter() - t0
+
+    def query(q, role):
+        return [index.ids[row] for row, _ in index.search(q, k, role=role)]
+
+    unfiltered = _latency(query, queries, [None] * len(queries))
+    filtered = _latency(query, queries, roles)
+    return build_s, unfiltered, filtered
+
+
+def bench_chroma(vectors, ids, docs, metas, queries, roles, k: int, workdir: str):
+    import chromadb
+
+    client = chromadb.PersistentClient(path=os.path.join(workdir, "chroma"))
+    collection = client.create_collection(name="bench", metadata={"hnsw:space": "cosine"})
+    t0 = time.perf_counter()
+    for i in range(0, len(ids), 5000):
+        collection.add(
+            ids=ids[i:i + 5000], embeddings=vectors[i:i + 5000].tolist(),
+            metadatas=metas[i:i + 5000], documents=docs[i:i + 5000],
+        )
+    build_s = time.perf_counter() - t0
+
+    def query(q, role):
+        res = collection.query(
+            query_embeddings=[q.tolist()], n_results=k,
+            where={"role": role} if role else None, include=["distances"],
+        )
+        return res["ids"][0]
+
+    unfiltered = _latency(query, queries, [None] * len(queries))
+    filtered = _latency(query, queries, roles)
+    return build_s, unfiltered, filtered
+
+
+def _recall(exact: list, approx: list) -> float:
+    return statistics.mean(len(set(a) & set(e)) / max(len(e), 1) for e, a in zip(exact, approx))
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sizes", type=int, nargs="+", default=[480, 10_000, 100_000])
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--k", type=int, default=5)
+    ap.add_argument("--dtype", default="float32", choices=["float32", "float16"], help="numpy artifact dtype")
+    ap.add_argument("--no-chroma", action="store_true")
+    args = ap.parse_args()
+
+    try:
+        import chromadb  # noqa: F401
+        have_chroma = not args.no_chroma
+    except ImportError:
+        have_chroma = False
+        print("⚠️  chromadb not installed — benchmarking the numpy backend only\n")
+
+    rng = np.random.default_rng(0)
+    print(f"{'size':>8} {'backend':<8} {'build s':>8} {'p50 ms':>8} {'p95 ms':>8} "
+          f"{'role p50':>9} {'role p95':>9} {'recall':>7}")
+    for size in args.sizes:
+        vectors, ids, docs, metas = _corpus(size, rng)
+        queries = _unit(args.queries, rng)
+        roles = [ROLES[i % len(ROLES)] for i in range(args.queries)]
+        workdir = tempfile.mkdtemp(prefix="bench_retriever_")
+        try:
+            build_s, (p50, p95, exact), (rp50, rp95, exact_role) = bench_numpy(
+                vectors, ids, docs, metas, queries, roles, args.k, args.dtype, workdir
+            )
+            print(f"{size:>8} {'numpy':<8} {build_s:>8.3f} {p50:>8.3f} {p95:>8.3f} {rp50:>9.3f} {rp95:>9.3f} {'exact':>7}")
+            if have_chroma:
+                build_s, (p50, p95, approx), (rp50, rp95, approx_role) = bench_chroma(
+                    vectors, ids, docs, metas, queries, roles, args.k, workdir
+                )
+                recall = _recall(exact + exact_role, approx + approx_role)
+                print(f"{size:>8} {'chroma':<8} {build_s:>8.3f} {p50:>8.3f} {p95:>8.3f} {rp50:>9.3f} {rp95:>9.3f} {recall:>7.3f}")
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,105 +1,418 @@
 """
 scripts/ingest.py — Phase 3
-Reads benchmark_resumes.json, embeds each resume's full_text,
-and loads everything into ChromaDB.
+Reads the benchmark resumes and brings the benchmark index up to date with
+them, incrementally:
 
-Run ONCE after generate_benchmarks.py has completed.
+  1. Each resume gets a stable id — its "id" field if it has one, else a hash
+     of full_text + role + seniority + ats_keywords — and a content hash.
+  2. Ids are diffed against the published index: only new or changed resumes
+     are embedded; unchanged vectors are reused and removed ids dropped.
+  3. The full index (vectors + keyword index, engine/index_store.py) is written
+     as a new version and the pointer flipped, so the API never sees a partial
+     index. ChromaDB (when installed) is updated in place with delete + upsert
+     instead of being dropped and rebuilt.
+
+Resumes without an "id" field are keyed by content, so an edited resume
+shows up as one deletion plus one addition.
+
+Large corpora: give a .jsonl file (one resume per line). It is streamed —
+only ids, metadata and keywords are held while diffing, and texts are re-read
+by byte offset when needed. Embedding fans out over a process pool
+(engine/embed_pool.py) in length-sorted batches, so each batch pads little.
+Every finished batch is checkpointed to <VECTOR_INDEX_PATH>.ingest/; an
+interrupted run resumes from there (unless EMBED_MODEL has changed since), and
+the checkpoint is removed once the new version is published.
+The new version is written the same way: vectors go into a memory-mapped
+.npy row by row and document texts are streamed into the artifact a chunk at
+a time (engine/vector_index.py VectorIndexWriter), so neither the matrix nor
+the texts of the whole corpus are held in memory.
+
+Run after generate_benchmarks.py, and again whenever the benchmark set changes.
 
 Usage:
     cd rag-service
-    python scripts/ingest.py
+    python scripts/ingest.py                                  # data/benchmark_resumes.jsonl, else .json
+    python scripts/ingest.py --input real.jsonl --workers 8 --batch-size 256
 """
+import argparse
+import hashlib
 import json
 import os
+import shutil
 import sys
-import uuid
+import time
+from collections import deque
+from typing import Iterator, Optional
 
+import numpy as np
 from dotenv import load_dotenv
 
 load_dotenv()
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-try:
-    import chromadb
-except ImportError:
-    print("❌ chromadb not installed. Run: pip install -r requirements.txt")
-    sys.exit(1)
+from engine import index_store
+from engine.embed_pool import INGEST_THREADS_PER_WORKER, INGEST_WORKERS, EmbedPool
+from engine.index_store import EMBED_MODEL, INDEX_PATH
+from engine.keyword_index import KeywordIndex
+from engine.vector_index import VectorIndex, VectorIndexWriter
 
-from engine.embedder import embed_batch
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "256"))
+CHROMA_BATCH = 5000  # below ChromaDB's max batch size
+READ_CHUNK = 5000
+PROGRESS_EVERY_S = 5.0
 
 
-def ingest_benchmarks():
-    data_path = os.path.join(
-        os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
-        "data",
-        "benchmark_resumes.json",
-    )
+def content_hash(resume: dict) -> str:
+    payload = {
+        "full_text": resume.get("full_text", ""),
+        "role": resume.get("role", ""),
+        "seniority": resume.get("seniority", ""),
+        "ats_keywords": resume.get("ats_keywords", []),
+    }
+    return hashlib.sha256(json.dumps(payload, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()
 
-    if not os.path.exists(data_path):
-        print(f"❌ File not found: {data_path}")
-        print("   Run scripts/generate_benchmarks.py first.")
-        sys.exit(1)
 
-    with open(data_path, encoding="utf-8") as f:
-        resumes = json.load(f)
+class _Source:
+    """Resumes from .jsonl (streamed, texts re-read by byte offset) or a .json array."""
 
-    print(f"📂 Loaded {len(resumes)} benchmark resumes from {data_path}")
+    def __init__(self, path: str):
+        self.path = path
+        self.streamed = path.endswith(".jsonl")
+        self.invalid = 0
+        self._records: Optional[list] = None
 
-    # Connect to ChromaDB
-    chroma_path = os.getenv("CHROMA_DB_PATH", "./chroma_db")
-    collection_name = os.getenv("COLLECTION_NAME", "benchmark_resumes")
+    def records(self) -> Iterator[tuple[int, dict]]:
+        """(locator, resume) pairs; the locator is passed back to texts()."""
+        if not self.streamed:
+            with open(self.path, encoding="utf-8") as f:
+                self._records = json.load(f)
+            yield from enumerate(self._records)
+            return
+        with open(self.path, "rb") as f:
+            while True:
+                offset = f.tell()
+                line = f.readline()
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                try:
+                    yield offset, json.loads(line)
+                except json.JSONDecodeError:
+                    self.invalid += 1
 
-    client = chromadb.PersistentClient(path=chroma_path)
+    def texts(self, locators: list[int]) -> list[str]:
+        if not self.streamed:
+            return [self._records[loc].get("full_text", "") for loc in locators]
+        out: dict[int, str] = {}
+        with open(self.path, "rb") as f:
+            for loc in sorted(set(locators)):  # sequential reads
+                f.seek(loc)
+                out[loc] = json.loads(f.readline()).get("full_text", "")
+        return [out[loc] for loc in locators]
 
-    # Wipe and recreate for a clean ingest
-    try:
-        client.delete_collection(collection_name)
-        print(f"🗑️  Dropped existing collection '{collection_name}'")
-    except Exception:
-        pass
-
-    collection = client.create_collection(
-        name=collection_name,
-        metadata={"hnsw:space": "cosine"},
-    )
-    print(f"✅ Created collection '{collection_name}' with cosine distance")
 
-    BATCH = 50
-    total_ingested = 0
+class _Checkpoint:
+    """
+    Embedded vectors of the current run, one .npz shard per batch. manifest.json
+    records the model and dimension the shards were embedded with; a checkpoint
+    from a different model is discarded instead of being mixed into the index.
+    """
 
-    for i in range(0, len(resumes), BATCH):
-        batch = resumes[i : i + BATCH]
+    def __init__(self, path: str, model: str, fresh: bool = False):
+        self.path = path
+        self.model = model
+        manifest = self._read_manifest()
+        stale = manifest is not None and manifest.get("model") != model
+        if not fresh and stale:
+            print(f"⚠️  Checkpoint in {path} was embedded with {manifest.get('model')}; discarding it")
+        if fresh or stale:
+            shutil.rmtree(path, ignore_errors=True)
+            manifest = None
+        os.makedirs(path, exist_ok=True)
+        self.shards = sorted(n for n in os.listdir(path) if n.endswith(".npz"))
+        if manifest is None and self.shards:
+            # Shards without a manifest predate it: their model is unknown
+            print(f"⚠️  Checkpoint in {path} has no manifest; discarding it")
+            shutil.rmtree(path, ignore_errors=True)
+            os.makedirs(path)
+            self.shards = []
+        self.dim: Optional[int] = manifest.get("dim") if manifest else None
+        # id → content hash it was embedded at
+        self.embedded: dict[str, str] = {}
+        for name in self.shards:
+            with np.load(os.path.join(path, name)) as shard:
+                self.embedded.update(zip(shard["ids"].tolist(), shard["hashes"].tolist()))
 
-        texts = [r.get("full_text", "") for r in batch]
-        ids = [str(uuid.uuid4()) for _ in batch]
-        metadatas = [
-            {
+    def _read_manifest(self) -> Optional[dict]:
+        try:
+            with open(os.path.join(self.path, "manifest.json"), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_manifest(self) -> None:
+        tmp = os.path.join(self.path, "manifest.json.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"model": self.model, "dim": self.dim}, f)
+        os.replace(tmp, os.path.join(self.path, "manifest.json"))
+
+    def add(self, ids: list[str], hashes: list[str], vectors: np.ndarray) -> None:
+        if self.dim is None:
+            self.dim = int(vectors.shape[1])
+            self._write_manifest()
+        elif vectors.shape[1] != self.dim:
+            raise ValueError(f"{self.model} returned {vectors.shape[1]}-dim vectors; the checkpoint holds {self.dim}-dim")
+        name = f"{len(self.shards):08d}.npz"
+        tmp = os.path.join(self.path, f"{name}.tmp")
+        with open(tmp, "wb") as f:
+            np.savez(f, ids=np.asarray(ids), hashes=np.asarray(hashes), vectors=vectors)
+        os.replace(tmp, os.path.join(self.path, name))
+        self.shards.append(name)
+        self.embedded.update(zip(ids, hashes))
+
+    def vectors(self) -> Iterator[tuple[list[str], np.ndarray]]:
+        for name in self.shards:
+            with np.load(os.path.join(self.path, name)) as shard:
+                yield shard["ids"].tolist(), shard["vectors"]
+
+    def clear(self) -> None:
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+def _documents(source: _Source) -> tuple[dict, int]:
+    """id → {locator, keywords, metadata}, in input order; returns (documents, duplicates skipped)."""
+    docs, duplicates = {}, 0
+    for locator, r in source.records():
+        digest = content_hash(r)
+        doc_id = str(r["id"]) if r.get("id") else digest[:32]
+        if doc_id in docs:
+            duplicates += 1
+            continue
+        docs[doc_id] = {
+            "locator": locator,
+            "keywords": r.get("ats_keywords", []),
+            "metadata": {
                 "role": r.get("role", ""),
                 "seniority": r.get("seniority", ""),
                 # Store top-15 keywords joined by comma for retrieval filtering
                 "keywords": ", ".join(r.get("ats_keywords", [])[:15]),
-            }
-            for r in batch
+                "content_hash": digest,
+            },
+        }
+    return docs, duplicates
+
+
+def _current_index(collection) -> tuple[Optional[VectorIndex], bool]:
+    """
+    The index this run diffs against (the published version, else ChromaDB),
+    and whether its vectors can be reused. An index from another model still
+    supplies its ids, so removed resumes are deleted.
+    """
+    index = VectorIndex.load(index_store.vectors_prefix(INDEX_PATH), upcast=False)
+    if index is None and collection is not None and collection.count():
+        index = VectorIndex.from_chroma(collection, EMBED_MODEL)
+    if index is not None and index.model and index.model != EMBED_MODEL:
+        print(f"⚠️  Index was built with {index.model}; re-embedding everything with {EMBED_MODEL}")
+        return index, False
+    return index, True
+
+
+def _embed(source: _Source, docs: dict, todo: list[str], checkpoint: _Checkpoint, pool: EmbedPool, batch_size: int) -> None:
+    """Embed `todo` into the checkpoint with at most 2 batches in flight per worker."""
+    total, done = len(todo), 0
+    started = last_report = time.perf_counter()
+    pending: deque = deque()
+
+    def finish() -> None:
+        nonlocal done, last_report
+        ids, future = pending.popleft()
+        checkpoint.add(ids, [docs[d]["metadata"]["content_hash"] for d in ids], future.result())
+        done += len(ids)
+        now = time.perf_counter()
+        if now - last_report >= PROGRESS_EVERY_S or done == total:
+            last_report = now
+            print(f"  🔄 {done}/{total} embedded · {done / (now - started):.0f} docs/s")
+
+    # Chunks of several batches per worker are read and length-sorted together
+    chunk_size = batch_size * pool.workers * 4
+    for c in range(0, total, chunk_size):
+        chunk = todo[c : c + chunk_size]
+        texts = source.texts([docs[d]["locator"] for d in chunk])
+        order = sorted(range(len(chunk)), key=lambda i: len(texts[i]))
+        for b in range(0, len(order), batch_size):
+            picked = order[b : b + batch_size]
+            while len(pending) >= pool.workers * 2:
+                finish()
+            pending.append(([chunk[i] for i in picked], pool.submit([texts[i] for i in picked])))
+    while pending:
+        finish()
+
+
+def _fresh_vectors(checkpoint: _Checkpoint, docs: dict, wanted: set) -> Iterator[tuple[list[str], list[int], np.ndarray]]:
+    """Per checkpoint shard: (ids, shard rows, shard vectors) embedded at each id's current content."""
+    for shard_ids, vectors in checkpoint.vectors():
+        # An id re-embedded after an edit also sits in an older shard at its old hash
+        picked = [
+            i for i, doc_id in enumerate(shard_ids)
+            if doc_id in wanted and checkpoint.embedded[doc_id] == docs[doc_id]["metadata"]["content_hash"]
         ]
+        if picked:
+            yield [shard_ids[i] for i in picked], picked, vectors
 
-        print(f"  🔄 Embedding batch {i // BATCH + 1} ({len(batch)} resumes)…")
-        embeddings = embed_batch(texts)
 
-        collection.add(
-            documents=texts,
-            embeddings=embeddings,
-            metadatas=metadatas,
-            ids=ids,
+def ingest_benchmarks(
+    data_path: Optional[str] = None,
+    workers: int = INGEST_WORKERS,
+    threads_per_worker: int = INGEST_THREADS_PER_WORKER,
+    batch_size: int = INGEST_BATCH_SIZE,
+    fresh: bool = False,
+):
+    started = time.perf_counter()
+    if data_path is None:
+        data_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+        data_path = os.path.join(data_dir, "benchmark_resumes.jsonl")
+        if not os.path.exists(data_path):
+            data_path = os.path.join(data_dir, "benchmark_resumes.json")
+
+    if not os.path.exists(data_path):
+        print(f"❌ File not found: {data_path}")
+        print("   Run scripts/generate_benchmarks.py first.")
+        sys.exit(1)
+
+    # ── Read (ids, metadata, keywords — texts stay on disk for .jsonl) ─────
+    t0 = time.perf_counter()
+    source = _Source(data_path)
+    docs, duplicates = _documents(source)
+    read_s = time.perf_counter() - t0
+    print(f"📂 Read {len(docs)} benchmark resumes from {data_path} ({read_s:.2f}s)")
+    if duplicates:
+        print(f"⚠️  Skipped {duplicates} duplicate resumes")
+    if source.invalid:
+        print(f"⚠️  Skipped {source.invalid} unparseable lines")
+
+    # Connect to ChromaDB (optional — the numpy retriever only needs the artifact)
+    chroma_path = os.getenv("CHROMA_DB_PATH", "./chroma_db")
+    collection_name = os.getenv("COLLECTION_NAME", "benchmark_resumes")
+    collection = None
+    # Imported here, not at module level: spawned embed workers re-import this script
+    try:
+        import chromadb
+    except ImportError:
+        chromadb = None
+    if chromadb is not None:
+        client = chromadb.PersistentClient(path=chroma_path)
+        collection = client.get_or_create_collection(
+            name=collection_name,
+            metadata={"hnsw:space": "cosine"},
         )
+    else:
+        print("⚠️  chromadb not installed — writing the in-memory index artifact only")
+
+    # ── Diff ───────────────────────────────────────────────────────────────
+    t0 = time.perf_counter()
+    current, reusable = _current_index(collection)
+    old_rows = {doc_id: row for row, doc_id in enumerate(current.ids)} if current is not None else {}
+    added, updated, unchanged = [], [], []
+    for doc_id, doc in docs.items():
+        row = old_rows.get(doc_id)
+        if row is None:
+            added.append(doc_id)
+        elif not reusable or current.metadatas[row].get("content_hash") != doc["metadata"]["content_hash"]:
+            updated.append(doc_id)
+        else:
+            unchanged.append(doc_id)
+    deleted = [doc_id for doc_id in old_rows if doc_id not in docs]
+    diff_s = time.perf_counter() - t0
+
+    if reusable and current is not None and not (added or updated or deleted) and index_store.current_version(INDEX_PATH):
+        print(f"✅ Index is up to date ({len(unchanged)} unchanged, {diff_s:.2f}s)")
+        return
+
+    # ── Embed new / changed documents only (resuming from the checkpoint) ──
+    t0 = time.perf_counter()
+    to_embed = added + updated
+    checkpoint = _Checkpoint(f"{INDEX_PATH}.ingest", EMBED_MODEL, fresh=fresh)
+    todo = [d for d in to_embed if checkpoint.embedded.get(d) != docs[d]["metadata"]["content_hash"]]
+    if len(todo) < len(to_embed):
+        print(f"♻️  Resuming: {len(to_embed) - len(todo)} resumes already embedded in {checkpoint.path}")
+    if todo:
+        workers = min(workers, -(-len(todo) // batch_size))
+        print(f"  🚀 Embedding {len(todo)} resumes · {workers} worker(s) × {threads_per_worker} thread(s) · batch {batch_size}")
+        with EmbedPool(workers, threads_per_worker) as pool:
+            _embed(source, docs, todo, checkpoint, pool, batch_size)
+    embed_s = time.perf_counter() - t0
+
+    # ── Build and publish the new version (streamed to disk) ───────────────
+    t0 = time.perf_counter()
+    ids = list(docs)
+    row_of = {doc_id: i for i, doc_id in enumerate(ids)}
+    wanted = set(to_embed)
+    reuse = reusable and current is not None and len(current) > 0
+    dim = checkpoint.dim or (int(current.matrix.shape[1]) if reuse else 0)
+    metas = [docs[d]["metadata"] for d in ids]
 
-        total_ingested += len(batch)
-        print(f"  ✅ {total_ingested}/{len(resumes)} ingested")
+    dtype = os.getenv("VECTOR_INDEX_DTYPE", "float16")
+    version = index_store.new_version(INDEX_PATH)
+    KeywordIndex.build(ids, [docs[d]["keywords"] for d in ids], metas).save(os.path.join(version, "keywords"))
+    writer = VectorIndexWriter(os.path.join(version, "vectors"), ids, metas, dim, EMBED_MODEL, dtype=dtype)
+    if reuse:
+        for c in range(0, len(unchanged), READ_CHUNK):
+            chunk = unchanged[c : c + READ_CHUNK]
+            writer.set_rows([row_of[d] for d in chunk], current.matrix[[old_rows[d] for d in chunk]])
+    for shard_ids, rows, vectors in _fresh_vectors(checkpoint, docs, wanted):
+        writer.set_rows([row_of[d] for d in shard_ids], vectors[rows])
 
-    count = collection.count()
-    print(f"\n🎉 Done! {count} resumes in ChromaDB at '{chroma_path}'")
+    def fetch(rows: list[int]) -> list[str]:
+        chunk = [ids[r] for r in rows]
+        embedded = [d for d in chunk if d in wanted]
+        texts = dict(zip(embedded, source.texts([docs[d]["locator"] for d in embedded])))
+        kept = [d for d in chunk if d not in wanted]
+        texts.update(zip(kept, current.documents_at([old_rows[d] for d in kept]) if kept else []))
+        return [texts[d] for d in chunk]
+
+    writer.write_documents(fetch)
+    writer.close()
+    write_s = time.perf_counter() - t0
+
+    # ── ChromaDB: delete + upsert in place ─────────────────────────────────
+    t0 = time.perf_counter()
+    if collection is not None:
+        for i in range(0, len(deleted), CHROMA_BATCH):
+            collection.delete(ids=deleted[i : i + CHROMA_BATCH])
+        for shard_ids, rows, vectors in _fresh_vectors(checkpoint, docs, wanted):
+            collection.upsert(
+                ids=shard_ids,
+                embeddings=vectors[rows].tolist(),
+                documents=source.texts([docs[d]["locator"] for d in shard_ids]),
+                metadatas=[docs[d]["metadata"] for d in shard_ids],
+            )
+    chroma_s = time.perf_counter() - t0
+
+    # Published last: a running API reloads the index (and role catalog) when it changes
+    index_store.publish(INDEX_PATH, version)
+    checkpoint.clear()
+
+    print(f"\n💾 Published {len(ids)} vectors ({dtype}) as {version}")
+    print(f"   added {len(added)} · updated {len(updated)} · deleted {len(deleted)} · unchanged {len(unchanged)}")
+    rate = f" ({len(todo) / embed_s:.0f} docs/s)" if todo and embed_s > 0 else ""
+    print(
+        f"   read {read_s:.2f}s · diff {diff_s:.2f}s · embed {embed_s:.2f}s{rate} · write {write_s:.2f}s"
+        + (f" · chroma {chroma_s:.2f}s" if collection is not None else "")
+        + f" · total {time.perf_counter() - started:.2f}s"
+    )
+    if collection is not None:
+        print(f"🎉 {collection.count()} resumes in ChromaDB at '{chroma_path}'")
     print("   Next step: uvicorn api.main:app --reload --port 8001")
 
 
 if __name__ == "__main__":
-    ingest_benchmarks()
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--input", help="benchmark resumes (.jsonl streamed, or a .json array)")
+    ap.add_argument("--workers", type=int, default=INGEST_WORKERS, help="embedding processes")
+    ap.add_argument("--threads-per-worker", type=int, default=INGEST_THREADS_PER_WORKER)
+    ap.add_argument("--batch-size", type=int, default=INGEST_BATCH_SIZE, help="resumes per embedding call")
+    ap.add_argument("--fresh", action="store_true", help="discard an interrupted run's checkpoint")
+    args = ap.parse_args()
+    ingest_benchmarks(args.input, args.workers, args.threads_per_worker, args.batch_size, args.fresh)
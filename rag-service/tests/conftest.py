@@ -0,0 +1,5 @@
+import os
+import sys
+
+# engine/ and scripts/ import from the service root (as the API and scripts do)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
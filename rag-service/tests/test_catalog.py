@@ -0,0 +1,55 @@
+import pytest
+
+from engine.catalog import RoleCatalog, normalize_seniority
+
+METAS = [
+    {"role": "Software Engineer", "seniority": "senior"},
+    {"role": "Software Engineer", "seniority": "mid-level"},
+    {"role": "Data Analyst", "seniority": "fresher"},
+    {"role": "", "seniority": ""},
+]
+
+
+@pytest.fixture
+def catalog():
+    return RoleCatalog.from_metadatas(METAS)
+
+
+def test_counts_skip_blank_values(catalog):
+    assert catalog.role_counts == {"Software Engineer": 2, "Data Analyst": 1}
+    assert catalog.count("Software Engineer") == 2
+    assert catalog.count(None) == 0
+
+
+@pytest.mark.parametrize(
+    "hint, role",
+    [
+        ("software engineer", "Software Engineer"),   # exact, normalized
+        ("  SOFTWARE-ENGINEER ", "Software Engineer"),
+        ("SDE", "Software Engineer"),                  # alias
+        ("Full Stack Developer", "Software Engineer"),
+        ("Senior Software Engineer", "Software Engineer"),  # seniority dropped
+        ("Sr. BI Analyst", "Data Analyst"),            # fuzzy match onto an alias
+        ("sofware enginer", "Software Engineer"),      # difflib
+        ("product manager", None),                     # alias target not in the catalog
+        ("astronaut", None),
+        ("", None),
+    ],
+)
+def test_resolve(catalog, hint, role):
+    assert catalog.resolve(hint) == role
+
+
+def test_resolve_falls_back_to_embeddings(catalog):
+    vectors = {"software engineer": [1.0, 0.0], "data analyst": [0.0, 1.0], "number cruncher": [0.1, 0.9]}
+    assert catalog.resolve("number cruncher", embed=lambda text: vectors[text]) == "Data Analyst"
+
+
+def test_resolve_below_min_similarity_is_none(catalog):
+    vectors = {"software engineer": [1.0, 0.0], "data analyst": [0.0, 1.0], "chef": [0.5, -0.5]}
+    assert catalog.resolve("chef", embed=lambda text: vectors[text]) is None
+
+
+def test_normalize_seniority():
+    assert normalize_seniority("Mid-Level (3-6 yr)") == "mid-level"
+    assert normalize_seniority(None) == ""
@@ -0,0 +1,50 @@
+import os
+
+import pytest
+
+from engine import index_store
+
+
+@pytest.fixture
+def prefix(tmp_path):
+    return str(tmp_path / "benchmark_index")
+
+
+def test_nothing_published(prefix):
+    assert index_store.current_version(prefix) is None
+    assert index_store.vectors_prefix(prefix) == prefix
+    assert index_store.keywords_prefix(prefix) is None
+    assert index_store.marker(prefix) == f"{prefix}.json"
+
+
+def test_publish_points_readers_at_the_version(prefix):
+    version = index_store.new_version(prefix)
+    index_store.publish(prefix, version)
+
+    assert index_store.current_version(prefix) == version
+    assert index_store.vectors_prefix(prefix) == os.path.join(version, "vectors")
+    assert index_store.keywords_prefix(prefix) == os.path.join(version, "keywords")
+    assert index_store.marker(prefix) == f"{prefix}.current"
+    assert not os.path.exists(f"{prefix}.current.tmp")
+
+
+def test_publish_keeps_the_newest_versions(prefix, monkeypatch):
+    monkeypatch.setattr(index_store, "INDEX_KEEP_VERSIONS", 2)
+    versions = []
+    for _ in range(4):
+        versions.append(index_store.new_version(prefix))
+        index_store.publish(prefix, versions[-1])
+
+    assert sorted(os.listdir(f"{prefix}.versions")) == [os.path.basename(v) for v in versions[-2:]]
+
+
+def test_published_version_is_never_pruned(prefix, monkeypatch):
+    monkeypatch.setattr(index_store, "INDEX_KEEP_VERSIONS", 1)
+    oldest = index_store.new_version(prefix)
+    middle = index_store.new_version(prefix)
+    newest = index_store.new_version(prefix)
+    index_store.publish(prefix, oldest)
+
+    assert index_store.current_version(prefix) == oldest
+    assert os.path.isdir(oldest) and os.path.isdir(newest)
+    assert not os.path.isdir(middle)
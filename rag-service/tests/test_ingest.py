@@ -0,0 +1,158 @@
+import json
+import sys
+import types
+from concurrent.futures import Future
+
+import numpy as np
+import pytest
+
+from engine import index_store
+from engine.vector_index import VectorIndex
+from scripts import ingest
+
+DIM = 4
+
+
+class Interrupted(Exception):
+    pass
+
+
+def _vector(text: str) -> np.ndarray:
+    seed = int.from_bytes(text.encode("utf-8")[-8:].rjust(8, b"\0"), "little") % 2**32
+    v = np.random.default_rng(seed).normal(size=DIM).astype(np.float32)
+    return v / np.linalg.norm(v)
+
+
+class StubPool:
+    """
+    EmbedPool stand-in: deterministic vectors, records every text it embeds.
+    Batches after the first `fail_after` fail, as if the run were interrupted.
+    """
+
+    embedded: list[str] = []
+    fail_after: int = -1
+
+    def __init__(self, workers: int, threads_per_worker: int):
+        self.workers = workers
+
+    def submit(self, texts: list[str]) -> Future:
+        future = Future()
+        if StubPool.fail_after == 0:
+            future.set_exception(Interrupted())
+            return future
+        StubPool.fail_after -= 1
+        StubPool.embedded.extend(texts)
+        future.set_result(np.stack([_vector(t) for t in texts]))
+        return future
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+class FakeCollection:
+    def __init__(self):
+        self.rows: dict[str, tuple] = {}
+        self.deleted: list[str] = []
+
+    def count(self):
+        return len(self.rows)
+
+    def delete(self, ids):
+        self.deleted.extend(ids)
+        for i in ids:
+            self.rows.pop(i, None)
+
+    def upsert(self, ids, embeddings, documents, metadatas):
+        self.rows.update(zip(ids, zip(embeddings, documents, metadatas)))
+
+
+@pytest.fixture
+def env(tmp_path, monkeypatch):
+    collection = FakeCollection()
+    client = types.SimpleNamespace(get_or_create_collection=lambda **kw: collection)
+    monkeypatch.setitem(sys.modules, "chromadb", types.SimpleNamespace(PersistentClient=lambda path: client))
+    monkeypatch.setattr(ingest, "EmbedPool", StubPool)
+    monkeypatch.setattr(ingest, "INDEX_PATH", str(tmp_path / "benchmark_index"))
+    return types.SimpleNamespace(tmp_path=tmp_path, collection=collection)
+
+
+def _resume(i: int, text: str = "") -> dict:
+    return {
+        "id": f"r{i}",
+        "full_text": text or f"resume {i}",
+        "role": ["software engineer", "data analyst"][i % 2],
+        "seniority": "mid-level",
+        "ats_keywords": ["python", "sql"][: 1 + i % 2],
+    }
+
+
+def _run(env, resumes, fail_after: int = -1, **kwargs):
+    path = env.tmp_path / "resumes.jsonl"
+    path.write_text("".join(json.dumps(r) + "\n" for r in resumes), encoding="utf-8")
+    StubPool.embedded, StubPool.fail_after = [], fail_after
+    ingest.ingest_benchmarks(str(path), workers=2, threads_per_worker=1, batch_size=2, **kwargs)
+    return sorted(StubPool.embedded)
+
+
+def _published():
+    return VectorIndex.load(index_store.vectors_prefix(ingest.INDEX_PATH))
+
+
+def test_incremental_diff(env):
+    v1 = [_resume(i) for i in range(6)]
+    assert _run(env, v1) == sorted(r["full_text"] for r in v1)
+
+    # r1 edited, r4 removed, r6 added, the rest unchanged
+    v2 = [_resume(i, "resume 1 edited" if i == 1 else "") for i in (0, 1, 2, 3, 5, 6)]
+    assert _run(env, v2) == ["resume 1 edited", "resume 6"]
+    assert env.collection.deleted == ["r4"]
+
+    index = _published()
+    assert sorted(index.ids) == ["r0", "r1", "r2", "r3", "r5", "r6"]
+    texts = dict(zip(index.ids, index.documents_at(range(len(index)))))
+    for row, doc_id in enumerate(index.ids):
+        np.testing.assert_allclose(index.matrix[row], _vector(texts[doc_id]), atol=1e-3)
+    assert sorted(env.collection.rows) == sorted(index.ids)
+    assert env.collection.rows["r1"][1] == "resume 1 edited"
+
+
+def test_unchanged_input_publishes_nothing(env):
+    resumes = [_resume(i) for i in range(4)]
+    _run(env, resumes)
+    version = index_store.current_version(ingest.INDEX_PATH)
+
+    assert _run(env, resumes) == []
+    assert index_store.current_version(ingest.INDEX_PATH) == version
+
+
+def test_interrupted_run_resumes_from_the_checkpoint(env):
+    resumes = [_resume(i) for i in range(8)]
+    with pytest.raises(Interrupted):
+        _run(env, resumes, fail_after=2)
+    done = set(StubPool.embedded)
+    assert len(done) == 4
+
+    remaining = _run(env, resumes)
+    assert set(remaining) == {r["full_text"] for r in resumes} - done
+    assert sorted(_published().ids) == sorted(r["id"] for r in resumes)
+
+
+def test_checkpoint_from_another_model_is_discarded(env, monkeypatch):
+    resumes = [_resume(i) for i in range(8)]
+    with pytest.raises(Interrupted):
+        _run(env, resumes, fail_after=2)
+
+    monkeypatch.setattr(ingest, "EMBED_MODEL", "other-model")
+    assert _run(env, resumes) == sorted(r["full_text"] for r in resumes)
+
+
+def test_model_change_re_embeds_and_still_deletes(env, monkeypatch):
+    _run(env, [_resume(i) for i in range(4)])
+
+    monkeypatch.setattr(ingest, "EMBED_MODEL", "other-model")
+    assert _run(env, [_resume(i) for i in range(3)]) == ["resume 0", "resume 1", "resume 2"]
+    assert env.collection.deleted == ["r3"]
+    assert _published().model == "other-model"
@@ -0,0 +1,79 @@
+from collections import Counter
+
+import pytest
+
+from engine.keyword_index import KeywordIndex
+
+IDS = ["a", "b", "c", "d"]
+KEYWORDS = [
+    ["Python", "SQL", "Docker"],
+    ["python", "Kubernetes", "SQL"],
+    ["Excel", "SQL", "Tableau"],
+    ["Python ", "Excel", ""],
+]
+METAS = [
+    {"role": "software engineer", "seniority": "senior"},
+    {"role": "software engineer", "seniority": "mid-level"},
+    {"role": "data analyst", "seniority": "mid-level"},
+    {"role": "data analyst", "seniority": "fresher"},
+]
+
+
+@pytest.fixture
+def index():
+    return KeywordIndex.build(IDS, KEYWORDS, METAS)
+
+
+def test_postings_match_the_input(index):
+    for kw in {k.strip().lower() for kws in KEYWORDS for k in kws if k.strip()}:
+        expected = [bid for bid, kws in zip(IDS, KEYWORDS) if kw in {k.strip().lower() for k in kws}]
+        assert index.benchmarks_with(kw.upper()) == expected
+    assert index.benchmarks_with("rust") == []
+
+
+def test_most_common_spelling_wins(index):
+    assert "Python" in index.vocabulary and "python" not in index.vocabulary
+
+
+def test_document_frequencies(index):
+    sql = index.term_of["sql"]
+    assert index.role_df[index.role_of["software engineer"], sql] == 2
+    assert index.role_df[index.role_of["data analyst"], sql] == 1
+    assert index.seniority_df[index.seniorities.index("mid-level"), sql] == 2
+
+
+def test_common_keywords(index):
+    # sql is in all three, python in two, the rest in one (below min_count)
+    assert index.common_keywords(["a", "b", "c"]) == ["SQL", "Python"]
+    assert index.common_keywords(["a", "missing"]) is None
+    assert index.common_keywords([]) == []
+
+
+def test_coverage_is_weighted_by_document_frequency(index):
+    cov = index.coverage("Senior engineer: python, docker and k8s", role="software engineer")
+    # software engineer df: python 2, sql 2, docker 1, kubernetes 1
+    assert cov["population"] == 2
+    assert sorted(cov["covered"]) == ["Docker", "Python"]
+    assert cov["coverage"] == round(3 / 6, 3)
+    assert {m["keyword"]: m["share"] for m in cov["missing"]} == {"SQL": 1.0, "Kubernetes": 0.5}
+
+
+def test_coverage_matches_whole_words_only(index):
+    assert index.coverage("pythonic sqlite", role="software engineer")["covered"] == []
+
+
+def test_coverage_without_role_uses_everyone(index):
+    cov = index.coverage("sql", role=None)
+    assert cov["role"] is None and cov["population"] == 4
+    assert cov["covered"] == ["SQL"]
+
+
+def test_save_load_round_trip(index, tmp_path):
+    prefix = str(tmp_path / "keywords")
+    index.save(prefix)
+    loaded = KeywordIndex.load(prefix)
+
+    assert loaded.vocabulary == index.vocabulary
+    assert Counter(loaded.benchmarks_with("sql")) == Counter(index.benchmarks_with("sql"))
+    assert loaded.coverage("python sql") == index.coverage("python sql")
+    assert KeywordIndex.load(str(tmp_path / "missing")) is None
@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+
+from engine.vector_index import DocumentStore, VectorIndex
+
+ROLES = ["data analyst", "product manager", "software engineer"]
+SENIORITIES = ["fresher", "mid-level", "senior"]
+
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(7)
+    n, dim = 300, 16
+    vectors = rng.normal(size=(n, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    metas = [{"role": ROLES[i % 3], "seniority": SENIORITIES[(i // 3) % 3]} for i in range(n)]
+    # Rows given unsorted: build() must sort them by (role, seniority)
+    perm = rng.permutation(n)
+    ids = [f"id{i}" for i in perm]
+    index = VectorIndex.build(vectors[perm], ids, [f"text {i}" for i in perm], [metas[i] for i in perm], "m")
+    query = rng.normal(size=dim).astype(np.float32)
+    return index, query / np.linalg.norm(query)
+
+
+def _brute_force(index, query, n, keep):
+    scores = np.asarray(index.matrix, dtype=np.float32) @ query
+    rows = [r for r in range(len(index)) if keep(index.metadatas[r])]
+    rows.sort(key=lambda r: -scores[r])
+    return rows[:n]
+
+
+@pytest.mark.parametrize("role", [None, *ROLES, "unknown role"])
+@pytest.mark.parametrize("seniority", [None, *SENIORITIES])
+def test_search_is_exact_top_k_per_partition(data, role, seniority):
+    index, query = data
+
+    def keep(meta):
+        return (role is None or meta["role"] == role) and (seniority is None or meta["seniority"] == seniority)
+
+    hits = index.search(query, 7, role=role, seniority=seniority)
+    assert [row for row, _ in hits] == _brute_force(index, query, 7, keep)
+    for row, score in hits:
+        assert score == pytest.approx(float(index.matrix[row] @ query), abs=1e-5)
+
+
+def test_search_n_larger_than_partition(data):
+    index, query = data
+    start, end = index.role_seniority_slices[("product manager", "senior")]
+    assert len(index.search(query, 10_000, role="product manager", seniority="senior")) == end - start
+
+
+def test_search_backfilled_puts_the_whole_partition_first(data):
+    index, query = data
+    start, end = index.role_slices["software engineer"]
+    n = end - start + 5
+
+    rows = [row for row, _ in index.search_backfilled(query, n, "software engineer")]
+
+    own = _brute_force(index, query, n, lambda m: m["role"] == "software engineer")
+    rest = _brute_force(index, query, 5, lambda m: m["role"] != "software engineer")
+    assert rows == own + rest
+
+
+def test_search_backfilled_caps_at_index_size(data):
+    index, query = data
+    assert len(index.search_backfilled(query, 10_000, "data analyst")) == len(index)
+
+
+def test_save_load_round_trip(data, tmp_path):
+    index, query = data
+    prefix = str(tmp_path / "vectors")
+    index.save(prefix, dtype="float32")
+
+    loaded = VectorIndex.load(prefix)
+    assert isinstance(loaded.documents, DocumentStore)
+    assert loaded.ids == index.ids and loaded.metadatas == index.metadatas and loaded.model == "m"
+    assert loaded.documents_at([5, 0, 5]) == [index.documents[5], index.documents[0], index.documents[5]]
+    assert loaded.search(query, 5) == index.search(query, 5)
+
+
+def test_float16_artifact_is_upcast(data, tmp_path):
+    index, _ = data
+    prefix = str(tmp_path / "vectors")
+    index.save(prefix, dtype="float16")
+
+    assert VectorIndex.load(prefix).matrix.dtype == np.float32
+    assert VectorIndex.load(prefix, upcast=False).matrix.dtype == np.float16